@@ -0,0 +1,186 @@
+"""
+Асинхронный адаптер PostgreSQL на asyncpg.
+
+Реализует протокол `AsyncDB` поверх пула соединений asyncpg.
+
+Обязанности:
+- Перевод SQL сервисов из стиля psycopg2 (`%s`, `%%`) в стиль asyncpg (`$1`, `%`).
+- Выдача соединений из пула; `transaction()` привязывает соединение к текущей
+  задаче asyncio через contextvars, так что вложенные вызовы внутри
+  `async with db.transaction():` идут через одно соединение.
+- Массовая загрузка через `COPY` (`copy_records_to_table`) из обычного
+  или асинхронного итератора строк.
+- Число затронутых строк: `execute` разбирает статус команды ("INSERT 0 5"),
+  а `executemany` (asyncpg его не сообщает) выполняет DML через `fetchmany`
+  с добавленным `RETURNING 1` — по строке результата на затронутую запись.
+"""
+import logging
+import re
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import AsyncIterable, AsyncIterator, Iterable, Sequence
+import asyncpg
+from app.ports.async_db import AsyncDB
+
+logger = logging.getLogger(__name__)
+
+_PLACEHOLDER = re.compile(r"%s|%%")
+_DML = re.compile(r"^\s*(INSERT|UPDATE|DELETE)\b", re.IGNORECASE)
+_COUNTED_COMMANDS = ("INSERT", "UPDATE", "DELETE", "MERGE")
+
+
+@lru_cache(maxsize=256)
+def _to_dollar(sql: str) -> str:
+    """Заменяет плейсхолдеры `%s` на `$1, $2, ...`, а `%%` — на `%`."""
+    counter = 0
+
+    def replace(match: re.Match) -> str:
+        nonlocal counter
+        if match.group(0) == "%%":
+            return "%"
+        counter += 1
+        return f"${counter}"
+    return _PLACEHOLDER.sub(replace, sql)
+
+
+def _rowcount(status: str) -> int:
+    """Число строк из статуса команды ("INSERT 0 5" -> 5); -1 — для прочих команд."""
+    command, _, rest = status.partition(" ")
+    count = rest.rpartition(" ")[2]
+    return int(count) if command in _COUNTED_COMMANDS and count.isdigit() else -1
+
+
+@lru_cache(maxsize=256)
+def _counting_statement(sql: str) -> str | None:
+    """DML без RETURNING в стиле asyncpg с `RETURNING 1`; None — не подходит."""
+    if not _DML.match(sql) or "RETURNING" in sql.upper():
+        return None
+    return _to_dollar(sql).rstrip().rstrip(";") + " RETURNING 1"
+
+
+class AsyncPostgresDB(AsyncDB):
+    """
+    Реализация порта AsyncDB для PostgreSQL на asyncpg.
+
+    Вне транзакции каждая операция берёт соединение из пула (autocommit),
+    поэтому независимые запросы, запущенные через `asyncio.gather`, идут
+    параллельно на разных соединениях. Внутри `async with db.transaction():`
+    все операции задачи идут через одно соединение — параллельные операции
+    внутри одной транзакции не допускаются (ограничение asyncpg).
+
+    Пример:
+        >>> async with AsyncPostgresDB(dsn, max_size=4) as db:
+        ...     async with db.transaction():
+        ...         await db.executemany(sql, rows)
+        ...     rows = await db.query("SELECT 1 AS x")
+    """
+    dialect = "postgresql"
+
+    def __init__(self, dsn: str, min_size: int = 1, max_size: int = 10):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError(f"Некорректные размеры пула: min={min_size}, max={max_size}")
+        self._dsn = dsn
+        self._min_size = min_size
+        self._max_size = max_size
+        self._pool: asyncpg.Pool | None = None
+        # соединение транзакции текущей задачи (у каждого экземпляра своё)
+        self._bound: ContextVar[asyncpg.Connection | None] = ContextVar(
+            f"asyncpg_conn_{id(self)}", default=None)
+
+    # ---- lifecycle ----
+    async def connect(self) -> None:
+        if self._pool is None:
+            self._pool = await asyncpg.create_pool(
+                self._dsn, min_size=self._min_size, max_size=self._max_size)
+            logger.info("Создан пул соединений asyncpg (%s..%s)", self._min_size, self._max_size)
+
+    async def close(self) -> None:
+        if self._pool is not None:
+            try:
+                await self._pool.close()
+            finally:
+                self._pool = None
+
+    async def __aenter__(self) -> "AsyncPostgresDB":
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    @asynccontextmanager
+    async def _connection(self) -> AsyncIterator[asyncpg.Connection]:
+        """Соединение транзакции текущей задачи или отдельное соединение из пула."""
+        bound = self._bound.get()
+        if bound is not None:
+            yield bound
+            return
+        if self._pool is None:
+            await self.connect()
+        async with self._pool.acquire() as conn:
+            yield conn
+
+    # ---- transaction ----
+    @asynccontextmanager
+    async def transaction(self):
+        """
+        Транзакция на одном соединении из пула, привязанном к текущей задаче.
+        Вложенный вызов присоединяется к внешней транзакции.
+        """
+        if self._bound.get() is not None:
+            yield
+            return
+        async with self._connection() as conn:
+            token = self._bound.set(conn)
+            try:
+                async with conn.transaction():
+                    yield
+            finally:
+                self._bound.reset(token)
+
+    # ---- low-level ops ----
+    async def execute(self, sql: str, params: tuple | None = None) -> int:
+        async with self._connection() as conn:
+            if params is None:
+                # простой протокол: допускает несколько операторов (файлы схемы)
+                return _rowcount(await conn.execute(sql))
+            return _rowcount(await conn.execute(_to_dollar(sql), *params))
+
+    async def executemany(self, sql: str, params_seq: Iterable[tuple]) -> int:
+        statement = _counting_statement(sql)
+        async with self._connection() as conn:
+            if statement is None:
+                await conn.executemany(_to_dollar(sql), params_seq)
+                return -1
+            return len(await conn.fetchmany(statement, params_seq))
+
+    async def query(self, sql: str, params: tuple | None = None) -> list[dict]:
+        async with self._connection() as conn:
+            if params is None:
+                rows = await conn.fetch(sql)
+            else:
+                rows = await conn.fetch(_to_dollar(sql), *params)
+            return [dict(r) for r in rows]
+
+    async def copy_rows(self, table: str, columns: Sequence[str],
+                        rows: Iterable[tuple] | AsyncIterable[tuple]) -> int:
+        """
+        Потоково загружает строки в таблицу через COPY (бинарный формат asyncpg).
+        rows может быть асинхронным итератором. Возвращает количество строк.
+        """
+        count = 0
+
+        async def counted() -> AsyncIterator[tuple]:
+            nonlocal count
+            if isinstance(rows, AsyncIterable):
+                async for row in rows:
+                    count += 1
+                    yield row
+            else:
+                for row in rows:
+                    count += 1
+                    yield row
+        async with self._connection() as conn:
+            await conn.copy_records_to_table(table, records=counted(), columns=list(columns))
+        return count
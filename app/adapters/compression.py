@@ -0,0 +1,91 @@
+"""
+Сжатие файлов выгрузки.
+
+Общий помощник экспортеров: открывает файл результата на запись с потоковым
+сжатием одним из кодеков стандартной библиотеки. Данные сжимаются по мере
+записи, поэтому экспортеры остаются потоковыми.
+
+Кодек выбирается явно (`compression`) или по расширению файла:
+- ".gz" – gzip (уровень 1–9, по умолчанию 6);
+- ".bz2" – bz2 (уровень 1–9, по умолчанию 9);
+- ".xz", ".lzma" – lzma/xz (пресет 0–9, по умолчанию 6).
+Явное `compression="none"` отключает сжатие независимо от расширения.
+
+Функции:
+- `resolve_codec()` – определяет кодек по параметру и расширению.
+- `open_output()` – открывает (сжатый) файл на запись в текстовом или бинарном режиме.
+- `output_size()` – размер выгрузки на диске (файл или каталог с файлами).
+"""
+import bz2
+import gzip
+import io
+import logging
+import lzma
+import os
+from typing import BinaryIO, Callable, TextIO
+
+logger = logging.getLogger(__name__)
+
+_BUFFER_SIZE = 1 << 16
+
+# кодек -> (функция открытия бинарного файла, уровень по умолчанию, допустимые уровни)
+_CODECS: dict[str, tuple[Callable[[str, int], BinaryIO], int, range]] = {
+    "gzip": (lambda path, level: gzip.GzipFile(path, "wb", compresslevel=level), 6, range(0, 10)),
+    "bz2": (lambda path, level: bz2.BZ2File(path, "wb", compresslevel=level), 9, range(1, 10)),
+    "lzma": (lambda path, level: lzma.LZMAFile(path, "wb", preset=level), 6, range(0, 10)),
+}
+COMPRESSION_CODECS = tuple(_CODECS)
+
+_EXTENSIONS = {".gz": "gzip", ".bz2": "bz2", ".xz": "lzma", ".lzma": "lzma"}
+# кодек -> расширение, которое добавляется к имени сжатого файла
+CODEC_EXTENSIONS = {"gzip": ".gz", "bz2": ".bz2", "lzma": ".xz"}
+
+
+def resolve_codec(path: str, compression: str | None = None) -> str | None:
+    """
+    Кодек для файла path: явный compression ("none" — без сжатия)
+    или по расширению. None — писать без сжатия.
+    """
+    if compression is None:
+        for extension, codec in _EXTENSIONS.items():
+            if path.lower().endswith(extension):
+                return codec
+        return None
+    if compression == "none":
+        return None
+    if compression not in _CODECS:
+        raise ValueError(f"Неизвестный кодек сжатия '{compression}', "
+                         f"ожидался один из {COMPRESSION_CODECS} или 'none'")
+    return compression
+
+
+def open_output(path: str, compression: str | None = None, level: int | None = None,
+                binary: bool = False, errors: str = "strict") -> TextIO | BinaryIO:
+    """
+    Открывает файл на запись с буферизацией и потоковым сжатием.
+    binary=False — текстовый поток UTF-8 (errors — как у open()),
+    binary=True — бинарный поток.
+    """
+    codec = resolve_codec(path, compression)
+    if codec is None:
+        raw = open(path, "wb", buffering=_BUFFER_SIZE)  # pylint: disable=consider-using-with
+    else:
+        opener, default_level, levels = _CODECS[codec]
+        level = default_level if level is None else level
+        if level not in levels:
+            raise ValueError(f"Недопустимый уровень сжатия {level} для {codec}: "
+                             f"ожидался {levels.start}..{levels.stop - 1}")
+        logger.info("Сжатие выгрузки %s: %s, уровень %s", path, codec, level)
+        # буфер перед компрессором: мелкие записи экспортеров сжимаются крупными блоками
+        raw = io.BufferedWriter(opener(path, level), buffer_size=_BUFFER_SIZE)
+    if binary:
+        return raw
+    return io.TextIOWrapper(raw, encoding="utf-8", errors=errors)
+
+
+def output_size(path: str) -> int:
+    """Байт на диске: размер файла или сумма файлов каталога (выгрузка Arrow)."""
+    if os.path.isdir(path):
+        with os.scandir(path) as entries:
+            return sum(entry.stat().st_size for entry in entries if entry.is_file())
+    return os.path.getsize(path)
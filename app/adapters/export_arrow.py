@@ -0,0 +1,180 @@
+"""
+Экспортер Apache Arrow IPC (колоночный бинарный формат).
+
+Предоставляет `ArrowExporter`, который сохраняет каждый раздел результата
+отдельным типизированным файлом Arrow IPC (`<раздел>.arrow`) в каталоге `path`.
+Файлы читаются без копирования через отображение в память:
+
+    >>> import pyarrow as pa
+    >>> with pa.memory_map("data/results/result/top5_young_avg.arrow") as source:
+    ...     table = pa.ipc.open_file(source).read_all()
+
+Типы колонок:
+- int -> int64, float и Decimal -> float64, bool -> bool, str -> string;
+- date -> date32, datetime -> timestamp[us], timedelta -> duration[us].
+
+Разделы-итераторы пишутся пакетами (record batch) по `batch_size` строк.
+Схема файла выводится по первым пакетам: пока у какой-то колонки встречались
+только None, пакеты копятся в памяти, а их схемы объединяются (int и float
+дают float64). Следующие пакеты приводятся к схеме файла без потерь: колонка,
+которой нет в схеме, или значение, которое нельзя привести к её типу
+(например, 2.5 в колонке int64), дают ValueError — в таком случае нужен
+больший batch_size. Требуется необязательная зависимость pyarrow.
+
+Сжатие — встроенное в формат IPC (`compression="zstd"` или `"lz4"`): буферы
+сжимаются по отдельности, файл остаётся файлом Arrow (но чтение уже
+распаковывает данные, а не отображает их без копирования).
+"""
+import logging
+import os
+from collections.abc import Iterator
+from decimal import Decimal
+from app import metrics
+from app.adapters.compression import output_size
+from app.ports.exporter import Exporter
+try:
+    import pyarrow as pa
+    import pyarrow.ipc  # pylint: disable=unused-import
+except ImportError:  # необязательная зависимость
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+ARROW_CODECS = ("lz4", "zstd")
+
+
+def _convert_value(value):
+    """Приводит значение к типу, который pyarrow сохранит как число, а не decimal/строку."""
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def _iter_batches(rows, batch_size: int) -> Iterator[list[dict]]:
+    """Строки раздела пакетами словарей; скаляры и словари — одна строка."""
+    if isinstance(rows, dict):
+        rows = [rows]
+    elif not isinstance(rows, (list, Iterator)):
+        rows = [{"value": rows}]
+    batch = []
+    for row in rows:
+        if hasattr(row, "_asdict"):
+            row = row._asdict()  # namedtuple-строки
+        elif not isinstance(row, dict):
+            row = {"value": row}
+        batch.append({key: _convert_value(value) for key, value in row.items()})
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _has_null_columns(schema) -> bool:
+    """Есть ли колонки, тип которых ещё не известен (только None)."""
+    return any(pa.types.is_null(field.type) for field in schema)
+
+
+def _is_number(data_type) -> bool:
+    return pa.types.is_integer(data_type) or pa.types.is_floating(data_type)
+
+
+def _conform(batch: list[dict], schema) -> "pa.RecordBatch":
+    """
+    Пакет в схеме файла: недостающие колонки — null, числа приводятся
+    без потерь (safe cast). Новая колонка или несовместимый тип — ValueError.
+    """
+    record = pa.RecordBatch.from_pylist(batch)
+    unknown = [name for name in record.schema.names if schema.get_field_index(name) < 0]
+    if unknown:
+        raise ValueError(f"Колонки {unknown} появились после того, как схема файла "
+                         f"уже определена ({schema.names})")
+    columns = []
+    for field in schema:
+        index = record.schema.get_field_index(field.name)
+        if index < 0:
+            columns.append(pa.nulls(record.num_rows, field.type))
+            continue
+        column = record.column(index)
+        if column.type != field.type:
+            if not pa.types.is_null(column.type) and not (
+                    _is_number(column.type) and _is_number(field.type)):
+                raise ValueError(f"Колонка {field.name}: тип {column.type} "
+                                 f"несовместим с типом файла {field.type}")
+            try:
+                column = column.cast(field.type, safe=True)
+            except pa.ArrowInvalid as e:
+                raise ValueError(f"Колонка {field.name}: значения {column.type} нельзя "
+                                 f"без потерь привести к типу файла {field.type}") from e
+        columns.append(column)
+    return pa.RecordBatch.from_arrays(columns, schema=schema)
+
+
+class ArrowExporter(Exporter):
+    """
+    Реализация экспортера для сохранения данных в формате Arrow IPC.
+
+    Пример:
+        >>> ArrowExporter().dump({"rooms": [{"id": 1, "name": "Room #1"}]}, "result")
+
+    Результат: каталог result/ с файлом rooms.arrow (колонки id: int64, name: string).
+    Пустой раздел сохраняется файлом без колонок и строк.
+
+    Параметры:
+        batch_size: строк в одном record batch.
+        compression: сжатие буферов IPC ("lz4", "zstd", None — без сжатия).
+        level: уровень сжатия кодека (None — по умолчанию).
+    """
+    def __init__(self, batch_size: int = 65536, compression: str | None = None,
+                 level: int | None = None):
+        if pa is None:
+            raise ImportError("Для экспорта в Arrow установите pyarrow: pip install pyarrow")
+        if batch_size < 1:
+            raise ValueError(f"Размер пакета должен быть положительным, получено: {batch_size}")
+        if compression not in (None, *ARROW_CODECS):
+            raise ValueError(f"Неизвестный кодек Arrow '{compression}', "
+                             f"ожидался один из {ARROW_CODECS}")
+        self._batch_size = batch_size
+        codec = pa.Codec(compression, compression_level=level) if compression else None
+        self._options = pa.ipc.IpcWriteOptions(compression=codec)
+
+    def _write_section(self, rows, path: str) -> int:
+        """Пишет раздел в файл Arrow IPC; возвращает число строк."""
+        batches = _iter_batches(rows, self._batch_size)
+        schema, pending = None, []
+        for batch in batches:
+            inferred = pa.RecordBatch.from_pylist(batch).schema
+            schema = inferred if schema is None else pa.unify_schemas(
+                [schema, inferred], promote_options="permissive")
+            pending.append(batch)
+            if not _has_null_columns(schema):
+                break
+        schema = schema if schema is not None else pa.schema([])
+        count = 0
+        with pa.OSFile(path, "wb") as sink, \
+                pa.ipc.new_file(sink, schema, options=self._options) as writer:
+            for batch in pending:
+                writer.write_batch(pa.RecordBatch.from_pylist(batch, schema=schema))
+                count += len(batch)
+            for batch in batches:
+                writer.write_batch(_conform(batch, schema))
+                count += len(batch)
+        return count
+
+    def dump(self, data: dict, path: str) -> None:
+        """Сохраняет разделы данных в каталог path, по файлу на раздел."""
+        logger.info("Экспорт данных в Arrow IPC")
+        try:
+            os.makedirs(path, exist_ok=True)
+            total_records = 0
+            with metrics.timer("export_seconds", format="arrow"):
+                for section, rows in data.items():
+                    total_records += self._write_section(
+                        rows, os.path.join(path, f"{section}.arrow"))
+            if metrics.is_enabled():
+                metrics.inc("export_records_total", total_records, format="arrow")
+                metrics.inc("export_bytes_total", output_size(path), format="arrow")
+            logger.info("Arrow экспорт завершён, записей: %s", total_records)
+        except Exception as e:
+            logger.error("Ошибка при экспорте Arrow (%s): %s", path, e)
+            raise
@@ -6,13 +6,21 @@
 
 Возможности:
 - Выполняет сериализацию даты, даты и времени, дельты времени и десятичных чисел.
-- Записывает JSON-файл с отступами, удобочитаемый для человека.
+- Принимает разделы в виде итераторов строк (например, результат `db.iter_query`).
+- Записывает JSON-файл с отступами, удобочитаемый для человека,
+  или компактный (indent=None) — меньше размер и быстрее кодирование.
+- Потоковое сжатие gzip/bz2/lzma по расширению файла или параметру.
+- Потоковый режим (по умолчанию): строки разделов кодируются и пишутся в файл
+  по одной по мере поступления из итератора; вывод совпадает с `json.dump`.
 - Используется для экспорта результатов запросов или промежуточных наборов данных.
 """
 import json
 import logging
+from collections.abc import Iterator
 from decimal import Decimal
 from datetime import date, datetime, timedelta
+from app import metrics
+from app.adapters.compression import open_output, output_size
 from app.ports.exporter import Exporter
 
 logger = logging.getLogger(__name__)
@@ -25,9 +33,40 @@ class _EnhancedJSONEncoder(json.JSONEncoder):
             return o.total_seconds() / 86400.0
         if isinstance(o, Decimal):
             return float(o)
+        if isinstance(o, Iterator):
+            # разделы могут приходить итераторами строк (например, из db.iter_query)
+            return list(o)
         return super().default(o)
 
 
+def _encoder_options(indent: int | None) -> dict:
+    """Настройки кодирования: UTF-8 без экранирования, без пробелов в компактном режиме."""
+    separators = (",", ": ") if indent is not None else (",", ":")
+    return {"ensure_ascii": False, "indent": indent, "separators": separators}
+
+
+# строковый кодировщик json (C-реализация) и компактный кодировщик для скаляров
+_encode_str = json.encoder.encode_basestring
+_NESTED = (dict, list, tuple, Iterator)
+_FLAT_ENCODER = _EnhancedJSONEncoder(**_encoder_options(None))
+# частые типы значений строк кодируются напрямую, остальные — _FLAT_ENCODER
+_SCALAR_ENCODERS = {
+    str: _encode_str,
+    int: int.__repr__,
+    bool: lambda value: "true" if value else "false",
+    type(None): lambda value: "null",
+    date: lambda value: _encode_str(value.isoformat()),
+    datetime: lambda value: _encode_str(value.isoformat()),
+}
+
+
+def _rows_as_dicts(data: dict) -> dict:
+    """Разделы-списки и итераторы со строками-namedtuple в виде списков словарей."""
+    return {section: [row._asdict() if hasattr(row, "_asdict") else row for row in rows]
+            if isinstance(rows, (list, Iterator)) else rows
+            for section, rows in data.items()}
+
+
 class JsonExporter(Exporter):
     """
     Реализация экспортера для сохранения данных в формате JSON.
@@ -35,12 +74,98 @@ class JsonExporter(Exporter):
     Пример использования:
         >>> data = {"rooms": [{"id": 1, "name": "Room #1"}]}
         >>> JsonExporter().dump(data, "result.json")
+        >>> JsonExporter(indent=None).dump(data, "result.min.json")  # компактно
+
+    Параметры:
+        indent: отступ (None — компактный вывод без пробелов и переводов строк).
+        streaming: кодировать разделы-списки и итераторы построчно (True)
+            или одним вызовом `json.dump` (False). Вывод одинаковый.
+        compression: кодек сжатия ("gzip", "bz2", "lzma", "none"); по умолчанию
+            определяется по расширению файла (.gz, .bz2, .xz) — см. `compression`.
+        level: уровень сжатия (по умолчанию — свой для каждого кодека).
     """
+    def __init__(self, indent: int | None = 2, streaming: bool = True,
+                 compression: str | None = None, level: int | None = None):
+        self._indent = indent
+        self._streaming = streaming
+        self._compression = compression
+        self._level = level
+
+    def _newline(self, level: int) -> str:
+        """Перевод строки с отступом уровня level (пусто в компактном режиме)."""
+        return "\n" + " " * (self._indent * level) if self._indent is not None else ""
+
+    def _encode(self, encoder: json.JSONEncoder, value, level: int) -> str:
+        """Кодирует значение, сдвигая его вложенные строки на уровень level."""
+        if self._indent is not None and isinstance(value, dict):
+            text = self._encode_flat_row(value, level)
+            if text is not None:
+                return text
+        text = encoder.encode(value)
+        if self._indent is None or level == 0:
+            return text
+        # переводы строк внутри JSON-строк экранированы, поэтому сдвиг безопасен
+        return text.replace("\n", self._newline(level))
+
+    def _encode_flat_row(self, row: dict, level: int) -> str | None:
+        """
+        Быстрый путь для строки-словаря со скалярными значениями: поля собираются
+        напрямую (как их отформатировал бы json с отступом), без медленного
+        Python-кодировщика с отступами. None — строка не плоская.
+        """
+        if not row:
+            return None
+        fields = []
+        pad = self._newline(level + 1)
+        for key, value in row.items():
+            if type(key) is not str or isinstance(value, _NESTED):
+                return None
+            encode = _SCALAR_ENCODERS.get(type(value))
+            text = encode(value) if encode is not None else _FLAT_ENCODER.encode(value)
+            fields.append(f"{pad}{_encode_str(key)}: {text}")
+        return "{" + ",".join(fields) + self._newline(level) + "}"
+
+    def _write_stream(self, data: dict, file) -> None:
+        """Пишет объект верхнего уровня, кодируя строки разделов по одной."""
+        encoder = _EnhancedJSONEncoder(**_encoder_options(self._indent))
+        separator = ": " if self._indent is not None else ":"
+        write = file.write
+        if not data:
+            write("{}")
+            return
+        write("{")
+        for i, (section, rows) in enumerate(data.items()):
+            write("," if i else "")
+            write(self._newline(1))
+            write(encoder.encode(str(section)) + separator)
+            if not isinstance(rows, (list, Iterator)):
+                write(self._encode(encoder, rows, 1))
+                continue
+            count = 0
+            for row in rows:
+                if hasattr(row, "_asdict"):
+                    row = row._asdict()  # namedtuple-строки
+                write("[" if not count else ",")
+                write(self._newline(2))
+                write(self._encode(encoder, row, 2))
+                count += 1
+            write(self._newline(1) + "]" if count else "[]")
+        write(self._newline(0))
+        write("}")
+
     def dump(self, data: dict, path: str) -> None:
-        logger.info("Экспорт данных в JSON")
+        logger.info("Экспорт данных в JSON (потоково: %s, отступ: %s)",
+                    self._streaming, self._indent)
         try:
-            with open(path, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2, cls=_EnhancedJSONEncoder)
+            with metrics.timer("export_seconds", format="json"), \
+                    open_output(path, self._compression, self._level) as f:
+                if self._streaming:
+                    self._write_stream(data, f)
+                else:
+                    json.dump(_rows_as_dicts(data), f, cls=_EnhancedJSONEncoder,
+                              **_encoder_options(self._indent))
+            if metrics.is_enabled():
+                metrics.inc("export_bytes_total", output_size(path), format="json")
             logger.info("Экспорт завершён успешно")
         except Exception as e:
             logger.error("Ошибка при экспорте JSON (%s): %s", path, e)
@@ -0,0 +1,71 @@
+"""
+Экспортер NDJSON (JSON Lines).
+
+Предоставляет `NdjsonExporter`, который пишет результаты построчно:
+одна строка файла — один JSON-объект `{"section": <раздел>, "row": <строка>}`.
+Такой формат читают потоковые обработчики и сборщики логов без разбора
+всего документа.
+
+Возможности:
+- Разделы-списки и итераторы строк пишутся по одной строке на запись,
+  без материализации раздела в памяти.
+- Разделы-словари (например, "meta") и скаляры — одной строкой.
+- Те же преобразования типов, что у `JsonExporter` (дата, десятичное число,
+  дельта времени), компактное кодирование без пробелов.
+- Потоковое сжатие gzip/bz2/lzma по расширению файла или параметру.
+"""
+import logging
+from collections.abc import Iterator
+from app import metrics
+from app.adapters.compression import open_output, output_size
+from app.adapters.export_json import _EnhancedJSONEncoder
+from app.ports.exporter import Exporter
+
+logger = logging.getLogger(__name__)
+
+
+class NdjsonExporter(Exporter):
+    """
+    Реализация экспортера для сохранения данных в формате NDJSON.
+
+    Пример:
+        >>> data = {"rooms": [{"id": 1, "name": "Room #1"}], "meta": {"rows": 1}}
+        >>> NdjsonExporter().dump(data, "result.ndjson")
+
+    Результат:
+        {"section":"rooms","row":{"id":1,"name":"Room #1"}}
+        {"section":"meta","row":{"rows":1}}
+
+    Параметры:
+        compression: кодек сжатия ("gzip", "bz2", "lzma", "none"); по умолчанию
+            определяется по расширению файла (.gz, .bz2, .xz) — см. `compression`.
+        level: уровень сжатия (по умолчанию — свой для каждого кодека).
+    """
+    def __init__(self, compression: str | None = None, level: int | None = None):
+        self._compression = compression
+        self._level = level
+
+    def dump(self, data: dict, path: str) -> None:
+        """Сохраняет данные в NDJSON-файл."""
+        logger.info("Экспорт данных в NDJSON")
+        encoder = _EnhancedJSONEncoder(ensure_ascii=False, separators=(",", ":"))
+        try:
+            total_records = 0
+            with metrics.timer("export_seconds", format="ndjson"), \
+                    open_output(path, self._compression, self._level) as f:
+                for section, rows in data.items():
+                    if not isinstance(rows, (list, Iterator)):
+                        rows = [rows]
+                    for row in rows:
+                        if hasattr(row, "_asdict"):
+                            row = row._asdict()  # namedtuple-строки
+                        f.write(encoder.encode({"section": section, "row": row}))
+                        f.write("\n")
+                        total_records += 1
+            if metrics.is_enabled():
+                metrics.inc("export_records_total", total_records, format="ndjson")
+                metrics.inc("export_bytes_total", output_size(path), format="ndjson")
+            logger.info("NDJSON экспорт завершён, записей: %s", total_records)
+        except Exception as e:
+            logger.error("Ошибка при экспорте NDJSON (%s): %s", path, e)
+            raise
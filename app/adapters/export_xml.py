@@ -6,17 +6,54 @@
 
 Возможности:
 - Поддержка вложенных структур и разделов метаданных.
+- Разделы могут быть итераторами строк (например, результат `db.iter_query`).
 - Преобразование специальных типов (дата, десятичное число, дельта времени) в строки.
 - Формирование форматированного (с отступом) XML-вывода с заголовком объявления.
+- Потоковое сжатие gzip/bz2/lzma по расширению файла или параметру.
+- Потоковый режим (по умолчанию): элементы `<query>`/`<row>` пишутся в
+  буферизованный файл по мере чтения строк, без построения дерева ElementTree,
+  поэтому память не зависит от размера разделов. Вывод побайтно совпадает
+  с режимом дерева (`streaming=False`).
 """
+from collections.abc import Iterator
 from datetime import date, datetime, timedelta
 from decimal import Decimal
 import logging
 import xml.etree.ElementTree as ET
+from app import metrics
+from app.adapters.compression import open_output, output_size
 from app.ports.exporter import Exporter
 
 logger = logging.getLogger(__name__)
 
+_INDENT = "  "
+
+
+def _escape_text(text: str) -> str:
+    """Экранирует текст элемента так же, как ElementTree."""
+    if "&" in text:
+        text = text.replace("&", "&amp;")
+    if "<" in text:
+        text = text.replace("<", "&lt;")
+    if ">" in text:
+        text = text.replace(">", "&gt;")
+    return text
+
+
+def _escape_attr(text: str) -> str:
+    """Экранирует значение атрибута так же, как ElementTree."""
+    text = _escape_text(text)
+    if "\"" in text:
+        text = text.replace("\"", "&quot;")
+    if "\r" in text:
+        text = text.replace("\r", "&#13;")
+    if "\n" in text:
+        text = text.replace("\n", "&#10;")
+    if "\t" in text:
+        text = text.replace("\t", "&#09;")
+    return text
+
+
 class XmlExporter(Exporter):
     """
     Реализация экспортера для сохранения данных в формате XML.
@@ -44,7 +81,20 @@ class XmlExporter(Exporter):
                 </row>
             </query>
         </result>
+
+    Параметры:
+        streaming: писать XML потоково (True) или через дерево ElementTree (False).
+        pretty: форматировать вывод отступами в два пробела (как `ET.indent`).
+        compression: кодек сжатия ("gzip", "bz2", "lzma", "none"); по умолчанию
+            определяется по расширению файла (.gz, .bz2, .xz) — см. `compression`.
+        level: уровень сжатия (по умолчанию — свой для каждого кодека).
     """
+    def __init__(self, streaming: bool = True, pretty: bool = True,
+                 compression: str | None = None, level: int | None = None):
+        self._streaming = streaming
+        self._pretty = pretty
+        self._compression = compression
+        self._level = level
 
     def _convert_value(self, value):
         """Преобразует сложные типы (date, Decimal, timedelta и т.д.) в строки."""
@@ -62,46 +112,128 @@ class XmlExporter(Exporter):
             return ", ".join(f"{k}={self._convert_value(v)}" for k, v in value.items())
         return str(value) if value is not None else ""
 
-    def dump(self, data: dict, path: str) -> None:
-        """Сохраняет данные в XML-файл."""
-        logger.info("Экспорт данных в XML")
-        try:
-            root = ET.Element("result")
+    def _element(self, tag: str, value) -> str:
+        """Элемент с текстом; пустой текст — короткая форма `<tag />`, как в ElementTree."""
+        text = self._convert_value(value)
+        if not text:
+            return f"<{tag} />"
+        return f"<{tag}>{_escape_text(text)}</{tag}>"
+
+    def _newline(self, level: int) -> str:
+        """Перевод строки с отступом уровня level (пусто без pretty)."""
+        return "\n" + _INDENT * level if self._pretty else ""
+
+    def _iter_rows(self, rows) -> Iterator:
+        """Строки раздела: dict — одна строка, список/итератор — по одной."""
+        if isinstance(rows, dict):
+            yield rows
+            return
+        for row in rows:
+            yield row._asdict() if hasattr(row, "_asdict") else row  # namedtuple-строки
 
-            # Каждый раздел (ключ в словаре) = отдельный <query name="...">
-            total_records = 0
+    def _write_row(self, write, row) -> None:
+        """Пишет один элемент <row> на уровне 2."""
+        if not isinstance(row, dict):
+            write(f"<row>{self._newline(3)}{self._element('value', row)}{self._newline(2)}</row>")
+            return
+        if not row:
+            write("<row />")
+            return
+        write("<row>")
+        for key, value in row.items():
+            write(self._newline(3))
+            write(self._element(key, value))
+        write(self._newline(2))
+        write("</row>")
+
+    def _write_section(self, write, section: str, rows) -> int:
+        """Пишет <query name="..."> на уровне 1; возвращает число записанных строк."""
+        head = f'<query name="{_escape_attr(str(section))}"'
+        if not isinstance(rows, (list, Iterator, dict)):
+            write(f"{head}>{self._newline(2)}{self._element('value', rows)}"
+                  f"{self._newline(1)}</query>")
+            return 1
+        count = 0
+        for row in self._iter_rows(rows):
+            if not count:
+                write(f"{head}>")
+            write(self._newline(2))
+            self._write_row(write, row)
+            count += 1
+        write(f"{self._newline(1)}</query>" if count else f"{head} />")
+        return count
+
+    def _dump_stream(self, data: dict, path: str) -> int:
+        """Потоковая запись: элементы уходят в буферизованный файл по мере готовности."""
+        total_records = 0
+        # как ElementTree.write: utf-8, недопустимые символы — ссылками на символы
+        with open_output(path, self._compression, self._level,
+                         errors="xmlcharrefreplace") as file:
+            write = file.write
+            write("<?xml version='1.0' encoding='utf-8'?>\n")
+            if not data:
+                write("<result />")
+                return 0
+            write("<result>")
             for section, rows in data.items():
-                query_elem = ET.SubElement(root, "query", name=section)
-
-                if isinstance(rows, list):
-                    for row in rows:
-                        row_elem = ET.SubElement(query_elem, "row")
-                        total_records += 1
-                        if isinstance(row, dict):
-                            for key, value in row.items():
-                                ET.SubElement(row_elem, key).text = self._convert_value(value)
-                        else:
-                            ET.SubElement(row_elem, "value").text = self._convert_value(row)
-
-                elif isinstance(rows, dict):
+                write(self._newline(1))
+                total_records += self._write_section(write, section, rows)
+            write(self._newline(0))
+            write("</result>")
+        return total_records
+
+    def _dump_tree(self, data: dict, path: str) -> int:
+        """Запись через дерево ElementTree (весь документ строится в памяти)."""
+        root = ET.Element("result")
+
+        # Каждый раздел (ключ в словаре) = отдельный <query name="...">
+        total_records = 0
+        for section, rows in data.items():
+            query_elem = ET.SubElement(root, "query", name=section)
+
+            if isinstance(rows, (list, Iterator)):
+                for row in rows:
                     row_elem = ET.SubElement(query_elem, "row")
                     total_records += 1
-                    for key, value in rows.items():
-                        ET.SubElement(row_elem, key).text = self._convert_value(value)
+                    if hasattr(row, "_asdict"):
+                        row = row._asdict()  # namedtuple-строки
+                    if isinstance(row, dict):
+                        for key, value in row.items():
+                            ET.SubElement(row_elem, key).text = self._convert_value(value)
+                    else:
+                        ET.SubElement(row_elem, "value").text = self._convert_value(row)
 
-                else:
-                    ET.SubElement(query_elem, "value").text = self._convert_value(rows)
-                    total_records += 1
+            elif isinstance(rows, dict):
+                row_elem = ET.SubElement(query_elem, "row")
+                total_records += 1
+                for key, value in rows.items():
+                    ET.SubElement(row_elem, key).text = self._convert_value(value)
+
+            else:
+                ET.SubElement(query_elem, "value").text = self._convert_value(rows)
+                total_records += 1
 
-            # Запись в файл
-            tree = ET.ElementTree(root)
-            try:
-                ET.indent(tree, space="  ", level=0)
-            except AttributeError:
-                pass  # Python < 3.9
-            tree.write(path, encoding="utf-8", xml_declaration=True)
+        # Запись в файл
+        tree = ET.ElementTree(root)
+        if self._pretty:
+            ET.indent(tree, space=_INDENT, level=0)
+        with open_output(path, self._compression, self._level, binary=True) as file:
+            tree.write(file, encoding="utf-8", xml_declaration=True)
+        return total_records
 
-            logger.info("XML экспорт завершён")
+    def dump(self, data: dict, path: str) -> None:
+        """Сохраняет данные в XML-файл."""
+        logger.info("Экспорт данных в XML (потоково: %s)", self._streaming)
+        try:
+            with metrics.timer("export_seconds", format="xml"):
+                if self._streaming:
+                    total_records = self._dump_stream(data, path)
+                else:
+                    total_records = self._dump_tree(data, path)
+            if metrics.is_enabled():
+                metrics.inc("export_records_total", total_records, format="xml")
+                metrics.inc("export_bytes_total", output_size(path), format="xml")
+            logger.info("XML экспорт завершён, записей: %s", total_records)
 
         except Exception as e:
             logger.error("При экспорте XML (%s): %s", path, e)
@@ -7,13 +7,101 @@
 Обязанности:
 - Управление жизненным циклом соединения (подключение, закрытие, контекст транзакции).
 - Выполнение команд SQL (execute, executemany, query).
+- Потоковая выборка через именованный серверный курсор (iter_query).
+- Потоковая массовая загрузка строк через `COPY ... FROM STDIN` (copy_rows).
 - Обработка логики фиксации/отката и журналирование операций с базой данных.
 """
+import io
+import uuid
 from contextlib import contextmanager
-from typing import Iterable, Mapping
+from datetime import date, datetime
+from typing import Iterable, Iterator, Mapping, Sequence
 import psycopg2
-from psycopg2.extras import RealDictCursor
-from app.ports.db import DB
+from psycopg2 import sql as pg_sql
+from psycopg2.extensions import cursor as TupleCursor
+from psycopg2.extras import NamedTupleCursor, RealDictCursor
+from app import metrics
+from app.ports.db import DB, ROW_TYPES
+
+# Экранирование спецсимволов текстового формата COPY
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def _copy_value(value) -> str:
+    """Преобразует значение в поле текстового формата COPY (None -> \\N)."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value).translate(_COPY_ESCAPES)
+
+
+def _copy_statement(table: str, columns: Sequence[str]) -> pg_sql.Composed:
+    """Собирает `COPY table (columns) FROM STDIN` с экранированием идентификаторов."""
+    return pg_sql.SQL("COPY {} ({}) FROM STDIN").format(
+        pg_sql.Identifier(table),
+        pg_sql.SQL(", ").join(pg_sql.Identifier(c) for c in columns),
+    )
+
+
+def _row_cursor_factory(row_type: str):
+    """Класс курсора psycopg2 для заданного вида строк iter_query."""
+    if row_type not in ROW_TYPES:
+        raise ValueError(f"Неизвестный вид строк '{row_type}', ожидался один из {ROW_TYPES}")
+    return {"dict": RealDictCursor, "tuple": TupleCursor,
+            "namedtuple": NamedTupleCursor}[row_type]
+
+
+def _iter_named_cursor(conn, sql: str, params, chunk_size: int, row_type: str,
+                       withhold: bool) -> Iterator:
+    """
+    Читает результат именованным (серверным) курсором порциями по chunk_size,
+    так что в памяти клиента одновременно не больше одной порции.
+    """
+    name = f"iter_{uuid.uuid4().hex}"
+    with conn.cursor(name=name, cursor_factory=_row_cursor_factory(row_type),
+                     withhold=withhold) as cursor:
+        cursor.itersize = chunk_size
+        cursor.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                return
+            yield from rows
+
+
+class _CopyReader(io.TextIOBase):
+    """
+    Файлоподобный объект для `copy_expert`: лениво превращает кортежи
+    в строки формата COPY, не собирая весь поток в памяти.
+    """
+    def __init__(self, rows: Iterable[tuple]):
+        super().__init__()
+        self._rows: Iterator[tuple] = iter(rows)
+        self._buf = ""
+        self.count = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int | None = -1) -> str:
+        size = -1 if size is None else size
+        parts = [self._buf]
+        length = len(self._buf)
+        while size < 0 or length < size:
+            row = next(self._rows, None)
+            if row is None:
+                break
+            line = "\t".join(_copy_value(v) for v in row) + "\n"
+            parts.append(line)
+            length += len(line)
+            self.count += 1
+        data = "".join(parts)
+        if size < 0 or len(data) <= size:
+            self._buf = ""
+            return data
+        self._buf = data[size:]
+        return data[:size]
 
 
 class PostgresDB(DB):
@@ -23,7 +111,11 @@ class PostgresDB(DB):
       - контекстный менеджер для подключения (with PostgresDB(...))
       - явные транзакции (with db.transaction())
       - execute / executemany / query
+      - iter_query (серверный курсор, строки порциями)
+      - copy_rows (COPY ... FROM STDIN)
     """
+    dialect = "postgresql"
+
     def __init__(self, dsn: str, autocommit : bool = False):
         """
         dsn-пример:
@@ -33,6 +125,7 @@ class PostgresDB(DB):
         self._dsn = dsn
         self._conn = None
         self._autocommit = autocommit
+        self._depth = 0  # вложенность transaction()
     # ---- lifecycle ----
     def connect(self) -> None:
         if self._conn is None:
@@ -63,29 +156,48 @@ class PostgresDB(DB):
             with db.transaction():
                 db.execute(...)
                 db.executemany(...)
+
+        Вложенный вызов присоединяется к внешней транзакции: фиксирует
+        или откатывает только самый внешний блок.
         """
         if self._conn is None:
             self.connect()
+        if self._depth:
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+            return
         # Начало «явной» транзакции для блока
+        self._depth = 1
         try:
             yield
         except Exception:  # pylint: disable=broad-exception-caught
             if self._conn and not self._autocommit:
                 self._conn.rollback()
             raise
+        finally:
+            self._depth = 0
         if self._conn and not self._autocommit:
             self._conn.commit()
     # ---- low-level ops ----
-    def execute(self, sql: str, params: tuple | Mapping | None = None) -> None:
+    @metrics.timed("db_operation_seconds", db="postgresql", op="execute")
+    def execute(self, sql: str, params: tuple | Mapping | None = None) -> int:
         if self._conn is None:
             self.connect()
         with self._conn.cursor() as cursor:
             cursor.execute(sql, params)
-    def executemany(self, sql: str, params_seq : Iterable[tuple]) -> None:
+            return cursor.rowcount
+    @metrics.timed("db_operation_seconds", db="postgresql", op="executemany")
+    def executemany(self, sql: str, params_seq : Iterable[tuple]) -> int:
         if self._conn is None:
             self.connect()
         with self._conn.cursor() as cursor:
             cursor.executemany(sql, params_seq)
+            # psycopg2 суммирует rowcount по всем наборам параметров
+            return cursor.rowcount
+    @metrics.timed("db_operation_seconds", db="postgresql", op="query")
     def query(self, sql: str, params: tuple | Mapping | None = None) -> list[dict]:
         if self._conn is None:
             self.connect()
@@ -94,3 +206,29 @@ class PostgresDB(DB):
             rows = cur.fetchall()
             # RealDictCursor уже даёт dict-подобные объекты
             return [dict(r) for r in rows]
+    def iter_query(self, sql: str, params: tuple | Mapping | None = None,
+                   chunk_size: int = 1000, row_type: str = "dict") -> Iterator:
+        """
+        Потоковая выборка через именованный серверный курсор.
+        Строки приходят порциями по chunk_size и не копируются повторно:
+        row_type="dict" отдаёт RealDictRow (подкласс dict), "tuple" — кортежи,
+        "namedtuple" — именованные кортежи.
+        """
+        if self._conn is None:
+            self.connect()
+        # в autocommit серверный курсор должен пережить неявный commit
+        yield from _iter_named_cursor(self._conn, sql, params, chunk_size, row_type,
+                                      withhold=self._autocommit)
+    @metrics.timed("db_operation_seconds", db="postgresql", op="copy_rows")
+    def copy_rows(self, table: str, columns: Sequence[str], rows: Iterable[tuple]) -> int:
+        """
+        Потоково загружает строки в таблицу через COPY ... FROM STDIN.
+        Возвращает количество переданных строк.
+        """
+        if self._conn is None:
+            self.connect()
+        reader = _CopyReader(rows)
+        with self._conn.cursor() as cursor:
+            cursor.copy_expert(_copy_statement(table, columns), reader)
+        metrics.inc("db_rows_total", reader.count, op="copy_rows")
+        return reader.count
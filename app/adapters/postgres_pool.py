@@ -0,0 +1,244 @@
+"""
+Адаптер PostgreSQL с пулом соединений.
+
+Реализует протокол `DB` поверх потокобезопасного пула psycopg2
+(`ThreadedConnectionPool`), чтобы аналитические запросы и параллельные
+загрузчики могли работать каждый на своём соединении без повторной
+установки подключения.
+
+Обязанности:
+- Выдача соединений из пула с проверкой работоспособности (health check).
+- Повторная попытка на новом соединении, если старое оборвалось (reconnect).
+- Привязка `transaction()` к выданному соединению в пределах текущего потока.
+"""
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterable, Iterator, Mapping, Sequence, TypeVar
+import psycopg2
+from psycopg2.extras import RealDictCursor
+from psycopg2.pool import ThreadedConnectionPool
+from app.adapters.postgres_db import _CopyReader, _copy_statement, _iter_named_cursor
+from app import metrics
+from app.ports.db import DB
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# ошибки, после которых соединение считается оборванным
+_CONNECTION_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError)
+
+
+class PooledPostgresDB(DB):
+    """
+    Реализация порта DB на пуле соединений psycopg2.
+
+    Каждая операция вне транзакции берёт соединение из пула, выполняется
+    и сразу возвращает его (с commit, если не autocommit). Внутри
+    `with db.transaction():` все операции текущего потока идут через одно
+    выданное соединение, которое фиксируется или откатывается целиком.
+
+    Пример:
+        >>> with PooledPostgresDB(dsn, minconn=1, maxconn=8) as db:
+        ...     with db.transaction():
+        ...         db.executemany(sql, rows)
+        ...     rows = db.query("SELECT 1 AS x")
+    """
+    dialect = "postgresql"
+
+    def __init__(self, dsn: str, minconn: int = 1, maxconn: int = 10,
+                 autocommit: bool = False, health_check: bool = True, retries: int = 1):
+        if minconn < 0 or maxconn < 1 or minconn > maxconn:
+            raise ValueError(f"Некорректные размеры пула: min={minconn}, max={maxconn}")
+        self._dsn = dsn
+        self._minconn = minconn
+        self._maxconn = maxconn
+        self._autocommit = autocommit
+        self._health_check = health_check
+        self._retries = retries
+        self._pool: ThreadedConnectionPool | None = None
+        self._pool_lock = threading.Lock()
+        self._local = threading.local()
+
+    # ---- lifecycle ----
+    def connect(self) -> None:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadedConnectionPool(
+                    self._minconn, self._maxconn, self._dsn, cursor_factory=RealDictCursor)
+                logger.info("Создан пул соединений PostgreSQL (%s..%s)",
+                            self._minconn, self._maxconn)
+
+    def close(self) -> None:
+        with self._pool_lock:
+            if self._pool is not None:
+                try:
+                    self._pool.closeall()
+                finally:
+                    self._pool = None
+
+    def __enter__(self) -> "PooledPostgresDB":
+        self.connect()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    # ---- checkout ----
+    def _healthy(self, conn) -> bool:
+        """Проверяет соединение перед выдачей: не закрыто и отвечает на SELECT 1."""
+        if conn.closed:
+            return False
+        if not self._health_check:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            if not conn.autocommit:
+                conn.rollback()
+            return True
+        except _CONNECTION_ERRORS as e:
+            logger.warning("Соединение из пула не прошло проверку: %s", e)
+            return False
+
+    def _checkout(self):
+        """Берёт из пула рабочее соединение, отбрасывая неисправные."""
+        if self._pool is None:
+            self.connect()
+        for _ in range(self._retries + 1):
+            conn = self._pool.getconn()
+            if self._healthy(conn):
+                conn.autocommit = self._autocommit
+                return conn
+            self._pool.putconn(conn, close=True)
+        raise psycopg2.OperationalError("Нет рабочего соединения в пуле")
+
+    def _release(self, conn) -> None:
+        """Возвращает соединение в пул (оборванное — закрывается)."""
+        if self._pool is not None:
+            self._pool.putconn(conn, close=bool(conn.closed))
+
+    def _run(self, work: Callable[..., T]) -> T:
+        """
+        Выполняет work(conn) на соединении транзакции текущего потока или на
+        отдельно выданном соединении с commit/rollback и одной повторной
+        попыткой, если соединение оборвалось.
+        """
+        bound = getattr(self._local, "conn", None)
+        if bound is not None:
+            return work(bound)
+        attempt = 0
+        while True:
+            conn = self._checkout()
+            try:
+                result = work(conn)
+                if not self._autocommit:
+                    conn.commit()
+                return result
+            except _CONNECTION_ERRORS as e:
+                if not conn.closed or attempt >= self._retries:
+                    if not conn.closed:
+                        conn.rollback()
+                    raise
+                attempt += 1
+                logger.warning("Соединение оборвалось (%s), повтор на новом соединении", e)
+            except Exception:
+                if not conn.closed:
+                    conn.rollback()
+                raise
+            finally:
+                self._release(conn)
+
+    # ---- transaction ----
+    @contextmanager
+    def transaction(self):
+        """
+        Транзакция на одном соединении из пула, привязанном к текущему потоку.
+        Вложенный вызов в том же потоке присоединяется к внешней транзакции.
+        """
+        if getattr(self._local, "conn", None) is not None:
+            yield
+            return
+        conn = self._checkout()
+        self._local.conn = conn
+        try:
+            yield
+            if not self._autocommit:
+                conn.commit()
+        except Exception:  # pylint: disable=broad-exception-caught
+            if not self._autocommit and not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            self._local.conn = None
+            self._release(conn)
+
+    # ---- low-level ops ----
+    @metrics.timed("db_operation_seconds", db="postgresql_pool", op="execute")
+    def execute(self, sql: str, params: tuple | Mapping | None = None) -> int:
+        def work(conn) -> int:
+            with conn.cursor() as cursor:
+                cursor.execute(sql, params)
+                return cursor.rowcount
+        return self._run(work)
+
+    @metrics.timed("db_operation_seconds", db="postgresql_pool", op="executemany")
+    def executemany(self, sql: str, params_seq: Iterable[tuple]) -> int:
+        # материализуем, чтобы повторная попытка получила те же строки
+        params = list(params_seq)
+        def work(conn) -> int:
+            with conn.cursor() as cursor:
+                cursor.executemany(sql, params)
+                return cursor.rowcount
+        return self._run(work)
+
+    @metrics.timed("db_operation_seconds", db="postgresql_pool", op="query")
+    def query(self, sql: str, params: tuple | Mapping | None = None) -> list[dict]:
+        def work(conn) -> list[dict]:
+            with conn.cursor() as cursor:
+                cursor.execute(sql, params)
+                return [dict(r) for r in cursor.fetchall()]
+        return self._run(work)
+
+    def iter_query(self, sql: str, params: tuple | Mapping | None = None,
+                   chunk_size: int = 1000, row_type: str = "dict") -> Iterator:
+        """
+        Потоковая выборка серверным курсором. Вне транзакции соединение
+        удерживается, пока итерация не закончится (или генератор не закроют).
+        """
+        bound = getattr(self._local, "conn", None)
+        if bound is not None:
+            yield from _iter_named_cursor(bound, sql, params, chunk_size, row_type,
+                                          withhold=self._autocommit)
+            return
+        # отдельное соединение, не привязанное к потоку: генератор могут
+        # дочитывать вперемешку с другими операциями
+        conn = self._checkout()
+        try:
+            yield from _iter_named_cursor(conn, sql, params, chunk_size, row_type,
+                                          withhold=self._autocommit)
+            if not self._autocommit:
+                conn.commit()
+        except BaseException:
+            if not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            self._release(conn)
+
+    @metrics.timed("db_operation_seconds", db="postgresql_pool", op="copy_rows")
+    def copy_rows(self, table: str, columns: Sequence[str], rows: Iterable[tuple]) -> int:
+        # поток строк нельзя прочитать повторно, поэтому COPY не повторяется при обрыве
+        if getattr(self._local, "conn", None) is None:
+            with self.transaction():
+                return self._copy(self._local.conn, table, columns, rows)
+        return self._copy(self._local.conn, table, columns, rows)
+
+    @staticmethod
+    def _copy(conn, table: str, columns: Sequence[str], rows: Iterable[tuple]) -> int:
+        reader = _CopyReader(rows)
+        with conn.cursor() as cursor:
+            cursor.copy_expert(_copy_statement(table, columns), reader)
+        metrics.inc("db_rows_total", reader.count, op="copy_rows")
+        return reader.count
@@ -0,0 +1,137 @@
+"""
+Адаптеры кэша результатов отчётов (порт ReportCache).
+
+- `MemoryReportCache` – LRU в памяти: не больше `max_entries` записей,
+  при `ttl` (секунды) запись считается промахом по истечении срока.
+- `DiskReportCache` – по файлу на ключ в каталоге `directory` (имя — SHA-256
+  ключа). Строки сохраняются pickle, поэтому Decimal и date из PostgreSQL
+  возвращаются теми же типами; каталог кэша должен быть доверенным.
+  Запись атомарна (временный файл + os.replace), чтение обновляет mtime —
+  при превышении `max_entries` удаляются давно не читанные файлы.
+
+Ключ уже содержит версию данных, поэтому устаревшие записи просто перестают
+запрашиваться и со временем вытесняются.
+"""
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+from time import monotonic, time
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryReportCache:
+    """LRU-кэш отчётов в памяти процесса."""
+
+    def __init__(self, max_entries: int = 128, ttl: float | None = None):
+        if max_entries < 1:
+            raise ValueError(f"Размер кэша должен быть положительным, получено: {max_entries}")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float | None, list[dict]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> list[dict] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, rows = entry
+            if expires is not None and monotonic() >= expires:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return rows
+
+    def set(self, key: str, rows: list[dict]) -> None:
+        expires = monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (expires, rows)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DiskReportCache:
+    """Кэш отчётов в каталоге: по pickle-файлу на ключ."""
+    suffix = ".pickle"
+
+    def __init__(self, directory: str, max_entries: int = 256, ttl: float | None = None):
+        if max_entries < 1:
+            raise ValueError(f"Размер кэша должен быть положительным, получено: {max_entries}")
+        self.directory = directory
+        self.max_entries = max_entries
+        self.ttl = ttl
+
+    def _path(self, key: str) -> str:
+        name = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, name + self.suffix)
+
+    def get(self, key: str) -> list[dict] | None:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                stored_key, created, rows = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logger.warning("Повреждённая запись кэша %s удалена: %s", path, e)
+            self._remove(path)
+            return None
+        if stored_key != key:  # коллизия имени файла
+            return None
+        if self.ttl is not None and time() - created >= self.ttl:
+            self._remove(path)
+            return None
+        try:
+            os.utime(path)  # отметка последнего чтения для вытеснения
+        except OSError:
+            pass
+        return rows
+
+    def set(self, key: str, rows: list[dict]) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump((key, time(), rows), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            self._remove(tmp)
+            raise
+        self._evict()
+
+    def _entries(self) -> list[os.DirEntry]:
+        with os.scandir(self.directory) as entries:
+            return [entry for entry in entries if entry.name.endswith(self.suffix)]
+
+    def _evict(self) -> None:
+        entries = self._entries()
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime_ns)
+        for entry in entries[:len(entries) - self.max_entries]:
+            self._remove(entry.path)
+
+    def clear(self) -> None:
+        if os.path.isdir(self.directory):
+            for entry in self._entries():
+                self._remove(entry.path)
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,244 @@
+"""
+Адаптер базы данных SQLite.
+
+Реализует протокол `DB` на стандартном модуле sqlite3 — для небольших
+пакетных задач и CI без сервера PostgreSQL. Путь ":memory:" (по умолчанию)
+создаёт базу в памяти процесса.
+
+SQL сервисов написан в стиле psycopg2, поэтому адаптер переводит его:
+- плейсхолдеры `%s` -> `?`, `%(name)s` -> `:name`, `%%` -> `%`;
+- `= ANY(%s)` со списком -> `IN (SELECT value FROM json_each(?))`;
+- несколько операторов в одной строке без параметров выполняются по очереди.
+
+Схема, индексы и отчёты берут SQLite-версии запросов по атрибуту `dialect`
+(см. `schema_service`, `query_service`). Staging-загрузка через COPY
+и сводная таблица room_stats доступны только в PostgreSQL.
+"""
+import json
+import re
+import sqlite3
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Iterable, Iterator, Mapping, Sequence
+from app import metrics
+from app.ports.db import DB, ROW_TYPES
+
+# даты хранятся в ISO-формате (адаптеры по умолчанию устарели в Python 3.12)
+sqlite3.register_adapter(date, date.isoformat)
+sqlite3.register_adapter(datetime, datetime.isoformat)
+
+_PLACEHOLDER = re.compile(r"=\s*ANY\(%s\)|%\((\w+)\)s|%s|%%")
+
+
+def _translate(sql: str, params: tuple | Mapping | None) -> tuple[str, tuple | Mapping]:
+    """Переводит запрос и параметры из стиля psycopg2 в стиль sqlite3."""
+    if params is None:
+        return sql, ()
+    if isinstance(params, Mapping):
+        return _PLACEHOLDER.sub(
+            lambda m: "%" if m.group(0) == "%%" else f":{m.group(1)}", sql), params
+    values = iter(params)
+    converted = []
+
+    def replace(match: re.Match) -> str:
+        token = match.group(0)
+        if token == "%%":
+            return "%"
+        value = next(values)
+        if token == "%s":
+            converted.append(value)
+            return "?"
+        # массив PostgreSQL -> JSON-массив, разворачиваемый json_each
+        converted.append(json.dumps(list(value), default=str))
+        return "IN (SELECT value FROM json_each(?))"
+    return _PLACEHOLDER.sub(replace, sql), tuple(converted)
+
+
+@lru_cache(maxsize=128)
+def _translate_many(sql: str) -> str:
+    """Перевод плейсхолдеров для executemany (без разворачивания ANY)."""
+    return sql.replace("%s", "?").replace("%%", "%")
+
+
+def _split_script(sql: str) -> list[str]:
+    """Делит текст на отдельные операторы (';' внутри строк и комментариев не режет)."""
+    statements, current = [], ""
+    for part in sql.split(";"):
+        current += part + ";"
+        if sqlite3.complete_statement(current):
+            if current.strip(" \t\n\r;"):
+                statements.append(current)
+            current = ""
+    return statements
+
+
+def _make_row(row_type: str, cursor: sqlite3.Cursor):
+    """Функция преобразования sqlite3.Row в строку заданного вида."""
+    if row_type not in ROW_TYPES:
+        raise ValueError(f"Неизвестный вид строк '{row_type}', ожидался один из {ROW_TYPES}")
+    if row_type == "dict":
+        return dict
+    if row_type == "tuple":
+        return tuple
+    names = [column[0] for column in cursor.description or ()]
+    row_class = namedtuple("Row", names, rename=True)
+    return lambda row: row_class(*row)
+
+
+class SQLiteDB(DB):
+    """
+    Реализация порта DB для SQLite.
+    Возвращает строки как dict, поддерживает:
+      - контекстный менеджер для подключения (with SQLiteDB(...))
+      - явные транзакции (with db.transaction())
+      - execute / executemany / query
+      - iter_query (fetchmany порциями)
+      - copy_rows (executemany INSERT — в SQLite нет COPY)
+
+    Соединение можно использовать из нескольких потоков (run_reports,
+    конвейерная загрузка): операции сериализуются блокировкой.
+
+    Пример:
+        >>> with SQLiteDB(":memory:") as db:
+        ...     schema_service.ensure_schema(db)   # sql/schema_sqlite.sql
+    """
+    dialect = "sqlite"
+
+    def __init__(self, path: str = ":memory:", autocommit: bool = False):
+        self._path = path
+        self._conn: sqlite3.Connection | None = None
+        self._autocommit = autocommit
+        self._lock = threading.RLock()
+        self._depth = 0  # вложенность transaction() (под блокировкой)
+
+    # ---- lifecycle ----
+    def connect(self) -> None:
+        if self._conn is None:
+            self._conn = sqlite3.connect(
+                self._path, check_same_thread=False,
+                isolation_level=None if self._autocommit else "")
+            self._conn.row_factory = sqlite3.Row
+            # как в PostgreSQL: students.room_id обязан ссылаться на комнату
+            self._conn.execute("PRAGMA foreign_keys = ON")
+
+    def close(self) -> None:
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            finally:
+                self._conn = None
+
+    def __enter__(self) -> "SQLiteDB":
+        self.connect()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self._conn and not self._autocommit:
+            if exc_type is None:
+                self._conn.commit()
+            else:
+                self._conn.rollback()
+        self.close()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.connect()
+        return self._conn
+
+    # ---- transaction ----
+    @contextmanager
+    def transaction(self):
+        """
+        Использование:
+            with db.transaction():
+                db.execute(...)
+                db.executemany(...)
+
+        Вложенный вызов присоединяется к внешней транзакции: фиксирует
+        или откатывает только самый внешний блок.
+        """
+        conn = self._connection()
+        with self._lock:
+            self._depth += 1
+            try:
+                yield
+            except Exception:  # pylint: disable=broad-exception-caught
+                if self._depth == 1 and not self._autocommit:
+                    conn.rollback()
+                raise
+            finally:
+                self._depth -= 1
+            if not self._depth and not self._autocommit:
+                conn.commit()
+
+    # ---- low-level ops ----
+    @metrics.timed("db_operation_seconds", db="sqlite", op="execute")
+    def execute(self, sql: str, params: tuple | Mapping | None = None) -> int:
+        conn = self._connection()
+        with self._lock:
+            if params is None:
+                statements = _split_script(sql)
+                rowcount = -1
+                for statement in statements:
+                    rowcount = conn.execute(statement).rowcount
+                # число строк известно только для одиночного оператора
+                return rowcount if len(statements) == 1 else -1
+            return conn.execute(*_translate(sql, params)).rowcount
+
+    @metrics.timed("db_operation_seconds", db="sqlite", op="executemany")
+    def executemany(self, sql: str, params_seq: Iterable[tuple]) -> int:
+        conn = self._connection()
+        with self._lock:
+            return conn.executemany(_translate_many(sql), params_seq).rowcount
+
+    @metrics.timed("db_operation_seconds", db="sqlite", op="query")
+    def query(self, sql: str, params: tuple | Mapping | None = None) -> list[dict]:
+        conn = self._connection()
+        with self._lock:
+            return [dict(r) for r in conn.execute(*_translate(sql, params)).fetchall()]
+
+    def iter_query(self, sql: str, params: tuple | Mapping | None = None,
+                   chunk_size: int = 1000, row_type: str = "dict") -> Iterator:
+        """
+        Потоковая выборка: строки читаются из курсора порциями по chunk_size.
+        row_type: "dict", "tuple" или "namedtuple".
+        """
+        conn = self._connection()
+        with self._lock:
+            cursor = conn.execute(*_translate(sql, params))
+        try:
+            make_row = _make_row(row_type, cursor)
+            while True:
+                with self._lock:
+                    rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    return
+                for row in rows:
+                    yield make_row(row)
+        finally:
+            cursor.close()
+
+    @metrics.timed("db_operation_seconds", db="sqlite", op="copy_rows")
+    def copy_rows(self, table: str, columns: Sequence[str], rows: Iterable[tuple]) -> int:
+        """
+        Массовая вставка строк в таблицу (аналог COPY): один executemany
+        по потоку строк. Возвращает количество переданных строк.
+        """
+        count = 0
+
+        def counted() -> Iterator[tuple]:
+            nonlocal count
+            for row in rows:
+                count += 1
+                yield row
+        quoted = ", ".join(f'"{c}"' for c in columns)
+        marks = ", ".join("?" for _ in columns)
+        sql = f'INSERT INTO "{table}" ({quoted}) VALUES ({marks})'
+        conn = self._connection()
+        with self._lock:
+            conn.executemany(sql, counted())
+        metrics.inc("db_rows_total", count, op="copy_rows")
+        return count
@@ -0,0 +1,190 @@
+"""
+Векторный движок отчётов на NumPy.
+
+Реализует порт `ReportSource`: загружает комнаты и студентов из JSON прямо
+в колоночные массивы и считает четыре отчёта `query_service` без PostgreSQL.
+
+Колонки студентов:
+- `ids`, `room_ids` – int32;
+- `sex` – 1 байт (0 = 'M', 1 = 'F');
+- `birthdays` – datetime64[D].
+
+Возрасты считаются так же, как `AGE(birthday)` в PostgreSQL относительно
+`today`: полные месяцы (с учётом дня месяца), средний возраст — как
+`EXTRACT(YEAR FROM AVG(AGE(...)))` (усечение суммы месяцев на число студентов).
+Дубликаты id (как и `ON CONFLICT DO NOTHING`) — побеждает первая запись;
+студенты несуществующих комнат в отчёты не попадают.
+"""
+import itertools
+import logging
+from datetime import date
+from typing import Iterator
+import numpy as np
+from app.domain.entities import decode_rooms, decode_students
+from app.ports.reports import ReportSource
+from app.services.json_stream import iter_json_items
+
+logger = logging.getLogger(__name__)
+
+SEX_CODES = {"M": 0, "F": 1}
+
+# элементов JSON в одном пакете декодера
+_DECODE_BATCH = 10000
+
+
+def _chunks(items) -> Iterator[list]:
+    """Пакеты по _DECODE_BATCH элементов из потока."""
+    iterator = iter(items)
+    while batch := list(itertools.islice(iterator, _DECODE_BATCH)):
+        yield batch
+
+
+def _first_unique(ids: np.ndarray) -> np.ndarray:
+    """Индексы первых вхождений каждого id в исходном порядке."""
+    _, first = np.unique(ids, return_index=True)
+    return np.sort(first)
+
+
+class VectorReportEngine(ReportSource):
+    """
+    Движок отчётов по колоночным массивам.
+
+    Пример:
+        >>> engine = VectorReportEngine.from_json("data/JSON/rooms.json",
+        ...                                       "data/JSON/students.json")
+        >>> query_service.run_reports(engine)   # та же форма, что и из БД
+    """
+    def __init__(self, room_ids: np.ndarray, room_names: list[str],
+                 student_ids: np.ndarray, student_rooms: np.ndarray,
+                 sex: np.ndarray, birthdays: np.ndarray, today: date | None = None):
+        keep_rooms = _first_unique(room_ids)
+        order = keep_rooms[np.argsort(room_ids[keep_rooms], kind="stable")]
+        self.room_ids = room_ids[order].astype(np.int32)
+        self.room_names = [room_names[i] for i in order]
+
+        keep = _first_unique(student_ids)
+        self.ids = student_ids[keep].astype(np.int32)
+        self.room_of = student_rooms[keep].astype(np.int32)
+        self.sex = sex[keep].astype(np.uint8)
+        self.birthdays = birthdays[keep].astype("datetime64[D]")
+        self.today = today or date.today()
+        self._aggregate: list[dict] | None = None
+
+    @classmethod
+    def from_json(cls, rooms_path: str, students_path: str,
+                  today: date | None = None) -> "VectorReportEngine":
+        """Читает и валидирует JSON-файлы (те же правила, что при загрузке в БД)."""
+        room_ids, room_names = [], []
+        for batch in _chunks(iter_json_items(rooms_path, "rooms")):
+            (batch_ids, batch_names), _ = decode_rooms(batch, columnar=True)
+            room_ids += batch_ids
+            room_names += batch_names
+        ids, rooms, sexes, birthdays = [], [], [], []
+        for batch in _chunks(iter_json_items(students_path, "students")):
+            (batch_ids, _, batch_sexes, batch_birthdays, batch_rooms), _ = decode_students(
+                batch, columnar=True)
+            ids += batch_ids
+            rooms += batch_rooms
+            sexes += [SEX_CODES[sex] for sex in batch_sexes]
+            birthdays += batch_birthdays
+        logger.info("Векторный движок: комнат %s, студентов %s", len(room_ids), len(ids))
+        return cls(np.array(room_ids, dtype=np.int64), room_names,
+                   np.array(ids, dtype=np.int64), np.array(rooms, dtype=np.int64),
+                   np.array(sexes, dtype=np.uint8),
+                   np.array(birthdays, dtype="datetime64[D]"), today)
+
+    # ---- вычисления ----
+    def _age_months(self, birthdays: np.ndarray) -> np.ndarray:
+        """Полные месяцы возраста на today — как months-часть AGE() в PostgreSQL."""
+        years = birthdays.astype("datetime64[Y]").astype(np.int64) + 1970
+        month_start = birthdays.astype("datetime64[M]")
+        months = month_start.astype(np.int64) % 12 + 1
+        days = (birthdays - month_start).astype(np.int64) + 1
+        today = self.today
+        return ((today.year - years) * 12 + (today.month - months)
+                - (today.day < days).astype(np.int64))
+
+    def _room_aggregate(self) -> list[dict]:
+        """Построчные агрегаты комнат в форме SQL_ROOM_AGGREGATE (кэшируются)."""
+        if self._aggregate is not None:
+            return self._aggregate
+        n_rooms = len(self.room_ids)
+        # индексы комнат студентов; студенты без комнаты отбрасываются (как при JOIN)
+        if n_rooms:
+            pos = np.minimum(np.searchsorted(self.room_ids, self.room_of), n_rooms - 1)
+            valid = self.room_ids[pos] == self.room_of
+        else:
+            pos = np.zeros(len(self.room_of), dtype=np.int64)
+            valid = np.zeros(len(self.room_of), dtype=bool)
+        room_idx = pos[valid]
+        months = self._age_months(self.birthdays[valid])
+        birthdays = self.birthdays[valid].astype(np.int64)
+
+        counts = np.bincount(room_idx, minlength=n_rooms)
+        month_sums = np.bincount(room_idx, weights=months, minlength=n_rooms)
+        by_sex = np.bincount(room_idx * 2 + self.sex[valid], minlength=n_rooms * 2)
+        sex_count = (by_sex.reshape(n_rooms, 2) > 0).sum(axis=1)
+
+        # группировка сортировкой: внутри комнаты по возрасту (месяцам)
+        order = np.lexsort((months, room_idx))
+        sorted_rooms = room_idx[order]
+        starts = np.searchsorted(sorted_rooms, np.arange(n_rooms), side="left")
+        ends = np.searchsorted(sorted_rooms, np.arange(n_rooms), side="right")
+        occupied = counts > 0
+        min_months = np.zeros(n_rooms, dtype=np.int64)
+        max_months = np.zeros(n_rooms, dtype=np.int64)
+        min_months[occupied] = months[order][starts[occupied]]
+        max_months[occupied] = months[order][ends[occupied] - 1]
+        min_bday = np.full(n_rooms, np.iinfo(np.int64).max)
+        max_bday = np.full(n_rooms, np.iinfo(np.int64).min)
+        np.minimum.at(min_bday, room_idx, birthdays)
+        np.maximum.at(max_bday, room_idx, birthdays)
+
+        safe_counts = np.maximum(counts, 1)
+        # AVG(interval): месяцы усекаются при делении, EXTRACT(YEAR) — целые годы
+        avg_years = np.trunc(np.trunc(month_sums / safe_counts) / 12).astype(np.int64)
+        spread = (np.trunc(max_months / 12) - np.trunc(min_months / 12)).astype(np.int64)
+
+        self._aggregate = [
+            {
+                "id": room_id,
+                "name": name,
+                "count": count,
+                "min_birthday": np.datetime64(lo, "D").item() if count else None,
+                "max_birthday": np.datetime64(hi, "D").item() if count else None,
+                "avg_age_years": avg if count else None,
+                "diff_age_years": diff if count else None,
+                "sex_count": sexes,
+            }
+            for room_id, name, count, lo, hi, avg, diff, sexes in zip(
+                self.room_ids.tolist(), self.room_names, counts.tolist(),
+                min_bday.tolist(), max_bday.tolist(), avg_years.tolist(),
+                spread.tolist(), sex_count.tolist())
+        ]
+        return self._aggregate
+
+    def _top5(self, key: str, descending: bool) -> list[dict]:
+        """Топ-5 занятых комнат по key (при равенстве — по id), как ORDER BY ... LIMIT 5."""
+        rows = [row for row in self._room_aggregate() if row["count"]]
+        if not rows:
+            return []
+        values = np.array([row[key] for row in rows], dtype=np.int64)
+        ids = np.array([row["id"] for row in rows], dtype=np.int64)
+        order = np.lexsort((ids, -values if descending else values))[:5]
+        return [{"id": rows[i]["id"], "name": rows[i]["name"], key: rows[i][key]}
+                for i in order.tolist()]
+
+    def report(self, name: str) -> list[dict]:
+        """Возвращает отчёт `name` в форме соответствующего SQL-запроса."""
+        aggregate = self._room_aggregate()
+        if name == "rooms_counts":
+            return [{"id": r["id"], "name": r["name"], "count": r["count"]} for r in aggregate]
+        if name == "top5_young_avg":
+            return self._top5("avg_age_years", descending=False)
+        if name == "top5_age_spread":
+            return self._top5("diff_age_years", descending=True)
+        if name == "mixed_gender_rooms":
+            return [{"id": r["id"], "name": r["name"]} for r in aggregate if r["sex_count"] >= 2]
+        if name == "combined_reports":
+            return list(aggregate)
+        raise ValueError(f"Неизвестный отчёт: {name}")
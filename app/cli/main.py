@@ -2,26 +2,385 @@
 Основная точка входа в приложение.
 
 Этот скрипт организует весь рабочий процесс проекта:
-1. Считывает пользовательские данные (пути, формат экспорта, настройки БД).
+1. Считывает параметры (аргументы командной строки или ввод пользователя).
 2. Инициализирует подключение к базе данных и схему.
-3. Загружает данные из JSON-файлов в PostgreSQL.
+3. Загружает данные из JSON-файлов в БД.
 4. Выполняет аналитические запросы.
-5. Экспортирует результаты в JSON- или XML-файл.
+5. Экспортирует результаты в JSON-, NDJSON-, XML-файлы и/или каталог Arrow IPC.
+
+Подкоманды (без аргументов запускается прежний интерактивный режим):
+- `load` – только загрузка JSON в БД;
+- `report` – только отчёты по уже загруженным данным и экспорт;
+- `run` – загрузка и отчёты за один запуск;
+- `watch` – наблюдение за каталогом: инкрементальная загрузка новых файлов
+  и повторная выгрузка отчётов, только если данные изменились.
+
+Результат отчётов вычисляется один раз и выгружается во все форматы `--formats`:
+
+    python -m app.cli.main run --students data/JSON/students.json \\
+        --rooms data/JSON/rooms.json --formats json xml --output result
+    python -m app.cli.main --sqlite data/university.db report --formats ndjson --combined
+
+По умолчанию используется PostgreSQL (`--dsn` или переменные окружения PG*),
+`--sqlite` переключает на файл SQLite. С `--cache-dir` отчёты берутся
+из кэша, пока загрузки не изменили данные (версия в таблице data_versions). `--metrics PATH` включает метрики
+стадий (`app.metrics`) и пишет сводку по завершении: `.prom`/`.txt` — формат
+Prometheus, иначе JSON.
 """
+import argparse
 import os
 import logging
+import sys
+from app import metrics
+from app.adapters.compression import CODEC_EXTENSIONS, COMPRESSION_CODECS
 from app.adapters.postgres_db import PostgresDB
+from app.adapters.postgres_pool import PooledPostgresDB
+from app.adapters.sqlite_db import SQLiteDB
+from app.adapters.export_arrow import ArrowExporter
 from app.adapters.export_json import JsonExporter
+from app.adapters.export_ndjson import NdjsonExporter
 from app.adapters.export_xml import XmlExporter
-from app.services import schema_service, load_service, query_service
+from app.adapters.report_cache import DiskReportCache
+from app.ports.db import DB
+from app.ports.exporter import Exporter
+from app.services import schema_service, load_service, query_service, watch_service
+from app.services.reject_sink import RejectSink
 logger = logging.getLogger(__name__)
 
+# формат выгрузки -> класс экспортера
+EXPORTERS: dict[str, type] = {
+    "json": JsonExporter,
+    "xml": XmlExporter,
+    "ndjson": NdjsonExporter,
+    "arrow": ArrowExporter,
+}
+# форматы, которые пишутся одним текстовым файлом и поддерживают сжатие
+_TEXT_FORMATS = ("json", "xml", "ndjson")
+
+
+def _configure_logging(log_file: str = "logs/app.log", level: int = logging.INFO) -> None:
+    """Настраивает логгер приложения"""
+    logging.basicConfig(filename=log_file,
+                        level=level,
+                        format="%(asctime)s [%(levelname)s] %(message)s")
+
+
+def _dsn_from_env() -> str:
+    """Ссылка на БД из переменных окружения PG*"""
+    host = os.environ.get("PGHOST")
+    port = os.environ.get("PGPORT")
+    user = os.environ.get("PGUSER")
+    pwd = os.environ.get("PGPASSWORD")
+    dbn = os.environ.get("PGDATABASE")
+    return f"postgresql://{user}:{pwd}@{host}:{port}/{dbn}"
+
+
+def _make_exporter(form: str, compression: str | None = None) -> Exporter:
+    """Экспортер для формата form; неизвестный формат — XML (как в интерактивном режиме)"""
+    exporter_cls = EXPORTERS.get(form, XmlExporter)
+    if compression is not None and form in _TEXT_FORMATS:
+        return exporter_cls(compression=compression)
+    return exporter_cls()
+
+
+def _output_path(output_dir: str, name: str, form: str, compression: str | None = None) -> str:
+    """Путь выгрузки: <каталог>/<имя>.<формат>[.gz|.bz2|.xz]"""
+    if not name.endswith("." + form):
+        name += "." + form
+    if compression is not None and form in _TEXT_FORMATS:
+        name += CODEC_EXTENSIONS[compression]
+    return os.path.join(output_dir, name)
+
+
+def export_all(result: dict, formats: list[str], output_dir: str, name: str,
+               compression: str | None = None) -> dict[str, str]:
+    """
+    Выгружает один и тот же результат во все форматы formats.
+
+    Ошибка одного экспортера не мешает остальным: она пишется в лог,
+    а после всех выгрузок поднимается RuntimeError со списком форматов.
+    Возвращает {формат: путь} успешно записанных выгрузок.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    written, failed = {}, []
+    for form in formats:
+        path = _output_path(output_dir, name, form, compression)
+        try:
+            _make_exporter(form, compression).dump(result, path)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logger.exception("Ошибка экспорта в %s (%s): %s", form, path, e)
+            failed.append(form)
+            continue
+        logger.info("Результат выгружен в %s: %s", form, path)
+        written[form] = path
+    if failed:
+        raise RuntimeError(f"Не удалось выгрузить результат в форматы: {failed}")
+    return written
+
+
+def _open_db(args: argparse.Namespace) -> DB:
+    """БД по аргументам: файл SQLite или пул PostgreSQL"""
+    if args.sqlite:
+        logger.info("Используется SQLite: %s", args.sqlite)
+        return SQLiteDB(args.sqlite)
+    # пул: отчёты выполняются параллельно, каждый на своём соединении
+    maxconn = max(args.report_workers or len(query_service.REPORTS), 1)
+    return PooledPostgresDB(args.dsn or _dsn_from_env(), maxconn=maxconn)
+
+
+def _build_indexes(db: DB, args: argparse.Namespace) -> None:
+    """Индексы: в текущем подключении или CONCURRENTLY через отдельное autocommit-подключение"""
+    if not getattr(args, "concurrent_indexes", False):
+        schema_service.migrate(db, ["indexes"])
+        return
+    # CREATE INDEX CONCURRENTLY нельзя выполнять внутри транзакции
+    with PostgresDB(args.dsn or _dsn_from_env(), autocommit=True) as index_db:
+        schema_service.migrate(index_db, ["indexes"], concurrently=True)
+
+
+def _prepare_schema(db: DB, args: argparse.Namespace) -> None:
+    """
+    Миграции схемы (пропускаются, если SQL-файлы не менялись), индексы
+    (если не отложены до конца загрузки) и при --stats сводная таблица room_stats
+    """
+    logger.info("Задаем схему БД")
+    names = ["schema"]
+    if getattr(args, "incremental", False):
+        names.append("load_meta")
+    schema_service.migrate(db, names)
+    if not getattr(args, "defer_indexes", False):
+        logger.info("Добавляем индексы")
+        _build_indexes(db, args)
+    if args.stats:
+        schema_service.ensure_room_stats(db)
+
+
+def _load(db: DB, args: argparse.Namespace) -> dict:
+    """Загружает комнаты и студентов; возвращает раздел meta с числом записей"""
+    options = {"batch_size": args.batch_size, "method": args.method, "workers": args.workers,
+               "pipeline": args.pipeline, "incremental": args.incremental,
+               "delete_missing": args.delete_missing}
+    with RejectSink(args.rejects) as rejects:
+        logger.info("Загружаем файл комнат в БД")
+        imported_rooms = load_service.load_rooms(db, args.rooms, rejects=rejects, **options)
+        logger.info("Загружаем файл студентов в БД")
+        imported_students = load_service.load_students(db, args.students, rejects=rejects,
+                                                       refresh_stats=args.stats, **options)
+    if args.defer_indexes:
+        logger.info("Строим отложенные индексы после загрузки")
+        _build_indexes(db, args)
+    return {"inserted_rooms": imported_rooms, "inserted_students": imported_students}
+
+
+def _report(db: DB, args: argparse.Namespace, meta: dict | None = None) -> dict[str, str]:
+    """Выполняет отчёты один раз и выгружает результат во все форматы"""
+    logger.info("Выполняем запросы к БД и записываем результат в словарь")
+    cache = DiskReportCache(args.cache_dir, ttl=args.cache_ttl) if args.cache_dir else None
+    result = query_service.run_reports(db, names=args.reports, max_workers=args.report_workers,
+                                       combined=args.combined, from_stats=args.stats,
+                                       cache=cache)
+    if meta is not None:
+        result["meta"] = meta
+    logger.info("Экспортируем результат")
+    return export_all(result, args.formats, args.output_dir, args.output, args.compression)
+
+
+def cmd_load(args: argparse.Namespace) -> None:
+    """Подкоманда load"""
+    with _open_db(args) as db:
+        _prepare_schema(db, args)
+        meta = _load(db, args)
+    print(f"Загружено комнат: {meta['inserted_rooms']}, студентов: {meta['inserted_students']}")
+
+
+def cmd_report(args: argparse.Namespace) -> None:
+    """Подкоманда report"""
+    with _open_db(args) as db:
+        if args.stats:
+            # перестраивает room_stats, если после неё были загрузки без --stats
+            schema_service.ensure_room_stats(db)
+        written = _report(db, args)
+    for path in written.values():
+        print(path)
+
+
+def cmd_run(args: argparse.Namespace) -> None:
+    """Подкоманда run: загрузка и отчёты на одном подключении"""
+    with _open_db(args) as db:
+        _prepare_schema(db, args)
+        meta = _load(db, args)
+        written = _report(db, args, meta)
+    for path in written.values():
+        print(path)
+
+
+def cmd_watch(args: argparse.Namespace) -> None:
+    """Подкоманда watch: одно подключение на всё время наблюдения"""
+    with _open_db(args) as db:
+        _prepare_schema(db, args)
+
+        def on_change(summary: dict) -> None:
+            for path in _report(db, args, summary).values():
+                print(path, flush=True)
+        try:
+            with RejectSink(args.rejects) as rejects:
+                watch_service.watch(db, args.input_dir, on_change, interval=args.interval,
+                                    max_delay=args.max_delay, batch_size=args.batch_size,
+                                    method=args.method, workers=args.workers,
+                                    refresh_stats=args.stats, rejects=rejects)
+        except KeyboardInterrupt:
+            logger.info("Наблюдение прервано пользователем")
+
+
+def _add_write_arguments(group) -> None:
+    group.add_argument("--batch-size", type=int, default=1000, help="строк в одном батче")
+    group.add_argument("--method", choices=load_service.LOAD_METHODS, default="insert",
+                       help="способ записи (copy — только PostgreSQL)")
+    group.add_argument("--workers", type=int, default=0,
+                       help="процессов для валидации (0 — в основном процессе)")
+    group.add_argument("--rejects", metavar="PATH",
+                       help="карантинный NDJSON-файл некорректных записей (дописывается)")
+
+
+def _add_load_arguments(parser: argparse.ArgumentParser) -> None:
+    group = parser.add_argument_group("загрузка")
+    group.add_argument("--students", required=True, help="JSON-файл студентов")
+    group.add_argument("--rooms", required=True, help="JSON-файл комнат")
+    _add_write_arguments(group)
+    group.add_argument("--pipeline", action="store_true",
+                       help="запись в БД в отдельном потоке")
+    group.add_argument("--incremental", action="store_true",
+                       help="писать только новые и изменённые строки")
+    group.add_argument("--delete-missing", action="store_true",
+                       help="удалять строки, которых нет в файле (с --incremental)")
+    group.add_argument("--defer-indexes", action="store_true",
+                       help="строить индексы после загрузки, а не до неё")
+    group.add_argument("--concurrent-indexes", action="store_true",
+                       help="CREATE INDEX CONCURRENTLY без блокировки записи (PostgreSQL)")
+
+
+def _add_report_arguments(parser: argparse.ArgumentParser) -> None:
+    group = parser.add_argument_group("отчёты и выгрузка")
+    group.add_argument("--formats", nargs="+", choices=list(EXPORTERS), default=["json"],
+                       help="форматы выгрузки (результат считается один раз)")
+    group.add_argument("--output", default="result", help="имя файла результата без расширения")
+    group.add_argument("--output-dir", default="data/results", help="каталог выгрузки")
+    group.add_argument("--compression", choices=COMPRESSION_CODECS,
+                       help="сжатие текстовых форматов")
+    group.add_argument("--reports", nargs="+", choices=list(query_service.REPORTS),
+                       help="отчёты (по умолчанию все)")
+    group.add_argument("--report-workers", type=int,
+                       help="потоков для отчётов (по умолчанию по числу отчётов)")
+    group.add_argument("--combined", action="store_true",
+                       help="все отчёты одним сводным запросом")
+    group.add_argument("--cache-dir",
+                       help="каталог кэша отчётов: без изменений данных отчёты не пересчитываются")
+    group.add_argument("--cache-ttl", type=float,
+                       help="срок жизни записи кэша, с (по умолчанию без ограничения)")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Парсер аргументов командной строки"""
+    parser = argparse.ArgumentParser(
+        prog="python -m app.cli.main",
+        description="Загрузка студентов и комнат в БД, отчёты и выгрузка результата.")
+    backend = parser.add_mutually_exclusive_group()
+    backend.add_argument("--dsn", help="строка подключения PostgreSQL (по умолчанию из PG*)")
+    backend.add_argument("--sqlite", help="файл базы SQLite вместо PostgreSQL")
+    parser.add_argument("--stats", action="store_true",
+                        help="поддерживать room_stats и читать отчёты из неё (PostgreSQL); "
+                             "средний возраст в top5_young_avg считается по среднему дню "
+                             "рождения и может отличаться от точного отчёта на год")
+    parser.add_argument("--log-file", default="logs/app.log")
+    parser.add_argument("--log-level", default="INFO",
+                        choices=["DEBUG", "INFO", "WARNING", "ERROR"])
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="собрать метрики стадий и записать сводку (.prom — Prometheus, "
+                             "иначе JSON)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    load = commands.add_parser("load", help="загрузить JSON в БД")
+    _add_load_arguments(load)
+    load.set_defaults(handler=cmd_load)
+
+    report = commands.add_parser("report", help="отчёты по загруженным данным")
+    _add_report_arguments(report)
+    report.set_defaults(handler=cmd_report)
+
+    run = commands.add_parser("run", help="загрузка и отчёты за один запуск")
+    _add_load_arguments(run)
+    _add_report_arguments(run)
+    run.set_defaults(handler=cmd_run)
+
+    watch = commands.add_parser("watch", help="наблюдать за каталогом входящих файлов")
+    group = watch.add_argument_group("наблюдение")
+    group.add_argument("--input-dir", required=True,
+                       help="каталог с файлами rooms*.json и students*.json")
+    group.add_argument("--interval", type=float, default=1.0, help="период опроса, с")
+    group.add_argument("--max-delay", type=float, default=10.0,
+                       help="сколько ждать дописываемые файлы серии, с")
+    _add_write_arguments(group)
+    _add_report_arguments(watch)
+    watch.set_defaults(handler=cmd_watch, incremental=True)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Точка входа командной строки. Без аргументов — интерактивный режим `app()`.
+    Возвращает код завершения: 0 — успех, 1 — ошибка (подробности в логе).
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        app()
+        return 0
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command in ("load", "run") and args.delete_missing and not args.incremental:
+        parser.error("--delete-missing требует --incremental")
+    if args.command in ("load", "run") and args.concurrent_indexes and args.sqlite:
+        parser.error("--concurrent-indexes доступен только для PostgreSQL")
+    if args.command != "load" and args.combined and args.stats:
+        parser.error("--combined и --stats взаимоисключающие")
+    _configure_logging(args.log_file, getattr(logging, args.log_level))
+    logger.info("Программа запущена: %s", args.command)
+    if args.metrics:
+        metrics.enable()
+    try:
+        args.handler(args)
+        return 0
+    except FileNotFoundError as e:
+        logger.error("Файл не найден: %s", e.filename)
+        print(f"Файл не найден: {e.filename}", file=sys.stderr)
+    except ValueError as e:
+        logger.error("Ошибка в данных: %s", e)
+        print(f"Ошибка в данных: {e}", file=sys.stderr)
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        logger.exception("Неожиданная ошибка: %s", e)
+        print(f"Ошибка: {e}", file=sys.stderr)
+    finally:
+        if args.metrics:
+            _dump_metrics(args.metrics)
+        logger.info("Завершение работы программы")
+    return 1
+
+
+def _dump_metrics(path: str) -> None:
+    """Пишет сводку метрик; ошибка записи не меняет код завершения."""
+    try:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        metrics.dump(path)
+        logger.info("Метрики записаны в %s", path)
+    except OSError as e:
+        logger.error("Не удалось записать метрики в %s: %s", path, e)
+
+
 def app() -> None:
     '''This is the main function of reading data from user'''
     # Настраиваем логгер
-    logging.basicConfig(filename="logs/app.log",
-                        level=logging.INFO,
-                        format="%(asctime)s [%(levelname)s] %(message)s")
+    _configure_logging()
     logger.info("Программа запущена")
     try:
         logger.info("Принимаем параметры")
@@ -33,7 +392,7 @@ def app() -> None:
         rooms_json_path = input("Введите путь к json файлу комнат \n")
         logger.info("Задан путь для файла с комнатами %s", rooms_json_path)
         # format (выходной формат: xml или json);
-        form = input("Введите выходной формат: xml или json\n").lower()
+        form = input("Введите выходной формат: xml, json, ndjson или arrow\n").lower()
         # название файла для выгрузки результатов
         name_of_file = input("Введите название файла для выгрузки результата\n")
         logger.info("Задано название файла результатов %s", name_of_file)
@@ -43,23 +402,14 @@ def app() -> None:
             name_of_file += '.' + form
         # Читаем параметры для создания ссылки для подключения к БД
         logger.info("Читаем параметры для подключения к БД")
-        host = os.environ.get("PGHOST")
-        port = os.environ.get("PGPORT")
-        user = os.environ.get("PGUSER")
-        pwd = os.environ.get("PGPASSWORD")
-        dbn = os.environ.get("PGDATABASE")
-        logger.info("Создаем ссылку на БД")
-        db_url = f"postgresql://{user}:{pwd}@{host}:{port}/{dbn}"
+        db_url = _dsn_from_env()
 
         # Задаем экспортер файла результатов
-        if form == 'json':
-            logger.info("Инициализирован экспортер для JSON")
-            exporter = JsonExporter()
-        else:
-            logger.info("Инициализиован экспотер для XML")
-            exporter = XmlExporter()
+        exporter = _make_exporter(form)
+        logger.info("Инициализирован экспортер %s", type(exporter).__name__)
         # Начинаем работу с БД
-        with PostgresDB(db_url) as db:
+        # пул: отчёты ниже выполняются параллельно, каждый на своём соединении
+        with PooledPostgresDB(db_url, maxconn=len(query_service.REPORTS)) as db:
             logger.info("Успешное подулючение к БД")
             # Задаем схему БД
             logger.info("Задаем схему БД")
@@ -73,16 +423,13 @@ def app() -> None:
             logger.info("Загружаем файл комнат в БД")
             imported_students = load_service.load_students(db, students_json_path)
             logger.info("Выполняем запросы к БД и записываем результат в словарь")
-            # словарь для результатов запросов к БД
-            result = {
-                "count_student_in_rooms" : query_service.rooms_counts(db),
-                "top5_young_avg" : query_service.top5_young_avg(db),
-                "top5_age_spread": query_service.top5_age_spread(db),
-                "rooms_with_mixed_gender": query_service.mixed_gender_rooms(db),
-                "meta": {"inserted_rooms": imported_rooms, "inserted_students": imported_students},
-            }
+            # словарь для результатов запросов к БД (точные запросы; room_stats — только с --stats)
+            result = query_service.run_reports(db)
+            result["meta"] = {"inserted_rooms": imported_rooms,
+                              "inserted_students": imported_students}
             logger.info("Экспортируем результат")
             # Экспортируем результат
+            os.makedirs("data/results", exist_ok=True)
             exporter.dump(result, "data/results/" + name_of_file)
     except FileNotFoundError as e:
         logger.error("Файл не найден: %s", e.filename)
@@ -93,4 +440,4 @@ def app() -> None:
     finally:
         logger.info("Завершение работы программы")
 if __name__ == "__main__":
-    app()
+    sys.exit(main())
@@ -6,22 +6,36 @@
 - `Student`
 
 Предоставляет вспомогательные функции:
-- `room_from_json()` – проверяет и преобразует необработанный словарь в Room.
+- `room_from_json()` – проверяет и преобразует необработанный словарь в Room
+(None для некорректной записи); `parse_room()` – то же с исключением.
 - `student_from_json()` – проверяет и преобразует необработанный словарь в Student,
 поддерживая JSON-ключи «room» и «room_id», а также даты в формате ISO.
+
+Пакетное декодирование для загрузки:
+- `decode_students()`, `decode_rooms()` – список сырых элементов сразу
+в кортежи для вставки (или столбцы при columnar=True) и список отбракованных.
+Типичные корректные записи проверяются без создания сущностей и исключений,
+дата рождения разбирается с кэшем (`parse_birthday`); всё нетипичное уходит
+в `student_from_json` / `parse_room`, поэтому правила валидации те же.
+
+Ошибки валидации — `InvalidRecord` (подкласс ValueError) с кодом причины
+`reason`. Функции не логируют записи: отбракованные записи учитывает
+вызывающий код (см. `app.services.reject_sink`).
 """
 from dataclasses import dataclass
 from datetime import date, datetime
+from functools import lru_cache
+from typing import Sequence
 import logging
 logger = logging.getLogger(__name__)
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Room:
     '''The data class for Room.'''
     id: int
     name: str
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Student:
     '''The data class for Student'''
     id: int
@@ -30,6 +44,16 @@ class Student:
     birthday: date
     room_id: int
 
+class InvalidRecord(ValueError):
+    """Некорректная запись JSON; reason — машиночитаемый код причины (REJECT_REASONS)."""
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+
+# коды причин отбраковки записей
+REJECT_REASONS = ("not_a_dict", "missing_field", "invalid_sex", "invalid_birthday",
+                  "invalid_value")
+
 # helper для валидации студента из сырого json-словаря
 def student_from_json(obj: dict) -> Student:
     '''Это функция для преобразования данных студента из словаря JSON в класс данных Student.'''
@@ -38,38 +62,133 @@ def student_from_json(obj: dict) -> Student:
         student_id = int(obj["id"])
         name = str(obj["name"])
         sex = str(obj["sex"])
-        # проверить sex ∈ {'M','F'}
-        if sex not in {"M", "F"}:
-            raise ValueError(f"Invalid sex '{sex}' (expected M/F)")
-        # распарсить birthday (YYYY-MM-DD) -> date
         bday_raw = obj["birthday"]
-        birthday = datetime.fromisoformat(bday_raw).date()
         room_id = obj.get("room_id", obj.get("room"))
         if room_id is None:
             raise KeyError("room_id")
         room_id = int(room_id)
-        # вернуть Student(...)
-        return Student(student_id, name, sex, birthday, room_id)
-    # Обработка ошибок
+    # Обработка ошибок: запись целиком не форматируется — её сохраняет вызывающий
     except KeyError as e:
-        logger.error("Пропущен студент — отсутствует поле '%s': %s", e.args[0], obj)
-        raise ValueError(f"Missing field {e.args[0]} in student JSON: {obj}") from e
+        raise InvalidRecord("missing_field", f"Missing field {e.args[0]} in student JSON") from e
+    except (TypeError, ValueError, OverflowError) as e:  # int(inf) — OverflowError
+        raise InvalidRecord("invalid_value", f"Invalid student data: {e}") from e
+    # проверить sex ∈ {'M','F'}
+    if sex not in {"M", "F"}:
+        raise InvalidRecord("invalid_sex", f"Invalid sex '{sex}' (expected M/F)")
+    # распарсить birthday (YYYY-MM-DD) -> date
+    try:
+        birthday = datetime.fromisoformat(bday_raw).date()
     except (TypeError, ValueError) as e:
-        logger.error("Пропущен студент — некорректные данные: %s (%s)", obj, e)
-        raise ValueError(f"Invalid student data {obj}: {e}") from e
-# helper для валидации комнаты из сырого json-словаря
-def room_from_json(obj: dict) -> Room | None:
-    '''Это функция для преобразования данных студента из словаря JSON в класс данных Room.'''
+        raise InvalidRecord("invalid_birthday", f"Invalid birthday {bday_raw!r}: {e}") from e
+    # вернуть Student(...)
+    return Student(student_id, name, sex, birthday, room_id)
+
+# helper для строгой валидации комнаты из сырого json-словаря
+def parse_room(obj: dict) -> Room:
+    '''Преобразует словарь JSON в Room; при ошибке бросает InvalidRecord.'''
+    if obj.get("id") is None:
+        raise InvalidRecord("missing_field", "Missing field id in room JSON")
     try:
         # простая проверка id:int, name:str
         return Room(
-            id=int(obj.get("id")),
+            id=int(obj["id"]),
             name=str(obj.get("name", "")).strip(),
         )
-    except KeyError as e:
-        logger.error("Пропущена комната — отсутствует поле '%s': %s", e.args[0], obj)
+    except (TypeError, ValueError, OverflowError) as e:
+        raise InvalidRecord("invalid_value", f"Invalid room data: {e}") from e
+
+# helper для валидации комнаты из сырого json-словаря
+def room_from_json(obj: dict) -> Room | None:
+    '''Это функция для преобразования данных студента из словаря JSON в класс данных Room.'''
+    try:
+        return parse_room(obj)
+    except InvalidRecord as e:
+        logger.debug("Пропущена комната (%s): %s", e.reason, e)
         return None
 
-    except (TypeError, ValueError) as e:
-        logger.error("Пропущена комната — некорректные данные: %s (%s)", obj, e)
+# ---- пакетное декодирование ----
+# (позиция во входном файле, исходный элемент, код причины, сообщение)
+Reject = tuple[int, object, str, str]
+
+@lru_cache(maxsize=1 << 16)
+def parse_birthday(raw: str) -> date | None:
+    '''Дата рождения из ISO-строки (None, если не разбирается); даты повторяются — кэш.'''
+    try:
+        return datetime.fromisoformat(raw).date()
+    except ValueError:
         return None
+
+def _slow_student(obj, index: int, rows: list, rejects: list) -> None:
+    """Полная проверка `student_from_json` для записей вне быстрого пути."""
+    if not isinstance(obj, dict):
+        rejects.append((index, obj, "not_a_dict", f"not a dict: {type(obj).__name__}"))
+        return
+    try:
+        s = student_from_json(obj)
+    except InvalidRecord as e:
+        rejects.append((index, obj, e.reason, str(e)))
+        return
+    rows.append((s.id, s.name, s.sex, s.birthday, s.room_id))
+
+def decode_students(objs: Sequence, start: int = 1,
+                    columnar: bool = False) -> tuple[list | tuple[list, ...], list[Reject]]:
+    """
+    Декодирует пакет сырых элементов JSON в кортежи (id, name, sex, birthday, room_id).
+    start — номер первого элемента во входном файле (для отбракованных).
+    Возвращает (строки, [(номер, элемент, причина, сообщение), ...]);
+    при columnar=True вместо строк — кортеж из пяти списков-столбцов.
+    """
+    # точные проверки типов намеренны: bool и подклассы идут полным путём
+    # pylint: disable=unidiomatic-typecheck
+    rows: list[tuple] = []
+    rejects: list[Reject] = []
+    append = rows.append
+    for index, obj in enumerate(objs, start):
+        # быстрый путь: значения уже нужных типов, ничего не приводим
+        if type(obj) is dict:
+            student_id = obj.get("id")
+            name = obj.get("name")
+            sex = obj.get("sex")
+            raw = obj.get("birthday")
+            room_id = obj.get("room_id", obj.get("room"))
+            if (type(student_id) is int and type(name) is str and sex in ("M", "F")
+                    and type(raw) is str and type(room_id) is int):
+                birthday = parse_birthday(raw)
+                if birthday is not None:
+                    append((student_id, name, sex, birthday, room_id))
+                    continue
+        _slow_student(obj, index, rows, rejects)
+    if columnar:
+        return _columns(rows, 5), rejects
+    return rows, rejects
+
+def decode_rooms(objs: Sequence, start: int = 1,
+                 columnar: bool = False) -> tuple[list | tuple[list, ...], list[Reject]]:
+    """То же для комнат: кортежи (id, name) или два столбца при columnar=True."""
+    # pylint: disable=unidiomatic-typecheck
+    rows: list[tuple] = []
+    rejects: list[Reject] = []
+    for index, obj in enumerate(objs, start):
+        if type(obj) is dict:
+            room_id = obj.get("id")
+            name = obj.get("name", "")
+            if type(room_id) is int and type(name) is str:
+                rows.append((room_id, name.strip()))
+                continue
+        if not isinstance(obj, dict):
+            rejects.append((index, obj, "not_a_dict", f"not a dict: {type(obj).__name__}"))
+            continue
+        try:
+            r = parse_room(obj)
+        except InvalidRecord as e:
+            rejects.append((index, obj, e.reason, str(e)))
+            continue
+        rows.append((r.id, r.name))
+    if columnar:
+        return _columns(rows, 2), rejects
+    return rows, rejects
+
+def _columns(rows: list[tuple], width: int) -> tuple[list, ...]:
+    if not rows:
+        return tuple([] for _ in range(width))
+    return tuple(list(column) for column in zip(*rows))
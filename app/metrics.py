@@ -0,0 +1,276 @@
+"""
+Лёгкие метрики выполнения: счётчики, измерители (gauge) и гистограммы.
+
+Метрики выключены по умолчанию: вызовы `inc()`, `set_gauge()`, `observe()`
+сводятся к проверке одного флага, `timer()` отдаёт общий пустой контекстный
+менеджер, а функции с `@timed` вызываются напрямую. Включаются `enable()`
+(в CLI — флагом `--metrics`).
+
+API:
+- `inc(name, value=1, **labels)` – счётчик (только растёт);
+- `set_gauge(name, value, **labels)` – текущее значение;
+- `observe(name, value, **labels)` – наблюдение в гистограмму (задержки, размеры);
+- `timer(name, **labels)` – контекстный менеджер, пишет длительность в гистограмму:
+
+      with metrics.timer("report_seconds", report="rooms_counts"):
+          ...
+
+- `@timed(name, **labels)` – то же для функции целиком.
+
+Сводка выгружается `to_json()` или `to_prometheus()` (текстовый формат
+экспозиции Prometheus) либо сразу в файл `dump(path)` — формат по расширению.
+
+Имена метрик — в стиле Prometheus: `*_total` для счётчиков, `*_seconds`
+и `*_bytes` для гистограмм с единицами измерения.
+"""
+import functools
+import json
+import math
+import threading
+from time import perf_counter
+from typing import Callable
+
+# границы корзин гистограмм, секунды (подходят и для задержек батчей, и для отчётов)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class _Histogram:
+    """Накопленные наблюдения одной серии гистограммы."""
+    __slots__ = ("buckets", "counts", "count", "sum", "min", "max")
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def cumulative(self) -> list[int]:
+        """Накопленные счётчики корзин (как le в Prometheus)."""
+        total, result = 0, []
+        for count in self.counts:
+            total += count
+            result.append(total)
+        return result
+
+
+class _Timer:
+    """Контекстный менеджер замера: длительность блока уходит в гистограмму."""
+    __slots__ = ("_registry", "_name", "_labels", "_start", "elapsed")
+
+    def __init__(self, registry: "Registry", name: str, labels: dict):
+        self._registry = registry
+        self._name = name
+        self._labels = labels
+        self._start = 0.0
+        self.elapsed = 0.0
+
+    def __enter__(self) -> "_Timer":
+        self._start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.elapsed = perf_counter() - self._start
+        self._registry.observe(self._name, self.elapsed, **self._labels)
+
+
+class _NullTimer:
+    """Пустой замер для выключенных метрик."""
+    __slots__ = ()
+    elapsed = 0.0
+
+    def __enter__(self) -> "_NullTimer":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        return None
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def _key(labels: dict) -> tuple:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+class Registry:
+    """
+    Хранилище метрик. Обновления потокобезопасны (отчёты выполняются
+    в пуле потоков); при enabled=False все обновления игнорируются.
+    """
+    def __init__(self, enabled: bool = False, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._counters: dict[str, dict[tuple, float]] = {}
+        self._gauges: dict[str, dict[tuple, float]] = {}
+        self._histograms: dict[str, dict[tuple, _Histogram]] = {}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        if not self.enabled:
+            return
+        key = _key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._gauges.setdefault(name, {})[_key(labels)] = value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        if not self.enabled:
+            return
+        key = _key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(self.buckets)
+            histogram.observe(value)
+
+    def timer(self, name: str, **labels) -> _Timer | _NullTimer:
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name, labels)
+
+    # ---- выгрузка ----
+    def snapshot(self) -> dict:
+        """Сводка {имя: {"type": ..., "series": [...]}}, пригодная для json.dumps."""
+        result = {}
+        with self._lock:
+            for kind, metrics in (("counter", self._counters), ("gauge", self._gauges)):
+                for name, series in sorted(metrics.items()):
+                    result[name] = {"type": kind, "series": [
+                        {"labels": dict(key), "value": value}
+                        for key, value in sorted(series.items())]}
+            for name, series in sorted(self._histograms.items()):
+                result[name] = {"type": "histogram", "series": [
+                    {"labels": dict(key), "count": h.count, "sum": h.sum,
+                     "min": h.min, "max": h.max,
+                     "buckets": {str(bound): count
+                                 for bound, count in zip(h.buckets, h.cumulative())}}
+                    for key, h in sorted(series.items())]}
+        return result
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+
+    def to_prometheus(self) -> str:
+        """Сводка в текстовом формате экспозиции Prometheus."""
+        lines = []
+        for name, metric in self.snapshot().items():
+            lines.append(f"# TYPE {name} {metric['type']}")
+            for series in metric["series"]:
+                labels = series["labels"]
+                if metric["type"] != "histogram":
+                    lines.append(f"{name}{_labels_text(labels)} {_number(series['value'])}")
+                    continue
+                for bound, count in series["buckets"].items():
+                    lines.append(f"{name}_bucket{_labels_text(labels, le=bound)} {count}")
+                lines.append(f"{name}_bucket{_labels_text(labels, le='+Inf')} {series['count']}")
+                lines.append(f"{name}_sum{_labels_text(labels)} {_number(series['sum'])}")
+                lines.append(f"{name}_count{_labels_text(labels)} {series['count']}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: str) -> None:
+        """Пишет сводку в файл: .prom/.txt — формат Prometheus, иначе JSON."""
+        text = self.to_prometheus() if path.endswith((".prom", ".txt")) else self.to_json()
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels_text(labels: dict, **extra) -> str:
+    items = {**labels, **extra}
+    if not items:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in items.items()) + "}"
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# реестр процесса
+REGISTRY = Registry()
+
+
+def enable() -> None:
+    REGISTRY.enabled = True
+
+
+def disable() -> None:
+    REGISTRY.enabled = False
+
+
+def is_enabled() -> bool:
+    return REGISTRY.enabled
+
+
+def inc(name: str, value: float = 1, **labels) -> None:
+    REGISTRY.inc(name, value, **labels)
+
+
+def set_gauge(name: str, value: float, **labels) -> None:
+    REGISTRY.set_gauge(name, value, **labels)
+
+
+def observe(name: str, value: float, **labels) -> None:
+    REGISTRY.observe(name, value, **labels)
+
+
+def timer(name: str, **labels) -> _Timer | _NullTimer:
+    return REGISTRY.timer(name, **labels)
+
+
+def timed(name: str, **labels) -> Callable[[Callable], Callable]:
+    """Декоратор: длительность каждого вызова функции пишется в гистограмму name."""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not REGISTRY.enabled:
+                return func(*args, **kwargs)
+            with _Timer(REGISTRY, name, labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def reset() -> None:
+    REGISTRY.reset()
+
+
+def to_json() -> str:
+    return REGISTRY.to_json()
+
+
+def to_prometheus() -> str:
+    return REGISTRY.to_prometheus()
+
+
+def dump(path: str) -> None:
+    REGISTRY.dump(path)
@@ -0,0 +1,58 @@
+"""
+Асинхронный интерфейс базы данных (порт AsyncDB).
+
+Асинхронный аналог протокола `DB` для встраивания обработчика в asyncio-сервисы.
+SQL передаётся в том же стиле, что и в `DB` (плейсхолдеры `%s`), поэтому сервисы
+переиспользуют одни и те же тексты запросов; перевод в синтаксис драйвера
+выполняет адаптер.
+
+Методы:
+    connect() -> None / close() -> None:
+        Создаёт и закрывает подключение (пул соединений).
+
+    execute(sql: str, params: tuple | None = None) -> int:
+        Выполняет SQL без возврата данных. Без параметров допускается
+        несколько операторов через ';' (файлы схемы). Возвращает число
+        затронутых строк (-1 — неизвестно), как `DB.execute`.
+
+    executemany(sql: str, params_seq: Iterable[tuple]) -> int:
+        Выполняет пакетную вставку данных; возвращает суммарное число
+        затронутых строк (-1 — неизвестно).
+
+    query(sql: str, params: tuple | None = None) -> list[dict]:
+        Выполняет выборку и возвращает список словарей.
+
+    copy_rows(table: str, columns: Sequence[str],
+              rows: Iterable[tuple] | AsyncIterable[tuple]) -> int:
+        Массовая загрузка строк (в PostgreSQL — COPY) из обычного или асинхронного
+        итератора. Возвращает количество строк.
+
+    transaction() -> AsyncContextManager[None]:
+        Транзакция на одном соединении для текущей задачи asyncio.
+        Пример:
+            async with db.transaction():
+                await db.execute(...)
+
+    __aenter__() / __aexit__():
+        Поддержка асинхронного контекстного менеджера на уровне подключения.
+
+Атрибуты:
+    dialect: str (необязательный) — как у `DB`, читается через `dialect_of(db)`.
+
+Реализации:
+    - `AsyncPostgresDB` — PostgreSQL на asyncpg.
+"""
+from typing import AsyncContextManager, AsyncIterable, Iterable, Protocol, Sequence
+
+class AsyncDB(Protocol):
+    async def connect(self) -> None: ...
+    async def close(self) -> None: ...
+    async def execute(self, sql: str, params: tuple | None = None) -> int: ...
+    async def executemany(self, sql: str, params_seq: Iterable[tuple]) -> int: ...
+    async def query(self, sql: str, params: tuple | None = None) -> list[dict]: ...
+    async def copy_rows(self, table: str, columns: Sequence[str],
+                        rows: Iterable[tuple] | AsyncIterable[tuple]) -> int: ...
+    def transaction(self) -> AsyncContextManager[None]: ...  # async with db.transaction(): ...
+
+    async def __aenter__(self) -> "AsyncDB": ...
+    async def __aexit__(self, exc_type, exc, tb) -> None: ...
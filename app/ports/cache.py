@@ -0,0 +1,25 @@
+"""
+Интерфейс кэша результатов отчётов (порт ReportCache).
+
+`query_service.run_reports` кладёт в кэш строки успешно выполненных отчётов
+под ключом «раздел + источник + версия данных» и берёт их оттуда, пока версия
+(`load_service.data_version`) не изменилась. Неудачные отчёты не кэшируются.
+
+Методы:
+    get(key: str) -> list[dict] | None:
+        Строки по ключу; None — промах (нет записи или истёк срок).
+    set(key: str, rows: list[dict]) -> None:
+        Сохраняет строки; реализация сама вытесняет старые записи.
+    clear() -> None:
+        Удаляет все записи.
+
+Реализации:
+    - `MemoryReportCache` — LRU в памяти процесса с ограничением числа записей и TTL;
+    - `DiskReportCache` — файлы в каталоге, переживают перезапуск процесса.
+"""
+from typing import Protocol
+
+class ReportCache(Protocol):
+    def get(self, key: str) -> list[dict] | None: ...
+    def set(self, key: str, rows: list[dict]) -> None: ...
+    def clear(self) -> None: ...
@@ -13,16 +13,29 @@
     close() -> None:
         Закрывает текущее соединение.
 
-    execute(sql: str, params: tuple | dict | None = None) -> None:
+    execute(sql: str, params: tuple | dict | None = None) -> int:
         Выполняет одиночный SQL-запрос без возврата данных (INSERT, UPDATE, DELETE).
+        Возвращает число затронутых строк (rowcount драйвера; -1 — неизвестно,
+        например для DDL или нескольких операторов через ';').
 
-    executemany(sql: str, params_seq: Iterable[tuple]) -> None:
-        Выполняет пакетную вставку данных (bulk insert).
+    executemany(sql: str, params_seq: Iterable[tuple]) -> int:
+        Выполняет пакетную вставку данных (bulk insert). Возвращает суммарное
+        число затронутых строк (-1 — неизвестно).
 
     query(sql: str, params: tuple | dict | None = None) -> list[dict]:
         Выполняет SQL-запрос с выборкой данных и возвращает результат
         в виде списка словарей.
 
+    iter_query(sql: str, params: tuple | dict | None = None,
+               chunk_size: int = 1000, row_type: str = "dict") -> Iterator:
+        Потоковая выборка: отдаёт строки по одной, подгружая их с сервера
+        порциями по chunk_size (в PostgreSQL — именованный серверный курсор).
+        row_type: "dict" (по умолчанию), "tuple" или "namedtuple".
+
+    copy_rows(table: str, columns: Sequence[str], rows: Iterable[tuple]) -> int:
+        Потоковая массовая загрузка строк в таблицу (в PostgreSQL — COPY ... FROM STDIN).
+        Возвращает количество переданных строк.
+
     transaction() -> ContextManager[None]:
         Контекстный менеджер для выполнения транзакций.
         Пример:
@@ -32,17 +45,34 @@
 
     __enter__() / __exit__():
         Поддержка контекстного менеджера на уровне соединения с БД.
+
+Атрибуты:
+    dialect: str (необязательный):
+        Диалект SQL реализации — "postgresql" (по умолчанию) или "sqlite".
+        По нему сервисы выбирают файлы схемы и тексты запросов; читать его
+        следует через `dialect_of(db)`.
 """
-from typing import Protocol, Iterable, Mapping, ContextManager
+from typing import Protocol, Iterable, Iterator, Mapping, ContextManager, Sequence
+
+ROW_TYPES = ("dict", "tuple", "namedtuple")
+DIALECTS = ("postgresql", "sqlite")
 
 class DB(Protocol):
     def connect(self) -> None: ...
     def close(self) -> None: ...
-    def execute(self, sql: str, params: tuple | Mapping | None = None) -> None: ...
-    def executemany(self, sql: str, params_seq: Iterable[tuple]) -> None: ...
+    def execute(self, sql: str, params: tuple | Mapping | None = None) -> int: ...
+    def executemany(self, sql: str, params_seq: Iterable[tuple]) -> int: ...
     def query(self, sql: str, params: tuple | Mapping | None = None) -> list[dict]: ...
+    def iter_query(self, sql: str, params: tuple | Mapping | None = None,
+                   chunk_size: int = 1000, row_type: str = "dict") -> Iterator: ...
+    def copy_rows(self, table: str, columns: Sequence[str], rows: Iterable[tuple]) -> int: ...
     def transaction(self) -> ContextManager[None]: ...  # with db.transaction(): ...
 
     # опционально: контекстный менеджер для всего подключения
     def __enter__(self) -> "DB": ...
     def __exit__(self, exc_type, exc, tb) -> None: ...
+
+
+def dialect_of(db: DB) -> str:
+    """Диалект SQL реализации DB (без атрибута `dialect` — PostgreSQL)."""
+    return getattr(db, "dialect", "postgresql")
@@ -14,8 +14,14 @@
             data — словарь с данными для сохранения;
             path — путь к файлу, куда нужно записать результат.
 
+Сжатие: текстовые экспортеры (JSON, NDJSON, XML) пишут через
+`app.adapters.compression.open_output` — расширение .gz/.bz2/.xz у `path`
+или параметр `compression` включает потоковое сжатие.
+
 Реализации:
     - `JsonExporter` — сохраняет данные в формате JSON;
+    - `NdjsonExporter` — сохраняет данные построчно в формате NDJSON;
+    - `ArrowExporter` — сохраняет разделы типизированными файлами Arrow IPC;
     - `XmlExporter` — сохраняет данные в формате XML.
 """
 from typing import Protocol
@@ -0,0 +1,22 @@
+"""
+Интерфейс источника готовых отчётов (порт ReportSource).
+
+Позволяет подключать к `query_service` вычислители отчётов, которые работают
+не через SQL (например, векторный движок по JSON-файлам). Если объект,
+переданный в функции `query_service` вместо `DB`, реализует этот протокол,
+отчёт берётся из `report(name)`, а не из `db.query(sql)`.
+
+Методы:
+    report(name: str) -> list[dict]:
+        Возвращает строки отчёта с именем `name` ("rooms_counts",
+        "top5_young_avg", "top5_age_spread", "mixed_gender_rooms",
+        "combined_reports") в той же форме, что и SQL-запрос.
+
+Реализации:
+    - `VectorReportEngine` — отчёты на массивах NumPy.
+"""
+from typing import Protocol, runtime_checkable
+
+@runtime_checkable
+class ReportSource(Protocol):
+    def report(self, name: str) -> list[dict]: ...
\ No newline at end of file
@@ -0,0 +1,116 @@
+"""
+Асинхронный сервис загрузки данных.
+
+Асинхронные версии `load_rooms()` / `load_students()` для порта `AsyncDB`.
+Используют те же SQL, валидацию и разбиение на батчи (`load_common`), что и `load_service`,
+синхронный API при этом не меняется.
+
+Чтение и валидация JSON — блокирующая работа, поэтому очередной батч
+готовится в потоке (`asyncio.to_thread`) параллельно с записью предыдущего,
+а цикл событий остаётся свободным для других задач.
+
+Способы записи (параметр `method`):
+- "insert" – `executemany` пакетами по `batch_size` строк;
+- "copy" – один поток COPY во временную staging-таблицу и затем
+  `INSERT ... SELECT ... ON CONFLICT DO NOTHING`.
+
+Загрузка, изменившая строки (по числу затронутых строк, а не переданных),
+меняет версию данных (data_versions), как и синхронная. Инкрементальный режим, конвейер с пулом процессов и room_stats
+есть только в синхронном `load_service`.
+
+Функции:
+- `_aiter_batches()` – асинхронный итератор батчей с подготовкой в потоке.
+- `load_rooms()` – загрузка и вставка данных о комнатах.
+- `load_students()` – загрузка и вставка данных о студентах.
+"""
+import asyncio
+import logging
+import uuid
+from contextlib import aclosing
+from typing import AsyncIterator, Iterator, Sequence
+from app.ports.async_db import AsyncDB
+from app.services.json_stream import iter_json_items
+from app.services.load_common import (DATA_VERSION_BUMP, LOAD_METHODS, TARGETS, affected_rows,
+                                      batched, iter_rows)
+from app.services.reject_sink import RejectSink
+
+logger = logging.getLogger(__name__)
+
+
+async def _aiter_batches(batches: Iterator[Sequence[tuple]]) -> AsyncIterator[Sequence[tuple]]:
+    """
+    Отдаёт батчи синхронного генератора, готовя каждый следующий в потоке,
+    пока потребитель записывает текущий.
+    """
+    pending = asyncio.ensure_future(asyncio.to_thread(next, batches, None))
+    try:
+        while True:
+            batch = await pending
+            if batch is None:
+                return
+            pending = asyncio.ensure_future(asyncio.to_thread(next, batches, None))
+            yield batch
+    finally:
+        # генератор нельзя закрывать, пока поток ещё читает из него
+        if not pending.done():
+            await asyncio.wait({pending})
+
+
+async def _aiter_rows(batches: AsyncIterator[Sequence[tuple]]) -> AsyncIterator[tuple]:
+    """Разворачивает асинхронный поток батчей в поток строк (для COPY)."""
+    async for batch in batches:
+        for row in batch:
+            yield row
+
+
+async def _load_run(db: AsyncDB, path: str, type_of_data: str,
+                    batch_size: int = 1000, method: str = "insert") -> int:
+    """Функция для унификации асинхронных функций загрузки студентов и комнат"""
+    if method not in LOAD_METHODS:
+        raise ValueError(f"Неизвестный способ загрузки '{method}', ожидался один из {LOAD_METHODS}")
+    target = TARGETS[type_of_data]
+    rejects = RejectSink()
+    rejects.source = path
+    rows = iter_rows(iter_json_items(path, type_of_data), type_of_data, rejects)
+    logger.info("Асинхронно вставляем %s в БД (способ: %s)", type_of_data, method)
+    inserted = changed = 0
+    with rejects:
+        async with aclosing(_aiter_batches(batched(rows, batch_size))) as batches:
+            async with db.transaction():
+                if method == "copy":
+                    await db.execute(target.stage_create)
+                    inserted = await db.copy_rows(target.stage, target.columns,
+                                                  _aiter_rows(batches))
+                    merged = await db.execute(target.stage_merge)
+                    await db.execute(target.stage_drop)
+                    changed = affected_rows(merged, inserted)
+                else:
+                    async for batch in batches:
+                        count = await db.executemany(target.insert, batch)
+                        inserted += len(batch)
+                        changed += affected_rows(count, len(batch))
+                if changed:
+                    # как в load_service: версия данных меняется в той же транзакции
+                    await db.execute(DATA_VERSION_BUMP, (type_of_data, uuid.uuid4().hex))
+    logger.info("Загружено %s: %s", type_of_data, inserted)
+    return inserted
+
+
+async def load_rooms(db: AsyncDB, rooms_path: str, batch_size: int = 1000,
+                     method: str = "insert") -> int:
+    """
+    Асинхронно загружает комнаты из JSON-файла пакетами (method="insert")
+    или через COPY (method="copy"). Возвращает количество обработанных записей.
+    """
+    logger.info("Запущена функция async load_rooms")
+    return await _load_run(db, rooms_path, "rooms", batch_size, method)
+
+
+async def load_students(db: AsyncDB, students_path: str, batch_size: int = 1000,
+                        method: str = "insert") -> int:
+    """
+    Асинхронно загружает студентов из JSON-файла пакетами (method="insert")
+    или через COPY (method="copy"). Возвращает количество обработанных записей.
+    """
+    logger.info("Запущена функция async load_students")
+    return await _load_run(db, students_path, "students", batch_size, method)
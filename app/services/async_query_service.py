@@ -0,0 +1,116 @@
+"""
+Асинхронный сервис аналитических запросов.
+
+Асинхронные версии отчётов `query_service` для порта `AsyncDB`: тексты
+запросов (`REPORT_SQL`), форма результата и изоляция ошибок те же.
+
+`run_reports()` запускает отчёты одновременно через `asyncio.gather`;
+с `AsyncPostgresDB` каждый запрос идёт на своём соединении из пула.
+
+Функции:
+- `rooms_counts()`, `top5_young_avg()`, `top5_age_spread()`, `mixed_gender_rooms()`.
+- `combined_reports()` – все четыре отчёта из одного прохода по таблицам.
+- `run_reports()` – набор отчётов одновременно, {раздел: строки}.
+"""
+import asyncio
+import logging
+from time import perf_counter
+from typing import Awaitable, Callable, Iterable
+from app.ports.async_db import AsyncDB
+from app.services.query_service import _report_sql, reports_from_aggregate
+
+logger = logging.getLogger(__name__)
+
+
+async def _query_run(db: AsyncDB, sql: str, name: str) -> list[dict]:
+    """Функция унификации запросов"""
+    try:
+        return await db.query(sql)
+    except (TypeError, ValueError) as e:
+        logger.error("Ошибка типов данных при обработке %s: %s", name, e)
+        return []
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        # ошибки SQL и соединения — логируем, но не роняем остальные отчёты
+        logger.exception("Ошибка при %s: %s", name, e)
+        return []
+
+
+async def rooms_counts(db: AsyncDB, from_stats: bool = False) -> list[dict]:
+    """Список комнат и количество студентов в каждой из них"""
+    return await _query_run(db, _report_sql(db, "rooms_counts", from_stats), "rooms_counts")
+
+
+async def top5_young_avg(db: AsyncDB, from_stats: bool = False) -> list[dict]:
+    """5 комнат с наименьшим средним возрастом студентов"""
+    return await _query_run(db, _report_sql(db, "top5_young_avg", from_stats), "top5_young_avg")
+
+
+async def top5_age_spread(db: AsyncDB, from_stats: bool = False) -> list[dict]:
+    """5 комнат с наибольшей разницей в возрасте студентов"""
+    return await _query_run(db, _report_sql(db, "top5_age_spread", from_stats),
+                            "top5_age_spread")
+
+
+async def mixed_gender_rooms(db: AsyncDB, from_stats: bool = False) -> list[dict]:
+    """Список комнат, где проживают студенты разного пола"""
+    return await _query_run(db, _report_sql(db, "mixed_gender_rooms", from_stats),
+                            "mixed_gender_rooms")
+
+
+# раздел результата -> функция отчёта (те же разделы, что в query_service.REPORTS)
+REPORTS: dict[str, Callable[..., Awaitable[list[dict]]]] = {
+    "count_student_in_rooms": rooms_counts,
+    "top5_young_avg": top5_young_avg,
+    "top5_age_spread": top5_age_spread,
+    "rooms_with_mixed_gender": mixed_gender_rooms,
+}
+
+
+async def combined_reports(db: AsyncDB) -> dict[str, list[dict]]:
+    """Все отчёты одним проходом по rooms/students"""
+    sql = _report_sql(db, "combined_reports")
+    return reports_from_aggregate(await _query_run(db, sql, "combined_reports"))
+
+
+async def run_reports(db: AsyncDB, names: Iterable[str] | None = None,
+                      timings: dict[str, float] | None = None,
+                      combined: bool = False, from_stats: bool = False) -> dict[str, list[dict]]:
+    """
+    Выполняет отчёты `names` (по умолчанию все из REPORTS) одновременно
+    через `asyncio.gather`.
+
+    Возвращает {раздел: строки} в порядке `names`; ошибка одного отчёта
+    не влияет на остальные. Время каждого отчёта пишется в лог и, если
+    передан словарь `timings`, в него. combined и from_stats — как
+    в `query_service.run_reports`.
+    """
+    selected = list(REPORTS) if names is None else list(names)
+    unknown = [name for name in selected if name not in REPORTS]
+    if unknown:
+        raise ValueError(f"Неизвестные отчёты: {unknown}, доступны: {list(REPORTS)}")
+    if combined and from_stats:
+        raise ValueError("combined и from_stats взаимоисключающие")
+    if combined:
+        start = perf_counter()
+        sections = await combined_reports(db)
+        elapsed = perf_counter() - start
+        logger.info("Сводный отчёт выполнен за %.3f с", elapsed)
+        if timings is not None:
+            timings["combined_reports"] = elapsed
+        return {name: sections[name] for name in selected}
+
+    async def timed(name: str) -> tuple[list[dict], float]:
+        start = perf_counter()
+        rows = await REPORTS[name](db, from_stats=from_stats)
+        return rows, perf_counter() - start
+
+    start = perf_counter()
+    results = await asyncio.gather(*(timed(name) for name in selected))
+    result = {}
+    for name, (rows, elapsed) in zip(selected, results):
+        result[name] = rows
+        logger.info("Отчёт %s: %s строк за %.3f с", name, len(rows), elapsed)
+        if timings is not None:
+            timings[name] = elapsed
+    logger.info("Отчёты (%s шт.) выполнены за %.3f с", len(selected), perf_counter() - start)
+    return result
@@ -0,0 +1,123 @@
+"""
+Потоковое чтение JSON-массивов.
+
+Позволяет обходить элементы большого JSON-файла по одному, не загружая
+весь документ в память. Поддерживаются оба формата входных файлов:
+- массив верхнего уровня: `[ {...}, {...} ]`;
+- обёртка с ключом: `{"students": [ {...}, {...} ]}`.
+
+Функции:
+- `iter_json_items()` – генератор элементов массива из файла.
+"""
+import json
+import logging
+from typing import Any, Iterator, TextIO
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = " \t\n\r"
+_DECODER = json.JSONDecoder()
+
+
+class _Reader:
+    """Буфер поверх текстового файла: читает порциями и отбрасывает разобранное."""
+    def __init__(self, file: TextIO, chunk_size: int):
+        self._file = file
+        self._chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """Дочитывает следующую порцию; False, если файл закончился."""
+        if self.eof:
+            return False
+        chunk = self._file.read(self._chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        # отбрасываем уже разобранную часть буфера
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Возвращает следующий значимый символ (пропуская пробелы) или ''."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        """Проверяет и пропускает ожидаемый символ-разделитель."""
+        found = self.peek()
+        if found != char:
+            raise json.JSONDecodeError(f"Expecting '{char}'", self.buf, self.pos)
+        self.pos += 1
+
+    def value(self) -> Any:
+        """Декодирует одно JSON-значение, при необходимости дочитывая файл."""
+        self.peek()
+        while True:
+            try:
+                obj, end = _DECODER.raw_decode(self.buf, self.pos)
+                # значение в самом конце буфера могло быть обрезано (например, число)
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return obj
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.fill()
+
+
+def _iter_array(reader: _Reader) -> Iterator[Any]:
+    """Отдаёт элементы массива, начинающегося с текущей позиции."""
+    reader.expect("[")
+    if reader.peek() == "]":
+        reader.pos += 1
+        return
+    while True:
+        yield reader.value()
+        if reader.peek() == ",":
+            reader.pos += 1
+            continue
+        reader.expect("]")
+        return
+
+
+def iter_json_items(path: str, key: str, chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """
+    Генератор элементов JSON-массива из файла `path`.
+
+    Файл может быть массивом верхнего уровня или объектом, в котором массив
+    лежит под ключом `key`. Память ограничена размером порции чтения
+    и размером одного элемента.
+
+    Пример:
+        >>> for obj in iter_json_items("data/JSON/students.json", "students"):
+        ...     print(obj["id"])
+    """
+    with open(path, encoding="utf-8") as file:
+        reader = _Reader(file, chunk_size)
+        first = reader.peek()
+        if first == "[":
+            yield from _iter_array(reader)
+            return
+        if first == "{":
+            reader.pos += 1
+            while reader.peek() not in ("}", ""):
+                name = reader.value()
+                reader.expect(":")
+                if name == key and reader.peek() == "[":
+                    yield from _iter_array(reader)
+                    return
+                # значения остальных ключей пропускаем
+                reader.value()
+                if reader.peek() == ",":
+                    reader.pos += 1
+        logger.error("Ожидался список данных или ключ '%s' в %s", key, path)
+        raise ValueError(f"Ожидался список данных или ключ '{key}' в {path}")
@@ -0,0 +1,170 @@
+"""
+Общие части синхронной и асинхронной загрузки.
+
+Используются `load_service` и `async_load_service`: SQL и метаданные таблиц-
+приёмников (`TARGETS`), запись версии данных (`DATA_VERSION_BUMP`) — только
+если загрузка действительно изменила строки (`affected_rows`), разбиение
+на батчи и пакетная валидация элементов JSON.
+
+Функции:
+- `batched()` – создание итерируемых фрагментов для эффективной массовой вставки.
+- `iter_rows()` – валидация элементов и преобразование их в кортежи для вставки;
+  отбракованные записи уходят в `RejectSink` (счётчики по причинам, карантинный
+  NDJSON-файл, выборочный лог).
+"""
+from typing import Iterable, Iterator, NamedTuple, Sequence
+from app.domain.entities import decode_rooms, decode_students
+from app.services.reject_sink import RejectSink
+
+ROOMS_INSERT = """
+INSERT INTO rooms(id, name)
+VALUES (%s, %s)
+ON CONFLICT (id) DO NOTHING;
+"""
+
+STUDENTS_INSERT = """
+INSERT INTO students(id, name, sex, birthday, room_id)
+VALUES (%s,%s,%s,%s,%s)
+ON CONFLICT (id) DO NOTHING;
+"""
+
+ROOMS_UPSERT = """
+INSERT INTO rooms(id, name)
+VALUES (%s, %s)
+ON CONFLICT (id) DO UPDATE SET name = EXCLUDED.name;
+"""
+
+STUDENTS_UPSERT = """
+INSERT INTO students(id, name, sex, birthday, room_id)
+VALUES (%s,%s,%s,%s,%s)
+ON CONFLICT (id) DO UPDATE SET
+    name = EXCLUDED.name, sex = EXCLUDED.sex,
+    birthday = EXCLUDED.birthday, room_id = EXCLUDED.room_id;
+"""
+
+# staging-таблицы для режима COPY (pg_temp — чтобы не задеть обычную таблицу);
+# слияние и удаление — отдельные операторы, чтобы rowcount слияния был известен
+ROOMS_STAGE_CREATE = """
+DROP TABLE IF EXISTS pg_temp.rooms_stage;
+CREATE TEMP TABLE rooms_stage (LIKE rooms INCLUDING DEFAULTS);
+"""
+
+ROOMS_STAGE_MERGE = """
+INSERT INTO rooms(id, name)
+SELECT id, name FROM rooms_stage
+ON CONFLICT (id) DO NOTHING;
+"""
+
+ROOMS_STAGE_UPSERT = """
+INSERT INTO rooms(id, name)
+SELECT id, name FROM rooms_stage
+ON CONFLICT (id) DO UPDATE SET name = EXCLUDED.name;
+"""
+
+ROOMS_STAGE_DROP = """
+DROP TABLE pg_temp.rooms_stage;
+"""
+
+STUDENTS_STAGE_CREATE = """
+DROP TABLE IF EXISTS pg_temp.students_stage;
+CREATE TEMP TABLE students_stage (LIKE students INCLUDING DEFAULTS);
+"""
+
+STUDENTS_STAGE_MERGE = """
+INSERT INTO students(id, name, sex, birthday, room_id)
+SELECT id, name, sex, birthday, room_id FROM students_stage
+ON CONFLICT (id) DO NOTHING;
+"""
+
+STUDENTS_STAGE_UPSERT = """
+INSERT INTO students(id, name, sex, birthday, room_id)
+SELECT id, name, sex, birthday, room_id FROM students_stage
+ON CONFLICT (id) DO UPDATE SET
+    name = EXCLUDED.name, sex = EXCLUDED.sex,
+    birthday = EXCLUDED.birthday, room_id = EXCLUDED.room_id;
+"""
+
+STUDENTS_STAGE_DROP = """
+DROP TABLE pg_temp.students_stage;
+"""
+
+# версия данных (sql/schema_*.sql): новый токен при каждой загрузке, изменившей строки
+DATA_VERSION_BUMP = """
+INSERT INTO data_versions(kind, version, changed_at)
+VALUES (%s, %s, CURRENT_TIMESTAMP)
+ON CONFLICT (kind) DO UPDATE SET
+    version = EXCLUDED.version, changed_at = EXCLUDED.changed_at;
+"""
+
+LOAD_METHODS = ("insert", "copy")
+
+
+class Target(NamedTuple):
+    """SQL и метаданные таблицы-приёмника для одного типа данных."""
+    table: str
+    columns: tuple[str, ...]
+    insert: str
+    upsert: str
+    stage: str
+    stage_create: str
+    stage_merge: str
+    stage_upsert: str
+    stage_drop: str
+
+
+TARGETS = {
+    "rooms": Target("rooms", ("id", "name"), ROOMS_INSERT, ROOMS_UPSERT,
+                    "rooms_stage", ROOMS_STAGE_CREATE, ROOMS_STAGE_MERGE,
+                    ROOMS_STAGE_UPSERT, ROOMS_STAGE_DROP),
+    "students": Target("students", ("id", "name", "sex", "birthday", "room_id"),
+                       STUDENTS_INSERT, STUDENTS_UPSERT,
+                       "students_stage", STUDENTS_STAGE_CREATE, STUDENTS_STAGE_MERGE,
+                       STUDENTS_STAGE_UPSERT, STUDENTS_STAGE_DROP),
+}
+
+def affected_rows(rowcount: int, attempted: int) -> int:
+    """
+    Число изменённых строк по rowcount драйвера; если он неизвестен (-1),
+    считаем изменёнными все attempted строк.
+    """
+    return attempted if rowcount < 0 else rowcount
+
+def batched(iterable: Iterable, batch_size: int) -> Iterator[Sequence]:
+    """
+    Генератор, возвращающий последовательные фрагменты (батчи)
+    из iterable размером не более batch_size.
+
+    Пример:
+        >>> list(batched([1,2,3,4,5], 2))
+        [[1,2], [3,4], [5]]
+    """
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+# элементов в одном пакете декодера при валидации в основном процессе
+DECODE_BATCH = 1000
+
+# тип данных -> пакетный декодер JSON -> кортежи для вставки
+DECODERS = {"rooms": decode_rooms, "students": decode_students}
+
+def iter_rows(items: Iterable, type_of_data: str,
+              rejects: RejectSink | None = None) -> Iterator[tuple]:
+    """
+    Преобразует сырые JSON-объекты в кортежи для вставки пакетами по DECODE_BATCH,
+    пропуская невалидные записи (они передаются в rejects).
+    """
+    rejects = rejects if rejects is not None else RejectSink()
+    decode = DECODERS[type_of_data]
+    start = 1
+    for batch in batched(items, DECODE_BATCH):
+        rows, errors = decode(batch, start)
+        for i, obj, reason, error in errors:
+            rejects.reject(type_of_data, i, obj, reason, error)
+        start += len(batch)
+        yield from rows
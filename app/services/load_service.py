@@ -3,116 +3,563 @@
 
 Обрабатывает чтение JSON-файлов и пакетную вставку данных в базу данных.
 
+Поддерживаются два способа записи (параметр `method`):
+- "insert" – `executemany` пакетами по `batch_size` строк;
+- "copy" – поток `COPY ... FROM STDIN` во временную staging-таблицу
+  и затем `INSERT ... SELECT ... ON CONFLICT DO NOTHING` (та же идемпотентность);
+  только для PostgreSQL, для SQLite доступен "insert".
+
+JSON читается потоково (`iter_json_items`): каждый элемент сразу проходит
+валидацию и попадает в очередной батч, так что память не растёт с размером файла.
+
 Функции:
-- `_batched()` – создание итерируемых фрагментов для эффективной массовой вставки.
+- `_iter_rows_parallel()` – валидация (`load_common.iter_rows`) в пуле процессов
+  (workers > 1) с сохранением порядка.
+- `_write_rows_pipelined()` – запись в отдельном потоке через ограниченную очередь батчей.
 - `load_rooms()` – загрузка и вставка данных о комнатах.
 - `load_students()` – загрузка и вставка данных о студентах.
 
-Вся проверка данных делегируется `room_from_json` и `student_from_json`.
+Инкрементальный режим (`incremental=True`) хранит отпечаток файла и хеши строк
+в служебных таблицах (sql/load_meta_pg.sql): неизменённый файл пропускается
+целиком, из изменённого upsert-ом пишутся только новые и изменённые строки,
+а при `delete_missing=True` удаляются строки, исчезнувшие из файла
+(только загруженные из этого же файла; комнаты, в которых живут студенты,
+не удаляются — загрузка прерывается с ValueError).
+
+При `refresh_stats=True` загрузка студентов точечно обновляет сводную таблицу
+room_stats для комнат, которых коснулась, и запоминает версию студентов, по
+которой она построена (см. `schema_service.sync_room_stats`); если room_stats
+устарела ещё до загрузки, она перестраивается целиком.
+
+Загрузка, изменившая строки (по rowcount: повторная вставка тех же строк
+с ON CONFLICT DO NOTHING ничего не меняет), в той же транзакции записывает новый токен
+версии в таблицу data_versions; `data_version()` отдаёт текущую версию
+(по ней кэшируются отчёты, см. `query_service.run_reports`).
+
+По завершении загрузки в лог пишется пропускная способность стадий
+(parse / validate / write, записей в секунду) и пиковый RSS.
+
+Вся проверка данных делегируется пакетным декодерам `decode_rooms`
+и `decode_students` (те же правила, что у `parse_room` и `student_from_json`).
 """
-import json
+import hashlib
 import logging
-from typing import Iterable, Iterator, Sequence
-from app.domain.entities import room_from_json, student_from_json
-from app.ports.db import DB
+import os
+import queue
+import sys
+import threading
+import uuid
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from time import perf_counter
+from typing import Callable, Iterable, Iterator, Sequence
+from app import metrics
+from app.ports.db import DB, dialect_of
+from app.services import schema_service
+from app.services.json_stream import iter_json_items
+from app.services.load_common import (DATA_VERSION_BUMP, DECODERS, LOAD_METHODS, TARGETS,
+                                      affected_rows, batched, iter_rows)
+from app.services.reject_sink import RejectSink
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
 logger = logging.getLogger(__name__)
 
-ROOMS_INSERT = """
-INSERT INTO rooms(id, name)
-VALUES (%s, %s)
-ON CONFLICT (id) DO NOTHING;
+# служебные таблицы инкрементальной загрузки (sql/load_meta_pg.sql)
+LOAD_FILE_SELECT = """
+SELECT fingerprint FROM load_files WHERE kind = %s AND path = %s;
 """
 
-STUDENTS_INSERT = """
-INSERT INTO students(id, name, sex, birthday, room_id)
-VALUES (%s,%s,%s,%s,%s)
-ON CONFLICT (id) DO NOTHING;
+LOAD_FILE_UPSERT = """
+INSERT INTO load_files(kind, path, fingerprint, loaded_at)
+VALUES (%s, %s, %s, CURRENT_TIMESTAMP)
+ON CONFLICT (kind, path) DO UPDATE SET
+    fingerprint = EXCLUDED.fingerprint, loaded_at = EXCLUDED.loaded_at;
 """
 
-def _batched(iterable: Iterable, batch_size: int) -> Iterator[Sequence]:
-    """
-    Генератор, возвращающий последовательные фрагменты (батчи)
-    из iterable размером не более batch_size.
-
-    Пример:
-        >>> list(_batched([1,2,3,4,5], 2))
-        [[1,2], [3,4], [5]]
-    """
-    batch = []
-    for item in iterable:
-        batch.append(item)
-        if len(batch) == batch_size:
-            yield batch
-            batch = []
-    if batch:
-        yield batch
-
-def _load_run(db: DB, path: str, type_of_data: str, batch_size: int = 1000) -> int:
-    """Функция для унификации функций загрузки данных студентов и комнат"""        
-    # прочитать json (список)
-    with open(path, encoding="utf-8") as file:
-        read_json = json.load(file)
-    # Поддержим оба возможных формата: [ {...}, ... ] или {"students": [ {...}, ... ]}
-    if isinstance(read_json, dict) and type_of_data in read_json:
-        items = read_json[type_of_data]
-    elif isinstance(read_json, list):
-        items = read_json
-    else:
-        logger.error("Ожидался список данных или ключ '%s' в %s, получено: %s",
-                    type_of_data,
-                    path,
-                    type(read_json))
-        raise ValueError(
-            f"Ожидался список данных или ключ в {path}, получено: {type(read_json)}"
-        )
-    logger.info("Преобразовываем в %s и записываем в кортеж", type_of_data)
-    # преобразовать в Student + tuples (id, name, sex, birthday, room_id)
-    data_tuple: list[tuple] = []
-    for i, obj in enumerate(items, 1):
-        # пропускаем невалидные элементы (если вдруг встретится список или строка)
-        if not isinstance(obj, dict):
-            logger.error("Skipping invalid %s at index %s: %r (not a dict)",type_of_data,i,obj)
-            continue
+DATA_VERSIONS_EXISTS = {
+    "postgresql": "SELECT to_regclass('data_versions') IS NOT NULL AS present;",
+    "sqlite": "SELECT EXISTS (SELECT 1 FROM sqlite_master "
+              "WHERE type = 'table' AND name = 'data_versions') AS present;",
+}
+
+DATA_VERSIONS_SELECT = """
+SELECT kind, version FROM data_versions ORDER BY kind;
+"""
+
+ROW_HASHES_SELECT = """
+SELECT id, row_hash, path FROM load_row_hashes WHERE kind = %s;
+"""
+
+ROW_HASHES_UPSERT = """
+INSERT INTO load_row_hashes(kind, id, row_hash, path)
+VALUES (%s, %s, %s, %s)
+ON CONFLICT (kind, id) DO UPDATE SET row_hash = EXCLUDED.row_hash, path = EXCLUDED.path;
+"""
+
+# прежние комнаты студентов — для точечного обновления room_stats
+STUDENTS_OLD_ROOMS = """
+SELECT DISTINCT room_id FROM students WHERE id = ANY(%s);
+"""
+
+STUDENTS_STAGE_OLD_ROOMS = """
+SELECT DISTINCT s.room_id FROM students AS s JOIN students_stage AS st ON st.id = s.id;
+"""
+
+STUDENTS_DELETE_RETURNING = """
+DELETE FROM students WHERE id = ANY(%s) RETURNING room_id;
+"""
+
+# комнаты, на которые ещё ссылаются студенты (удалять их нельзя)
+ROOMS_REFERENCED = """
+SELECT DISTINCT room_id FROM students WHERE room_id = ANY(%s) ORDER BY room_id;
+"""
+
+ROW_HASHES_DELETE = """
+DELETE FROM load_row_hashes WHERE kind = %s AND id = ANY(%s);
+"""
+
+def _init_worker() -> None:
+    """Инициализатор процесса-валидатора: логированием ошибок занимается родитель."""
+    logging.disable(logging.CRITICAL)
+
+def _convert_chunk(chunk: Sequence, start: int,
+                   type_of_data: str) -> tuple[list[tuple], list[tuple]]:
+    """
+    Валидирует фрагмент элементов с номерами от start в процессе-воркере.
+    Возвращает (кортежи для вставки, [(index, obj, причина, сообщение), ...]).
+    """
+    return DECODERS[type_of_data](chunk, start)
+
+def _iter_rows_parallel(items: Iterable, type_of_data: str, workers: int, chunk_size: int,
+                        rejects: RejectSink | None = None) -> Iterator[tuple]:
+    """
+    Параллельная версия `iter_rows`: фрагменты по `chunk_size` элементов
+    валидируются в пуле из `workers` процессов. Порядок строк и записей в логе
+    совпадает с порядком во входном файле; в работе одновременно не более
+    2 * workers фрагментов, поэтому чтение файла остаётся потоковым.
+    """
+    rejects = rejects if rejects is not None else RejectSink()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        pending: deque = deque()
+        start = 1
+        for chunk in batched(items, chunk_size):
+            pending.append(pool.submit(_convert_chunk, chunk, start, type_of_data))
+            start += len(chunk)
+            if len(pending) >= 2 * workers:
+                yield from _drain_chunk(pending.popleft(), type_of_data, rejects)
+        while pending:
+            yield from _drain_chunk(pending.popleft(), type_of_data, rejects)
+
+def _drain_chunk(future: Future, type_of_data: str, rejects: RejectSink) -> Iterator[tuple]:
+    """Дожидается результата фрагмента, передаёт пропуски в rejects и отдаёт строки."""
+    rows, errors = future.result()
+    for i, obj, reason, error in errors:
+        rejects.reject(type_of_data, i, obj, reason, error)
+    yield from rows
+
+def _peak_rss_mb() -> float | None:
+    """Пиковый RSS процесса в МБ (None, если модуль resource недоступен)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux отдаёт килобайты, macOS — байты
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+class _RoomTracker:
+    """
+    Собирает id комнат, затронутых загрузкой студентов, чтобы обновить room_stats
+    только для них: комнаты из новых строк, а при upsert и удалении — ещё и
+    комнаты, где студенты числились до изменения.
+    """
+    def __init__(self, db: DB, upsert: bool):
+        self._db = db
+        self._upsert = upsert
+        self.touched: set[int] = set()
+
+    def _add(self, rows: list[dict]) -> None:
+        self.touched.update(row["room_id"] for row in rows)
+
+    def track(self, rows: Iterable[tuple]) -> Iterator[tuple]:
+        """Пропускает строки дальше, запоминая их комнаты."""
+        for row in rows:
+            self.touched.add(row[4])
+            yield row
+
+    def before_batch(self, batch: Sequence[tuple]) -> None:
+        """Перед записью батча (executemany): новые и прежние комнаты его студентов."""
+        self.touched.update(row[4] for row in batch)
+        if self._upsert:
+            self._add(self._db.query(STUDENTS_OLD_ROOMS, ([row[0] for row in batch],)))
+
+    def before_merge(self) -> None:
+        """Перед слиянием staging-таблицы (COPY): прежние комнаты обновляемых студентов."""
+        if self._upsert:
+            self._add(self._db.query(STUDENTS_STAGE_OLD_ROOMS))
+
+    def delete(self, ids: list[int]) -> None:
+        """Удаляет студентов, запоминая их комнаты."""
+        self._add(self._db.query(STUDENTS_DELETE_RETURNING, (ids,)))
+
+def _write_rows(db: DB, rows: Iterable[tuple], type_of_data: str,
+                batch_size: int, method: str, upsert: bool = False,
+                tracker: _RoomTracker | None = None) -> tuple[int, int]:
+    """
+    Записывает готовые кортежи в БД выбранным способом. Возвращает
+    (записано кортежей, изменено строк в таблице): при ON CONFLICT DO NOTHING
+    уже существующие строки не меняются.
+    upsert=True обновляет существующие строки вместо того, чтобы их пропускать.
+    tracker (только для студентов) собирает затронутые комнаты для room_stats.
+    """
+    target = TARGETS[type_of_data]
+    if method == "copy":
+        db.execute(target.stage_create)
+        source = tracker.track(rows) if tracker is not None else rows
+        with metrics.timer("load_copy_seconds", kind=type_of_data):
+            copied = db.copy_rows(target.stage, target.columns, source)
+        if tracker is not None:
+            tracker.before_merge()
+        merged = db.execute(target.stage_upsert if upsert else target.stage_merge)
+        db.execute(target.stage_drop)
+        return copied, affected_rows(merged, copied)
+    insert_sql = target.upsert if upsert else target.insert
+    inserted = changed = 0
+    for batch in batched(rows, batch_size):
+        if tracker is not None:
+            tracker.before_batch(batch)
+        with metrics.timer("load_batch_seconds", kind=type_of_data):
+            count = db.executemany(insert_sql, batch)
+        inserted += len(batch)
+        changed += affected_rows(count, len(batch))
+    return inserted, changed
+
+class _Meter:
+    """Итератор-обёртка для статистики: число элементов и время на их получение."""
+    def __init__(self, iterable: Iterable):
+        self._it = iter(iterable)
+        self.count = 0
+        self.elapsed = 0.0
+
+    def __iter__(self) -> "_Meter":
+        return self
+
+    def __next__(self):
+        start = perf_counter()
         try:
-            if type_of_data == "students":
-                # преобразуем JSON → объект Student
-                s = student_from_json(obj)
-                data_tuple.append((s.id, s.name, s.sex, s.birthday, s.room_id))
-            elif type_of_data == "rooms":
-                # преобразуем JSON → объект Room
-                r = room_from_json(obj)
-                data_tuple.append((r.id, r.name))
-        except Exception as e:  # pylint: disable=broad-exception-caught
-            logger.error("Пропущена запись %s: %s",obj, e)
-    logger.info("Вставляем в Бд пакетами")
-    # Вставляем в бд пакетами
-    inserted = 0
-    with db.transaction():
-        for batch in _batched(data_tuple, batch_size):
-            if type_of_data == "students":
-                db.executemany(STUDENTS_INSERT, batch)
-                inserted += len(batch)
-            elif type_of_data == "rooms":
-                db.executemany(ROOMS_INSERT, batch)
-                inserted += len(batch)
+            item = next(self._it)
+        finally:
+            self.elapsed += perf_counter() - start
+        self.count += 1
+        return item
+
+_STOP = object()
+
+def _write_rows_pipelined(db: DB, rows: Iterable[tuple], batch_size: int, queue_size: int,
+                          write: Callable[[Iterable[tuple]], int],
+                          name: str = "writer") -> tuple[int, float]:
+    """
+    Конвейерная запись: текущий поток читает и валидирует данные и кладёт батчи
+    в ограниченную очередь, поток-писатель выгружает их в БД функцией `write`
+    внутри собственной `db.transaction()` (транзакция пула привязана к потоку,
+    поэтому открывает её именно писатель).
+    Очередь на `queue_size` батчей даёт обратное давление: чтение не уходит
+    вперёд записи больше чем на queue_size * batch_size строк.
+    Возвращает (записано строк, время работы писателя без ожидания очереди).
+    """
+    batches: queue.Queue = queue.Queue(maxsize=queue_size)
+    state = {"inserted": 0, "elapsed": 0.0, "wait": 0.0, "error": None}
+
+    def from_queue() -> Iterator[tuple]:
+        while True:
+            start = perf_counter()
+            batch = batches.get()
+            state["wait"] += perf_counter() - start
+            if batch is _STOP:
+                return
+            yield from batch
+
+    def writer() -> None:
+        start = perf_counter()
+        try:
+            with db.transaction():
+                state["inserted"] = write(from_queue())
+                if state["error"] is not None:
+                    # чтение упало — откатываем то, что успели записать
+                    raise state["error"]
+        except BaseException as e:  # pylint: disable=broad-exception-caught
+            state["error"] = e
+        state["elapsed"] = perf_counter() - start
+
+    thread = threading.Thread(target=writer, name=name, daemon=True)
+    thread.start()
+
+    def put(item) -> bool:
+        # не блокируемся навсегда, если писатель упал и перестал разбирать очередь
+        while thread.is_alive():
+            try:
+                batches.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    try:
+        for batch in batched(rows, batch_size):
+            if not put(batch):
+                break
+    except BaseException as e:
+        state["error"] = e
+        raise
+    finally:
+        put(_STOP)
+        thread.join()
+    if state["error"] is not None:
+        raise state["error"]
+    return state["inserted"], state["elapsed"] - state["wait"]
+
+def _file_fingerprint(path: str) -> str:
+    """SHA-256 содержимого файла (читается блоками, без загрузки целиком)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _row_hash(row: tuple) -> int:
+    """64-битный хеш строки (знаковый — помещается в BIGINT)."""
+    digest = hashlib.blake2b(repr(row).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+class _Delta:
+    """
+    Фильтр инкрементальной загрузки: пропускает дальше только новые и изменённые
+    строки (по сохранённым хешам) и запоминает, какие id встретились в файле.
+    Повторный id внутри файла пропускается — как и при обычной загрузке,
+    побеждает первая запись.
+    known — {id: (хеш, файл-владелец)}: строка принадлежит файлу, который
+    загрузил её последним, и удаляется как пропавшая только из него.
+    """
+    def __init__(self, kind: str, known: dict[int, tuple[int, str]], path: str):
+        self.kind = kind
+        self.known = known
+        self.path = path
+        self.seen: set[int] = set()
+        self.hashes: list[tuple] = []
+        self.unchanged = 0
+
+    def filter(self, rows: Iterable[tuple]) -> Iterator[tuple]:
+        """Отдаёт строки, которые нужно записать (upsert)."""
+        for row in rows:
+            row_id = row[0]
+            if row_id in self.seen:
+                logger.warning("Повторный id %s в %s — запись пропущена", row_id, self.kind)
+                continue
+            self.seen.add(row_id)
+            row_hash = _row_hash(row)
+            stored = self.known.get(row_id)
+            if stored is not None and stored[0] == row_hash:
+                self.unchanged += 1
+                if stored[1] != self.path:
+                    # строка без изменений перешла в этот файл — меняем только владельца
+                    self.hashes.append((self.kind, row_id, row_hash, self.path))
+                continue
+            self.hashes.append((self.kind, row_id, row_hash, self.path))
+            yield row
+
+    def missing(self) -> list[int]:
+        """id, загруженные ранее из этого файла, но отсутствующие в нём сейчас."""
+        return [row_id for row_id, (_, path) in self.known.items()
+                if path == self.path and row_id not in self.seen]
+
+def _finish_delta(db: DB, delta: _Delta, batch_size: int, delete_missing: bool,
+                  tracker: _RoomTracker | None = None) -> int:
+    """Сохраняет хеши записанных строк и удаляет пропавшие; возвращает число удалённых."""
+    for batch in batched(delta.hashes, batch_size):
+        db.executemany(ROW_HASHES_UPSERT, batch)
+    if not delete_missing:
+        return 0
+    missing = delta.missing()
+    if missing and delta.kind == "rooms":
+        referenced = [row["room_id"] for row in db.query(ROOMS_REFERENCED, (missing,))]
+        if referenced:
+            raise ValueError(f"Нельзя удалить комнаты {referenced}, которых нет в файле: "
+                             "в них живут студенты — сначала загрузите студентов "
+                             "с --delete-missing или переселите их")
+    if missing:
+        if tracker is not None:
+            tracker.delete(missing)
+        else:
+            target = TARGETS[delta.kind]
+            db.execute(f"DELETE FROM {target.table} WHERE id = ANY(%s);", (missing,))
+        db.execute(ROW_HASHES_DELETE, (delta.kind, missing))
+    return len(missing)
+
+def _log_throughput(type_of_data: str, stage: str, count: int, elapsed: float) -> None:
+    """Логирует пропускную способность стадии загрузки."""
+    rate = count / elapsed if elapsed > 0 else float("inf")
+    logger.info("Стадия %s (%s): %s записей за %.3f с, %.0f записей/с",
+                stage, type_of_data, count, elapsed, rate)
+    metrics.inc("load_rows_total", count, kind=type_of_data, stage=stage)
+    if elapsed > 0:
+        metrics.set_gauge("load_rows_per_second", rate, kind=type_of_data, stage=stage)
+
+def _load_run(db: DB, path: str, type_of_data: str, batch_size: int = 1000,
+              method: str = "insert", workers: int = 0, chunk_size: int = 5000,
+              pipeline: bool = False, queue_size: int = 8,
+              incremental: bool = False, delete_missing: bool = False,
+              refresh_stats: bool = False, rejects: RejectSink | None = None) -> int:
+    """Функция для унификации функций загрузки данных студентов и комнат"""
+    if method not in LOAD_METHODS:
+        raise ValueError(f"Неизвестный способ загрузки '{method}', ожидался один из {LOAD_METHODS}")
+    if chunk_size < 1:
+        raise ValueError(f"Размер фрагмента должен быть положительным, получено: {chunk_size}")
+    if queue_size < 1:
+        raise ValueError(f"Размер очереди должен быть положительным, получено: {queue_size}")
+    if delete_missing and not incremental:
+        raise ValueError("delete_missing доступен только в инкрементальном режиме")
+    if method == "copy" and dialect_of(db) != "postgresql":
+        raise ValueError("Способ загрузки 'copy' (staging-таблица) доступен только в PostgreSQL")
+    if refresh_stats and dialect_of(db) != "postgresql":
+        raise ValueError("Обновление room_stats доступно только в PostgreSQL")
+    started = perf_counter()
+    delta = None
+    if incremental:
+        source_path = os.path.abspath(path)
+        fingerprint = _file_fingerprint(path)
+        stored = db.query(LOAD_FILE_SELECT, (type_of_data, source_path))
+        if stored and stored[0]["fingerprint"] == fingerprint:
+            logger.info("Файл %s не изменился — загрузка %s пропущена", path, type_of_data)
+            metrics.inc("load_files_skipped_total", kind=type_of_data)
+            return 0
+        known = {r["id"]: (r["row_hash"], r["path"])
+                 for r in db.query(ROW_HASHES_SELECT, (type_of_data,))}
+        delta = _Delta(type_of_data, known, source_path)
+        logger.info("Инкрементальная загрузка %s: известно строк %s", type_of_data, len(known))
+    # без внешнего приёмника отбраковки только считаются и выборочно логируются
+    own_rejects = rejects is None
+    rejects = RejectSink() if own_rejects else rejects
+    rejects.source = path
+    # элементы читаются из файла потоково и сразу превращаются в кортежи,
+    # поэтому память не зависит от размера файла
+    parsed = _Meter(iter_json_items(path, type_of_data))
+    logger.info("Преобразовываем в %s и записываем в БД по мере чтения", type_of_data)
+    if workers > 1:
+        logger.info("Валидация в %s процессах, фрагменты по %s", workers, chunk_size)
+        validated = _Meter(_iter_rows_parallel(parsed, type_of_data, workers, chunk_size,
+                                               rejects))
+    else:
+        validated = _Meter(iter_rows(parsed, type_of_data, rejects))
+    rows = delta.filter(validated) if delta is not None else validated
+    tracker = None
+    if refresh_stats and type_of_data == "students":
+        tracker = _RoomTracker(db, upsert=incremental)
+
+    def write(source: Iterable[tuple]) -> int:
+        # room_stats, устаревшая ещё до загрузки, перестраивается целиком
+        stats_stale = tracker is not None and schema_service.room_stats_stale(db)
+        written, changed = _write_rows(db, source, type_of_data, batch_size, method,
+                                       incremental, tracker)
+        if delta is not None:
+            deleted = _finish_delta(db, delta, batch_size, delete_missing, tracker)
+            db.execute(LOAD_FILE_UPSERT, (type_of_data, source_path, fingerprint))
+            logger.info("Инкрементально %s: записано %s, без изменений %s, удалено %s",
+                        type_of_data, written, delta.unchanged, deleted)
+            written += deleted
+            changed += deleted
+        if changed:
+            # в той же транзакции: версия меняется только вместе с данными
+            db.execute(DATA_VERSION_BUMP, (type_of_data, uuid.uuid4().hex))
+        if tracker is not None:
+            schema_service.sync_room_stats(db, None if stats_stale else tracker.touched)
+        return written
+
+    logger.info("Вставляем в БД (способ: %s, конвейер: %s)", method, pipeline)
+    try:
+        # Вставляем в бд пакетами или потоком COPY
+        if pipeline:
+            inserted, write_elapsed = _write_rows_pipelined(
+                db, rows, batch_size, queue_size, write, f"{type_of_data}-writer")
+        else:
+            start = perf_counter()
+            with db.transaction():
+                inserted = write(rows)
+            # без конвейера чтение и валидация идут внутри записи — вычитаем их
+            write_elapsed = perf_counter() - start - validated.elapsed
+    finally:
+        if own_rejects:
+            rejects.close()
+        else:
+            rejects.flush()
     # вернуть количество вставленных (или обработанных)
     logger.info("Загружено %s: %s", type_of_data, inserted)
+    _log_throughput(type_of_data, "parse", parsed.count, parsed.elapsed)
+    _log_throughput(type_of_data, "validate", validated.count, validated.elapsed - parsed.elapsed)
+    _log_throughput(type_of_data, "write", inserted, write_elapsed)
+    peak = _peak_rss_mb()
+    if peak is not None:
+        logger.info("Пиковое потребление памяти (RSS): %.1f МБ", peak)
+        metrics.set_gauge("process_peak_rss_bytes", round(peak * 1024 * 1024))
+    metrics.observe("load_seconds", perf_counter() - started, kind=type_of_data)
     return inserted
 
-def load_rooms(db: DB, rooms_path: str, batch_size: int = 1000) -> int:
+def load_rooms(db: DB, rooms_path: str, batch_size: int = 1000,
+               method: str = "insert", workers: int = 0, chunk_size: int = 5000,
+               pipeline: bool = False, queue_size: int = 8,
+               incremental: bool = False, delete_missing: bool = False,
+               rejects: RejectSink | None = None) -> int:
     """
-    Загружает данные о комнатах из JSON-файла и вставляет их в БД пакетами.
-    Возвращает количество успешно обработанных записей.
+    Загружает данные о комнатах из JSON-файла и вставляет их в БД пакетами
+    (method="insert") или через COPY (method="copy").
+    При workers > 1 валидация идёт параллельно в пуле процессов фрагментами по chunk_size.
+    При pipeline=True запись в БД идёт в отдельном потоке через очередь на queue_size батчей.
+    При incremental=True пишутся только новые/изменённые строки (upsert), неизменённый
+    файл пропускается; delete_missing=True удаляет строки, которых больше нет в файле.
+    Некорректные записи передаются в rejects (по умолчанию только счётчики и выборочный лог).
+    Возвращает количество успешно обработанных записей
+    (в инкрементальном режиме — записанных и удалённых).
     """
     logger.info("Запущена функция load_rooms")
     logger.info("Читаем файл комнат")
-    return _load_run(db, rooms_path, "rooms", batch_size)
+    return _load_run(db, rooms_path, "rooms", batch_size, method, workers, chunk_size,
+                     pipeline, queue_size, incremental, delete_missing, rejects=rejects)
 
-def load_students(db: DB, students_path: str, batch_size: int = 1000) -> int:
+def load_students(db: DB, students_path: str, batch_size: int = 1000,
+                  method: str = "insert", workers: int = 0, chunk_size: int = 5000,
+                  pipeline: bool = False, queue_size: int = 8,
+                  incremental: bool = False, delete_missing: bool = False,
+                  refresh_stats: bool = False, rejects: RejectSink | None = None) -> int:
     """
-    Загружает данные о студентах из JSON-файла и вставляет их в БД пакетами.
-    Возвращает количество успешно обработанных записей.
+    Загружает данные о студентах из JSON-файла и вставляет их в БД пакетами
+    (method="insert") или через COPY (method="copy").
+    При workers > 1 валидация идёт параллельно в пуле процессов фрагментами по chunk_size.
+    При pipeline=True запись в БД идёт в отдельном потоке через очередь на queue_size батчей.
+    При incremental=True пишутся только новые/изменённые строки (upsert), неизменённый
+    файл пропускается; delete_missing=True удаляет строки, которых больше нет в файле.
+    При refresh_stats=True в той же транзакции обновляется room_stats
+    для затронутых комнат или целиком, если она устарела
+    (таблица создаётся `schema_service.ensure_room_stats`).
+    Некорректные записи передаются в rejects (по умолчанию только счётчики и выборочный лог).
+    Возвращает количество успешно обработанных записей
+    (в инкрементальном режиме — записанных и удалённых).
     """
     logger.info("Запущена функция load_students")
     logger.info("Читаем файл студентов")
-    return _load_run(db, students_path, "students", batch_size)
+    return _load_run(db, students_path, "students", batch_size, method, workers, chunk_size,
+                     pipeline, queue_size, incremental, delete_missing, refresh_stats,
+                     rejects)
+
+def data_version(db: DB) -> str | None:
+    """
+    Текущая версия данных rooms/students — строка из токенов, которые загрузка
+    меняет при каждой записи. None — таблицы data_versions нет или загрузок
+    ещё не было (кэшировать отчёты не по чему). Изменения данных в обход
+    `load_service` версию не меняют.
+    """
+    present = db.query(DATA_VERSIONS_EXISTS[dialect_of(db)])
+    if not present or not present[0].get("present"):
+        return None
+    rows = db.query(DATA_VERSIONS_SELECT)
+    if not rows:
+        return None
+    return ";".join(f"{row['kind']}={row['version']}" for row in rows)
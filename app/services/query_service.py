@@ -9,10 +9,43 @@
 - `top5_young_avg()` – 5 комнат с самым низким средним возрастом.
 - `top5_age_spread()` – 5 комнат с самой большой разницей в возрасте.
 - `mixed_gender_rooms()` – комнаты со студентами обоих полов.
+
+`run_reports()` – выполняет набор отчётов параллельно в пуле потоков и возвращает
+словарь {раздел: строки} той же формы, что собирает CLI. С `PooledPostgresDB`
+каждый запрос идёт на своём соединении; ошибки изолированы `_query_run`.
+
+Каждый отчёт принимает `from_stats=True`, чтобы читать данные из сводной
+таблицы room_stats (O(комнат)) вместо агрегирования всей таблицы students.
+
+Вместо `DB` можно передать `ReportSource` (например, `VectorReportEngine`):
+отчёты будут посчитаны им по имени, с той же формой результата и той же
+изоляцией ошибок.
+
+`combined_reports()` – все четыре отчёта из одного прохода по таблицам
+(`SQL_ROOM_AGGREGATE`); результат совпадает с отдельными запросами.
+
+Тексты запросов выбираются по диалекту БД (`REPORT_SQL`, `dialect_of`):
+для SQLite возраст считается через strftime с той же семантикой, что AGE().
+
+Кэш результатов: `run_reports(..., cache=...)` (порт `ReportCache`) повторно
+выполняет только отчёты, для которых в кэше нет записи под текущей версией
+данных; неудачные отчёты (`_query_try` вернул успех False) не кэшируются.
+
+`rooms_counts_iter()` – потоковый вариант `rooms_counts()` (строк столько же,
+сколько комнат): строки читаются серверным курсором через `db.iter_query`
+и могут передаваться экспортерам без материализации списка.
 """
 import logging
+from datetime import date
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from typing import Callable, Iterable, Iterator
 from psycopg2 import ProgrammingError
-from app.ports.db import DB
+from app import metrics
+from app.ports.cache import ReportCache
+from app.ports.db import DB, dialect_of
+from app.ports.reports import ReportSource
+from app.services import load_service, schema_service
 
 logger = logging.getLogger(__name__)
 
@@ -29,7 +62,7 @@ SELECT r.id, r.name,
 FROM rooms AS r
 JOIN students AS s ON r.id = s.room_id
 GROUP BY r.id, r.name
-ORDER BY avg_age_years ASC
+ORDER BY avg_age_years ASC, r.id
 LIMIT 5;
 """
 
@@ -40,7 +73,7 @@ SELECT r.id, r.name,
 FROM rooms AS r
 JOIN students AS s ON r.id = s.room_id
 GROUP BY r.id, r.name
-ORDER BY diff_age_years DESC
+ORDER BY diff_age_years DESC, r.id
 LIMIT 5;
 """
 
@@ -53,49 +86,371 @@ HAVING COUNT(DISTINCT s.sex) >= 2
 ORDER BY r.id;
 """
 
-def _query_run(db : DB, sql: str, name: str)-> list[dict]:
-    """Функция унификации запросов"""
+# Один проход по rooms LEFT JOIN students: все агрегаты, из которых выводятся
+# четыре отчёта. Выражения возрастов совпадают с отдельными запросами.
+SQL_ROOM_AGGREGATE = """
+SELECT r.id, r.name,
+       COUNT(s.room_id) AS count,
+       MIN(s.birthday) AS min_birthday,
+       MAX(s.birthday) AS max_birthday,
+       ROUND(EXTRACT(YEAR FROM AVG(AGE(s.birthday)))) AS avg_age_years,
+       EXTRACT(YEAR FROM MAX(AGE(s.birthday))) -
+       EXTRACT(YEAR FROM MIN(AGE(s.birthday))) AS diff_age_years,
+       COUNT(DISTINCT s.sex) AS sex_count
+FROM rooms AS r LEFT JOIN students AS s ON r.id = s.room_id
+GROUP BY r.id
+ORDER BY r.id;
+"""
+
+# Отчёты по сводной таблице room_stats (schema_service.ensure_room_stats):
+# O(комнат) вместо O(студентов). Средний возраст считается по среднему дню
+# рождения (сумма эпох / число), поэтому может отличаться от AVG(AGE(...))
+# на границе года; остальные отчёты совпадают с запросами по students.
+SQL_STATS_ROOMS_COUNT = """
+SELECT r.id, r.name, COALESCE(st.student_count, 0) AS count
+FROM rooms AS r LEFT JOIN room_stats AS st ON st.room_id = r.id
+ORDER BY r.id;
+"""
+
+SQL_STATS_TOP5_YOUNG_AVG = """
+SELECT r.id, r.name,
+       ROUND(EXTRACT(YEAR FROM AGE(
+           DATE '1970-01-01' + ROUND(st.birthday_epoch_sum::numeric / st.student_count)::int
+       ))) AS avg_age_years
+FROM rooms AS r
+JOIN room_stats AS st ON st.room_id = r.id
+WHERE st.student_count > 0
+ORDER BY avg_age_years ASC, r.id
+LIMIT 5;
+"""
+
+SQL_STATS_TOP5_AGE_SPREAD = """
+SELECT r.id, r.name,
+       EXTRACT(YEAR FROM AGE(st.min_birthday)) -
+       EXTRACT(YEAR FROM AGE(st.max_birthday)) AS diff_age_years
+FROM rooms AS r
+JOIN room_stats AS st ON st.room_id = r.id
+WHERE st.student_count > 0
+ORDER BY diff_age_years DESC, r.id
+LIMIT 5;
+"""
+
+SQL_STATS_MIXED_GENDER = """
+SELECT r.id, r.name
+FROM rooms AS r
+JOIN room_stats AS st ON st.room_id = r.id
+WHERE st.male_count > 0 AND st.female_count > 0
+ORDER BY r.id;
+"""
+
+# SQLite: нет AGE/EXTRACT, поэтому возраст в полных месяцах считается через
+# strftime так же, как months-часть AGE(s.birthday) в PostgreSQL (день месяца
+# учитывается); годы — целочисленное деление месяцев на 12.
+_SQLITE_TODAY = "'now', 'localtime'"
+_SQLITE_AGE_MONTHS = f"""(
+    (CAST(strftime('%Y', {_SQLITE_TODAY}) AS INTEGER)
+     - CAST(strftime('%Y', s.birthday) AS INTEGER)) * 12
+    + CAST(strftime('%m', {_SQLITE_TODAY}) AS INTEGER)
+    - CAST(strftime('%m', s.birthday) AS INTEGER)
+    - (CAST(strftime('%d', {_SQLITE_TODAY}) AS INTEGER)
+       < CAST(strftime('%d', s.birthday) AS INTEGER)))"""
+
+SQLITE_ROOMS_COUNT = """
+SELECT r.id, r.name, COUNT(s.room_id) AS count
+FROM rooms AS r LEFT JOIN students AS s ON r.id = s.room_id
+GROUP BY r.id
+ORDER BY r.id;
+"""
+
+SQLITE_TOP5_YOUNG_AVG = f"""
+SELECT r.id, r.name,
+       SUM({_SQLITE_AGE_MONTHS}) / COUNT(*) / 12 AS avg_age_years
+FROM rooms AS r
+JOIN students AS s ON r.id = s.room_id
+GROUP BY r.id, r.name
+ORDER BY avg_age_years ASC, r.id
+LIMIT 5;
+"""
+
+SQLITE_TOP5_AGE_SPREAD = f"""
+SELECT r.id, r.name,
+       MAX({_SQLITE_AGE_MONTHS}) / 12 - MIN({_SQLITE_AGE_MONTHS}) / 12 AS diff_age_years
+FROM rooms AS r
+JOIN students AS s ON r.id = s.room_id
+GROUP BY r.id, r.name
+ORDER BY diff_age_years DESC, r.id
+LIMIT 5;
+"""
+
+SQLITE_ROOM_AGGREGATE = f"""
+SELECT r.id, r.name,
+       COUNT(s.room_id) AS count,
+       MIN(s.birthday) AS min_birthday,
+       MAX(s.birthday) AS max_birthday,
+       SUM({_SQLITE_AGE_MONTHS}) / COUNT(s.room_id) / 12 AS avg_age_years,
+       MAX({_SQLITE_AGE_MONTHS}) / 12 - MIN({_SQLITE_AGE_MONTHS}) / 12 AS diff_age_years,
+       COUNT(DISTINCT s.sex) AS sex_count
+FROM rooms AS r LEFT JOIN students AS s ON r.id = s.room_id
+GROUP BY r.id
+ORDER BY r.id;
+"""
+
+# диалект -> {(отчёт, from_stats): SQL}; room_stats есть только в PostgreSQL
+REPORT_SQL: dict[str, dict[tuple[str, bool], str]] = {
+    "postgresql": {
+        ("rooms_counts", False): SQL_ROOMS_COUNT,
+        ("top5_young_avg", False): SQL_TOP5_YOUNG_AVG,
+        ("top5_age_spread", False): SQL_TOP5_AGE_SPREAD,
+        ("mixed_gender_rooms", False): SQL_MIXED_GENDER,
+        ("combined_reports", False): SQL_ROOM_AGGREGATE,
+        ("rooms_counts", True): SQL_STATS_ROOMS_COUNT,
+        ("top5_young_avg", True): SQL_STATS_TOP5_YOUNG_AVG,
+        ("top5_age_spread", True): SQL_STATS_TOP5_AGE_SPREAD,
+        ("mixed_gender_rooms", True): SQL_STATS_MIXED_GENDER,
+    },
+    "sqlite": {
+        ("rooms_counts", False): SQLITE_ROOMS_COUNT,
+        ("top5_young_avg", False): SQLITE_TOP5_YOUNG_AVG,
+        ("top5_age_spread", False): SQLITE_TOP5_AGE_SPREAD,
+        ("mixed_gender_rooms", False): SQL_MIXED_GENDER,
+        ("combined_reports", False): SQLITE_ROOM_AGGREGATE,
+    },
+}
+
+
+def _report_sql(db: DB, name: str, from_stats: bool = False) -> str:
+    """SQL отчёта name для диалекта db (см. REPORT_SQL)."""
+    dialect = dialect_of(db)
     try:
-        result = db.query(sql)
-        return result
+        return REPORT_SQL[dialect][(name, from_stats)]
+    except KeyError:
+        source = "room_stats" if from_stats else "students"
+        raise ValueError(
+            f"Отчёт {name} по {source} не поддерживается диалектом {dialect}") from None
+
+def _query_try(db: DB, sql: str, name: str) -> tuple[list[dict], bool]:
+    """Выполняет отчёт; возвращает (строки, успех). При ошибке — ([], False)."""
+    try:
+        with metrics.timer("report_seconds", report=name):
+            # не-SQL источники отчётов (ReportSource) считают отчёт по имени
+            if isinstance(db, ReportSource):
+                result = db.report(name)
+            else:
+                result = db.query(sql)
+        metrics.set_gauge("report_rows", len(result), report=name)
+        return result, True
     except ProgrammingError as e:
         # Ошибка в синтаксисе SQL или структура таблицы не совпадает
         logger.error("Ошибка SQL-синтаксиса в %s: %s", name, e)
-        return []
+        metrics.inc("report_errors_total", report=name)
+        return [], False
 
     except (TypeError, ValueError) as e:
         # Ошибки преобразования данных, если что-то не так с типами
         logger.error("Ошибка типов данных при обработке %s: %s", name, e)
-        return []
+        metrics.inc("report_errors_total", report=name)
+        return [], False
 
     except Exception as e:  # pylint: disable=broad-exception-caught
         # Непредвиденные ошибки — логируем, но не падаем
         logger.exception("Неизвестная ошибка при %s: %s", name, e)
-        return []
+        metrics.inc("report_errors_total", report=name)
+        return [], False
+
+def _query_run(db : DB, sql: str, name: str)-> list[dict]:
+    """Функция унификации запросов"""
+    return _query_try(db, sql, name)[0]
+
+def _report_try(db: DB, name: str, description: str,
+                from_stats: bool = False) -> tuple[list[dict], bool]:
+    """Отчёт name по его SQL для диалекта db; возвращает (строки, успех)."""
+    logger.info("Выполняется запрос: %s;", description)
+    return _query_try(db, _report_sql(db, name, from_stats), name)
+
+# имя отчёта -> описание для лога
+_DESCRIPTIONS = {
+    "rooms_counts": "Список комнат и количество студентов в каждой из них",
+    "top5_young_avg": "5 комнат с наименьшим средним возрастом студентов",
+    "top5_age_spread": "5 комнат с наибольшей разницей в возрасте студентов",
+    "mixed_gender_rooms": "Список комнат, где проживают студенты разного пола",
+    "combined_reports": "Сводные агрегаты по комнатам для всех отчётов",
+}
 
-def rooms_counts(db: DB) -> list[dict]:
+def rooms_counts(db: DB, from_stats: bool = False) -> list[dict]:
     """Функция для выполнения запроса на список комнат и количество студентов в каждой из них"""
+    return _report_try(db, "rooms_counts", _DESCRIPTIONS["rooms_counts"], from_stats)[0]
+
+
+def rooms_counts_iter(db: DB, chunk_size: int = 1000) -> Iterator[dict]:
+    """
+    Потоковый вариант rooms_counts: строки подгружаются порциями по chunk_size.
+    Ошибки БД здесь не подавляются — они возникают во время итерации.
+    """
     logger.info(
-        "Выполняется запрос: Список комнат и количество студентов в каждой из них;")
-    return _query_run(db, SQL_ROOMS_COUNT, "rooms_counts")
+        "Выполняется потоковый запрос: Список комнат и количество студентов в каждой из них;")
+    return db.iter_query(_report_sql(db, "rooms_counts"), chunk_size=chunk_size)
 
 
-def top5_young_avg(db: DB) -> list[dict]:
+def top5_young_avg(db: DB, from_stats: bool = False) -> list[dict]:
     """Функция для выполнения запроса на 5 комнат с наименьшим срденим возрастом студентов"""
-    logger.info(
-        "Выполняется запрос: 5 комнат с наименьшим средним возрастом студентов;")
-    return _query_run(db, SQL_TOP5_YOUNG_AVG, "top5_young_avg")
+    return _report_try(db, "top5_young_avg", _DESCRIPTIONS["top5_young_avg"], from_stats)[0]
 
 
-def top5_age_spread(db: DB) -> list[dict]:
+def top5_age_spread(db: DB, from_stats: bool = False) -> list[dict]:
     """Функция для выполнения запроса 5 комнат с наибольшей разницей в возрасте студентов"""
-    logger.info(
-        "Выполняется запрос: 5 комнат с наибольшей разницей в возрасте студентов;")
-    return _query_run(db, SQL_TOP5_AGE_SPREAD, "top5_age_spread")
+    return _report_try(db, "top5_age_spread", _DESCRIPTIONS["top5_age_spread"], from_stats)[0]
 
 
-def mixed_gender_rooms(db: DB) -> list[dict]:
+def mixed_gender_rooms(db: DB, from_stats: bool = False) -> list[dict]:
     """Функция для выполнения запроса Список комнат, где проживают студенты разного пола;"""
-    logger.info(
-        "Выполняется запрос: Список комнат, где проживают студенты разного пола;")
-    return _query_run(db, SQL_MIXED_GENDER, "mixed_gender_rooms")
+    return _report_try(db, "mixed_gender_rooms", _DESCRIPTIONS["mixed_gender_rooms"],
+                       from_stats)[0]
+
+
+# раздел результата -> функция отчёта (порядок = порядок разделов в выгрузке)
+REPORTS: dict[str, Callable[..., list[dict]]] = {
+    "count_student_in_rooms": rooms_counts,
+    "top5_young_avg": top5_young_avg,
+    "top5_age_spread": top5_age_spread,
+    "rooms_with_mixed_gender": mixed_gender_rooms,
+}
+
+# раздел результата -> имя отчёта (ключ REPORT_SQL и ReportSource.report)
+_REPORT_NAMES = {section: report.__name__ for section, report in REPORTS.items()}
+
+
+def reports_from_aggregate(aggregate: list[dict]) -> dict[str, list[dict]]:
+    """
+    Выводит четыре отчёта из построчных агрегатов комнат (SQL_ROOM_AGGREGATE),
+    повторяя сортировку и ограничения отдельных запросов.
+    """
+    # отдельные запросы (кроме rooms_counts) используют INNER JOIN — пустые комнаты не входят
+    occupied = [row for row in aggregate if row["count"]]
+    young = sorted(occupied, key=lambda row: (row["avg_age_years"], row["id"]))[:5]
+    spread = sorted(occupied, key=lambda row: (-row["diff_age_years"], row["id"]))[:5]
+    return {
+        "count_student_in_rooms": [
+            {"id": row["id"], "name": row["name"], "count": row["count"]} for row in aggregate],
+        "top5_young_avg": [
+            {"id": row["id"], "name": row["name"], "avg_age_years": row["avg_age_years"]}
+            for row in young],
+        "top5_age_spread": [
+            {"id": row["id"], "name": row["name"], "diff_age_years": row["diff_age_years"]}
+            for row in spread],
+        "rooms_with_mixed_gender": [
+            {"id": row["id"], "name": row["name"]} for row in occupied if row["sex_count"] >= 2],
+    }
+
+
+def _combined_try(db: DB) -> tuple[dict[str, list[dict]], bool]:
+    aggregate, ok = _report_try(db, "combined_reports", _DESCRIPTIONS["combined_reports"])
+    return reports_from_aggregate(aggregate), ok
+
+
+def combined_reports(db: DB) -> dict[str, list[dict]]:
+    """Функция для выполнения всех отчётов одним проходом по rooms/students"""
+    return _combined_try(db)[0]
+
+
+# отчёты по возрасту зависят от текущей даты (AGE / 'now'): в их ключе кэша ещё и день
+_DATE_DEPENDENT = frozenset({"top5_young_avg", "top5_age_spread"})
+
+
+def _cache_key(section: str, from_stats: bool, version: str, today: str) -> str:
+    key = f"{section}|{'room_stats' if from_stats else 'tables'}|{version}"
+    return f"{key}|{today}" if section in _DATE_DEPENDENT else key
+
+
+def run_reports(db: DB, names: Iterable[str] | None = None, max_workers: int | None = None,
+                timings: dict[str, float] | None = None,
+                combined: bool = False, from_stats: bool = False,
+                cache: ReportCache | None = None) -> dict[str, list[dict]]:
+    """
+    Выполняет отчёты `names` (по умолчанию все из REPORTS) параллельно.
+
+    Возвращает {раздел: строки} в порядке `names`. Ошибка одного отчёта
+    не влияет на остальные — он вернёт [] (см. `_query_run`). Время выполнения
+    каждого запроса пишется в лог и, если передан словарь `timings`, в него.
+    Для реального параллелизма нужен `PooledPostgresDB`: обычный `PostgresDB`
+    выполняет запросы одного соединения по очереди.
+    При combined=True вместо отдельных запросов выполняется один сводный
+    (`combined_reports`), время записывается под ключом "combined_reports".
+    При from_stats=True отчёты читаются из сводной таблицы room_stats;
+    если её нет, бросается ValueError.
+
+    С cache разделы берутся из кэша, пока не изменилась версия данных
+    (`load_service.data_version`), а отчёты по возрасту — ещё и пока не
+    сменился день; выполняются только недостающие, в кэш
+    попадают лишь успешно выполненные. Без версии (нет таблицы data_versions
+    или загрузок ещё не было) кэш не используется.
+    """
+    selected = list(REPORTS) if names is None else list(names)
+    unknown = [name for name in selected if name not in REPORTS]
+    if unknown:
+        raise ValueError(f"Неизвестные отчёты: {unknown}, доступны: {list(REPORTS)}")
+    if combined and from_stats:
+        raise ValueError("combined и from_stats взаимоисключающие")
+    if from_stats and not isinstance(db, ReportSource):
+        # без таблицы каждый отчёт упал бы в _query_try и вернул бы []
+        schema_service.require_room_stats(db)
+    version = None
+    if cache is not None and not isinstance(db, ReportSource):
+        version = load_service.data_version(db)
+    today = date.today().isoformat()
+    result: dict[str, list[dict]] = {}
+    if version is not None:
+        for name in selected:
+            rows = cache.get(_cache_key(name, from_stats, version, today))
+            if rows is not None:
+                result[name] = rows
+                metrics.inc("report_cache_hits_total", report=name)
+        if result:
+            logger.info("Из кэша (версия данных %s): %s", version, list(result))
+    pending = [name for name in selected if name not in result]
+    if version is not None:
+        for name in pending:
+            metrics.inc("report_cache_misses_total", report=name)
+    succeeded = _execute_reports(db, pending, max_workers, timings, combined, from_stats, result)
+    if version is not None:
+        for name in succeeded:
+            cache.set(_cache_key(name, from_stats, version, today), result[name])
+    return {name: result[name] for name in selected}
+
+
+def _execute_reports(db: DB, selected: list[str], max_workers: int | None,
+                     timings: dict[str, float] | None, combined: bool, from_stats: bool,
+                     result: dict[str, list[dict]]) -> list[str]:
+    """Выполняет отчёты selected в result; возвращает разделы, выполненные без ошибок."""
+    if not selected:
+        return []
+    if combined:
+        start = perf_counter()
+        sections, ok = _combined_try(db)
+        elapsed = perf_counter() - start
+        logger.info("Сводный отчёт выполнен за %.3f с", elapsed)
+        if timings is not None:
+            timings["combined_reports"] = elapsed
+        for name in selected:
+            result[name] = sections[name]
+        return selected if ok else []
+
+    def timed(name: str) -> tuple[list[dict], bool, float]:
+        start = perf_counter()
+        report = _REPORT_NAMES[name]
+        rows, ok = _report_try(db, report, _DESCRIPTIONS[report], from_stats)
+        return rows, ok, perf_counter() - start
+
+    start = perf_counter()
+    succeeded = []
+    workers = max_workers or len(selected) or 1
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report") as pool:
+        futures = {name: pool.submit(timed, name) for name in selected}
+        for name, future in futures.items():
+            result[name], ok, elapsed = future.result()
+            if ok:
+                succeeded.append(name)
+            logger.info("Отчёт %s: %s строк за %.3f с", name, len(result[name]), elapsed)
+            if timings is not None:
+                timings[name] = elapsed
+    logger.info("Отчёты (%s шт.) выполнены за %.3f с", len(selected), perf_counter() - start)
+    return succeeded
@@ -0,0 +1,145 @@
+"""
+Приёмник отбракованных записей (карантин).
+
+Некорректные записи входного JSON не логируются целиком каждая: на грязных
+выгрузках с миллионами плохих строк форматирование и запись лога занимали
+большую часть времени загрузки. Вместо этого `RejectSink`:
+- считает отбраковки по кодам причин (`counts`, метрика `load_rejected_total`);
+- при заданном `path` пишет каждую запись в карантинный NDJSON-файл — строка
+  {"kind", "source", "index", "reason", "error", "record"}, где record — исходный
+  элемент JSON; строки копятся в буфере и пишутся пачками по `buffer_size`;
+- логирует только первые `log_sample` записей каждой причины, дальше —
+  не чаще раза в `log_interval` секунд сводку по пропущенным.
+
+Карантинный файл открывается при первой отбраковке и дописывается
+(одним приёмником можно пользоваться для нескольких загрузок, например
+в режиме наблюдения за каталогом). `close()` сбрасывает буфер и пишет
+итог в лог.
+
+Внутри `with rejects.transaction():` отбраковки откладываются и учитываются
+только при успешном выходе из блока; при исключении они отбрасываются —
+откатанная загрузка, которую затем повторяют, не посчитает их дважды.
+
+Пример:
+    with RejectSink("data/rejects.ndjson") as rejects:
+        load_service.load_rooms(db, rooms_path, rejects=rejects)
+        load_service.load_students(db, students_path, rejects=rejects)
+"""
+import json
+import logging
+import os
+from collections import Counter
+from contextlib import contextmanager
+from typing import Iterator
+from time import monotonic
+from app import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class RejectSink:
+    """Учитывает отбракованные записи и пишет их в карантинный NDJSON-файл."""
+
+    def __init__(self, path: str | None = None, buffer_size: int = 1000,
+                 log_sample: int = 10, log_interval: float = 10.0):
+        if buffer_size < 1:
+            raise ValueError(f"Размер буфера должен быть положительным, получено: {buffer_size}")
+        self.path = path
+        self.buffer_size = buffer_size
+        self.log_sample = log_sample
+        self.log_interval = log_interval
+        self.source: str | None = None  # текущий входной файл, пишется в карантин
+        self.counts: Counter = Counter()
+        self._buffer: list[str] = []
+        self._file = None
+        self._suppressed = 0
+        self._next_summary = monotonic() + log_interval
+        self._reported = 0  # итог, уже записанный в лог при close()
+        self._pending: list[tuple] | None = None  # отложенные в transaction()
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def reject(self, kind: str, index: int, record, reason: str, error: str) -> None:
+        """Учитывает отбракованный элемент index входного файла с причиной reason."""
+        if self._pending is not None:
+            self._pending.append((self.source, kind, index, record, reason, error))
+            return
+        self._record(self.source, kind, index, record, reason, error)
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Откладывает отбраковки до успешного завершения блока; при исключении
+        они отбрасываются. Вложенный вызов присоединяется к внешнему.
+        """
+        if self._pending is not None:
+            yield
+            return
+        self._pending = []
+        try:
+            yield
+        except BaseException:
+            self._pending = None
+            raise
+        pending, self._pending = self._pending, None
+        for item in pending:
+            self._record(*item)
+
+    def _record(self, source: str | None, kind: str, index: int, record,
+                reason: str, error: str) -> None:
+        self.counts[reason] += 1
+        metrics.inc("load_rejected_total", kind=kind, reason=reason)
+        if self.path is not None:
+            self._buffer.append(json.dumps(
+                {"kind": kind, "source": source, "index": index, "reason": reason,
+                 "error": error, "record": record},
+                ensure_ascii=False, default=str) + "\n")
+            if len(self._buffer) >= self.buffer_size:
+                self.flush()
+        seen = self.counts[reason]
+        if seen <= self.log_sample:
+            logger.error("Пропущена запись %s №%s (%s): %s%s", kind, index, reason, error,
+                         " — дальше по этой причине только сводка"
+                         if seen == self.log_sample else "")
+            return
+        self._suppressed += 1
+        now = monotonic()
+        if now >= self._next_summary:
+            self._next_summary = now + self.log_interval
+            logger.warning("Пропущено ещё %s некорректных записей, всего по причинам: %s",
+                           self._suppressed, dict(self.counts))
+            self._suppressed = 0
+
+    def flush(self) -> None:
+        """Дописывает накопленные записи в карантинный файл."""
+        if not self._buffer:
+            return
+        if self._file is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")  # pylint: disable=consider-using-with
+        self._file.write("".join(self._buffer))
+        self._file.flush()
+        self._buffer.clear()
+
+    def close(self) -> None:
+        """Сбрасывает буфер, закрывает файл и пишет итог в лог (повторный вызов безопасен)."""
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self.total != self._reported:
+            logger.warning("Всего пропущено некорректных записей: %s %s%s", self.total,
+                           dict(self.counts),
+                           f", карантин: {self.path}" if self.path is not None else "")
+            self._reported = self.total
+            self._suppressed = 0
+
+    def __enter__(self) -> "RejectSink":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
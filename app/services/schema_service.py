@@ -7,13 +7,136 @@ DСлужба управления схемами и индексами ATABASE.
 - `_read_sql()` – считывает содержимое файла SQL как строку.
 - `ensure_schema()` – выполняет SQL-запрос для создания схемы.
 - `ensure_indexes()` – выполняет SQL-запрос для создания индекса.
+- `ensure_load_meta()` – создаёт служебные таблицы инкрементальной загрузки.
+- `ensure_room_stats()` – создаёт сводную таблицу room_stats (и строит её при первом запуске).
+- `refresh_room_stats()` – пересчитывает room_stats для заданных комнат или целиком.
+- `sync_room_stats()` – то же с записью версии студентов, по которой построена room_stats.
+- `room_stats_stale()` / `require_room_stats()` – проверки актуальности и наличия room_stats.
+- `migrate()` – применяет новые и изменившиеся миграции, возвращает их имена.
+
+Если путь к SQL-файлу не задан, берётся файл для диалекта БД (`dialect_of`):
+`sql/<имя>_pg.sql` для PostgreSQL и `sql/<имя>_sqlite.sql` для SQLite.
+Сводная таблица room_stats есть только в PostgreSQL.
+
+Миграции:
+каждый SQL-файл — именованная миграция ("schema", "indexes", "load_meta",
+"room_stats"). Применённые миграции записываются в таблицу schema_migrations
+вместе с SHA-256 содержимого файла; `migrate()` и все `ensure_*()` отправляют
+DDL только для новых или изменившихся файлов. Если ничего не изменилось,
+выполняются лишь два лёгких запроса (наличие schema_migrations через
+`to_regclass` / sqlite_master и чтение контрольных сумм) — без DDL и без
+блокировок таблиц. Столбцы, добавленные в уже существующие таблицы SQLite,
+перечислены в SQLITE_ADDED_COLUMNS и добавляются только при отсутствии.
+
+Индексы можно строить `CREATE INDEX CONCURRENTLY` (PostgreSQL,
+`concurrently=True`) — без блокировки записи в students. Такой DDL нельзя
+выполнять в транзакции, поэтому нужно отдельное подключение
+с autocommit=True. Построение индексов можно и отложить до окончания
+массовой загрузки: вызвать `migrate(db, ["indexes"])` после неё.
 """
+import hashlib
 import logging
+import re
 from pathlib import Path
-from app.ports.db import DB
+from typing import Iterable
+from app import metrics
+from app.ports.db import DB, dialect_of
 
 logger = logging.getLogger(__name__)
 
+# суффикс SQL-файлов для каждого диалекта
+SQL_FILE_SUFFIXES = {"postgresql": "pg", "sqlite": "sqlite"}
+
+ROOM_STATS_SELECT = """
+SELECT room_id, COUNT(*), COUNT(*) FILTER (WHERE sex = 'M'), COUNT(*) FILTER (WHERE sex = 'F'),
+       MIN(birthday), MAX(birthday), SUM(birthday - DATE '1970-01-01')
+FROM students
+"""
+
+ROOM_STATS_COLUMNS = """
+INSERT INTO room_stats(room_id, student_count, male_count, female_count,
+                       min_birthday, max_birthday, birthday_epoch_sum)
+"""
+
+ROOM_STATS_REFRESH = (
+    "DELETE FROM room_stats WHERE room_id = ANY(%s);"
+    + ROOM_STATS_COLUMNS + ROOM_STATS_SELECT
+    + "WHERE room_id = ANY(%s) GROUP BY room_id;"
+)
+
+ROOM_STATS_REBUILD = (
+    "TRUNCATE room_stats;" + ROOM_STATS_COLUMNS + ROOM_STATS_SELECT + "GROUP BY room_id;"
+)
+
+# room_stats нужно перестроить: построена не по текущей версии студентов
+# (была загрузка без обновления room_stats) или пуста при непустой students
+ROOM_STATS_NEEDS_BUILD = """
+SELECT (SELECT data_version FROM room_stats_version)
+           IS DISTINCT FROM (SELECT version FROM data_versions WHERE kind = 'students')
+       OR (NOT EXISTS (SELECT 1 FROM room_stats) AND EXISTS (SELECT 1 FROM students))
+       AS needs_build;
+"""
+
+ROOM_STATS_VERSION_MARK = """
+INSERT INTO room_stats_version(id, data_version, built_at)
+SELECT TRUE, (SELECT version FROM data_versions WHERE kind = 'students'), now()
+ON CONFLICT (id) DO UPDATE SET
+    data_version = EXCLUDED.data_version, built_at = EXCLUDED.built_at;
+"""
+
+ROOM_STATS_EXISTS = "SELECT to_regclass('room_stats') IS NOT NULL AS present;"
+
+# миграции в порядке применения (sql/<имя>_<диалект>.sql)
+MIGRATIONS = ("schema", "indexes", "load_meta", "room_stats")
+
+# столбцы, добавленные в таблицы миграции после её первой версии: в SQLite нет
+# ADD COLUMN IF NOT EXISTS, поэтому столбец добавляется, только если его нет
+# (pragma_table_info), — повторное применение изменённого файла безопасно
+SQLITE_ADDED_COLUMNS = {
+    "load_meta": (("load_row_hashes", "path", "TEXT NOT NULL DEFAULT ''"),),
+}
+
+SQLITE_COLUMN_EXISTS = """
+SELECT EXISTS (SELECT 1 FROM pragma_table_info(%s) WHERE name = %s) AS present;
+"""
+
+SCHEMA_MIGRATIONS_CREATE = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+  name       TEXT PRIMARY KEY,
+  checksum   TEXT NOT NULL,
+  applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+# быстрая проверка наличия таблицы без DDL
+SCHEMA_MIGRATIONS_EXISTS = {
+    "postgresql": "SELECT to_regclass('schema_migrations') IS NOT NULL AS present;",
+    "sqlite": "SELECT EXISTS (SELECT 1 FROM sqlite_master "
+              "WHERE type = 'table' AND name = 'schema_migrations') AS present;",
+}
+
+SCHEMA_MIGRATIONS_SELECT = """
+SELECT name, checksum FROM schema_migrations;
+"""
+
+SCHEMA_MIGRATIONS_UPSERT = """
+INSERT INTO schema_migrations(name, checksum, applied_at)
+VALUES (%s, %s, CURRENT_TIMESTAMP)
+ON CONFLICT (name) DO UPDATE SET
+    checksum = EXCLUDED.checksum, applied_at = EXCLUDED.applied_at;
+"""
+
+# индексы, оставшиеся невалидными после прерванного CREATE INDEX CONCURRENTLY
+INVALID_INDEXES_SELECT = """
+SELECT c.relname AS name
+FROM pg_index AS i JOIN pg_class AS c ON c.oid = i.indexrelid
+WHERE NOT i.indisvalid AND c.relname = ANY(%s);
+"""
+
+_CREATE_INDEX = re.compile(
+    r"^\s*CREATE\s+(UNIQUE\s+)?INDEX\s+(?:CONCURRENTLY\s+)?(IF\s+NOT\s+EXISTS\s+)?(\w+)",
+    re.IGNORECASE)
+
 def _read_sql(path: str) -> str:
     """Читает SQL-файл и возвращает его содержимое."""
     try:
@@ -28,23 +151,208 @@ def _read_sql(path: str) -> str:
         raise
 
 
-def ensure_schema(db: DB, schema_path: str = "sql/schema_pg.sql") -> None:
-    """Создаёт таблицы и структуру БД из schema_pg.sql."""
-    logger.info("Применяем схему: %s", schema_path)
+def _sql_path(db: DB, name: str) -> str:
+    """Путь к SQL-файлу `name` для диалекта db."""
+    return f"sql/{name}_{SQL_FILE_SUFFIXES[dialect_of(db)]}.sql"
+
+
+def _require_postgres(db: DB, feature: str) -> None:
+    """Проверяет, что возможность feature доступна для диалекта db."""
+    if dialect_of(db) != "postgresql":
+        raise ValueError(f"{feature} поддерживается только в PostgreSQL")
+
+
+def _checksum(sql: str) -> str:
+    """SHA-256 текста миграции."""
+    return hashlib.sha256(sql.encode("utf-8")).hexdigest()
+
+
+def _applied_migrations(db: DB) -> dict[str, str] | None:
+    """{имя: контрольная сумма} применённых миграций; None — таблицы ещё нет."""
+    rows = db.query(SCHEMA_MIGRATIONS_EXISTS[dialect_of(db)])
+    if not rows or not rows[0].get("present"):
+        return None
+    return {row["name"]: row["checksum"] for row in db.query(SCHEMA_MIGRATIONS_SELECT)}
+
+
+def _add_sqlite_columns(db: DB, name: str) -> None:
+    """Добавляет в таблицы миграции name недостающие столбцы (SQLITE_ADDED_COLUMNS)."""
+    for table, column, definition in SQLITE_ADDED_COLUMNS.get(name, ()):
+        if not db.query(SQLITE_COLUMN_EXISTS, (table, column))[0]["present"]:
+            logger.info("Добавляем столбец %s.%s", table, column)
+            db.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition};")
+
+
+def _concurrent_statements(sql: str) -> list[str]:
+    """
+    Операторы файла индексов с CREATE INDEX CONCURRENTLY — каждый
+    выполняется отдельно (в файлах индексов нет строк с ';').
+    """
+    statements = []
+    for statement in sql.split(";"):
+        statement = statement.strip()
+        if not statement:
+            continue
+        statements.append(_CREATE_INDEX.sub(
+            lambda m: f"CREATE {'UNIQUE ' if m.group(1) else ''}INDEX CONCURRENTLY "
+                      f"{'IF NOT EXISTS ' if m.group(2) else ''}{m.group(3)}",
+            statement, count=1))
+    return statements
+
+
+def _apply_concurrently(db: DB, sql: str) -> None:
+    """
+    Строит индексы без блокировки записи. Невалидные индексы, оставшиеся
+    от прерванной сборки, удаляются и строятся заново.
+    """
+    _require_postgres(db, "CREATE INDEX CONCURRENTLY")
+    statements = _concurrent_statements(sql)
+    names = [m.group(3) for m in map(_CREATE_INDEX.match, statements) if m]
+    for row in db.query(INVALID_INDEXES_SELECT, (names,)):
+        logger.warning("Индекс %s невалиден после прерванной сборки — пересоздаём", row["name"])
+        db.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{row["name"]}";')
+    for statement in statements:
+        logger.info("Строим индекс: %s", statement)
+        db.execute(statement + ";")
+
+
+def migrate(db: DB, names: Iterable[str] = ("schema", "indexes"),
+            paths: dict[str, str] | None = None, concurrently: bool = False) -> list[str]:
+    """
+    Применяет миграции names (из MIGRATIONS), у которых изменился SQL-файл
+    или которые ещё не применялись; файл берётся из paths или по диалекту.
+    Каждая миграция применяется в своей транзакции вместе с записью
+    в schema_migrations. При concurrently=True индексы строятся
+    CREATE INDEX CONCURRENTLY (PostgreSQL, db с autocommit=True).
+    Возвращает имена применённых миграций.
+    """
+    paths = paths or {}
+    plan = []
+    for name in names:
+        if name not in MIGRATIONS:
+            raise ValueError(f"Неизвестная миграция '{name}', ожидалась одна из {MIGRATIONS}")
+        path = paths.get(name) or _sql_path(db, name)
+        sql = _read_sql(path)
+        plan.append((name, path, sql, _checksum(sql)))
+    with metrics.timer("schema_check_seconds"):
+        applied = _applied_migrations(db)
+    pending = [item for item in plan if (applied or {}).get(item[0]) != item[3]]
+    metrics.inc("schema_migrations_skipped_total", len(plan) - len(pending))
+    if not pending:
+        logger.info("Схема актуальна, миграции пропущены: %s", [item[0] for item in plan])
+        return []
+    if applied is None:
+        logger.info("Создаём таблицу schema_migrations")
+        db.execute(SCHEMA_MIGRATIONS_CREATE)
+    for name, path, sql, checksum in pending:
+        logger.info("Применяем миграцию %s: %s", name, path)
+        with metrics.timer("schema_migration_seconds", migration=name):
+            if concurrently and name == "indexes":
+                _apply_concurrently(db, sql)
+                db.execute(SCHEMA_MIGRATIONS_UPSERT, (name, checksum))
+            else:
+                with db.transaction():
+                    db.execute(sql)
+                    if dialect_of(db) == "sqlite":
+                        _add_sqlite_columns(db, name)
+                    db.execute(SCHEMA_MIGRATIONS_UPSERT, (name, checksum))
+        metrics.inc("schema_migrations_applied_total", migration=name)
+    return [item[0] for item in pending]
+
+
+def ensure_schema(db: DB, schema_path: str | None = None) -> None:
+    """Создаёт таблицы и структуру БД из schema_pg.sql (schema_sqlite.sql для SQLite)."""
+    logger.info("Применяем схему: %s", schema_path or _sql_path(db, "schema"))
     try:
-        db.execute(_read_sql(schema_path))
+        migrate(db, ["schema"], {"schema": schema_path})
         logger.info("Схема успешно применена")
     except Exception as e:
         logger.error("При применении схемы (%s): %s", schema_path, e)
         raise
 
 
-def ensure_indexes(db: DB, indexes_path: str = "sql/indexes_pg.sql") -> None:
-    """Создаёт или обновляет индексы БД из indexes_pg.sql."""
+def ensure_indexes(db: DB, indexes_path: str | None = None, concurrently: bool = False) -> None:
+    """
+    Создаёт или обновляет индексы БД из indexes_pg.sql (indexes_sqlite.sql для SQLite).
+    concurrently=True — CREATE INDEX CONCURRENTLY (см. `migrate`).
+    """
     logger.info("Применяем индексы")
     try:
-        db.execute(_read_sql(indexes_path))
+        migrate(db, ["indexes"], {"indexes": indexes_path}, concurrently)
         logger.info("Индексы успешно применены")
     except Exception as e:
         logger.error("При применении индексов (%s): %s", indexes_path, e)
         raise
+
+
+def ensure_load_meta(db: DB, meta_path: str | None = None) -> None:
+    """Создаёт служебные таблицы инкрементальной загрузки из load_meta_pg.sql."""
+    logger.info("Применяем служебные таблицы загрузки")
+    try:
+        migrate(db, ["load_meta"], {"load_meta": meta_path})
+        logger.info("Служебные таблицы загрузки успешно применены")
+    except Exception as e:
+        logger.error("При применении служебных таблиц (%s): %s", meta_path, e)
+        raise
+
+
+def refresh_room_stats(db: DB, room_ids: Iterable[int] | None = None) -> None:
+    """
+    Пересчитывает room_stats: для room_ids — только эти комнаты
+    (O(студентов в них)), для None — всю таблицу.
+    """
+    _require_postgres(db, "room_stats")
+    if room_ids is None:
+        logger.info("Полная перестройка room_stats")
+        db.execute(ROOM_STATS_REBUILD)
+        return
+    ids = sorted(set(room_ids))
+    if not ids:
+        return
+    logger.info("Обновляем room_stats для %s комнат", len(ids))
+    db.execute(ROOM_STATS_REFRESH, (ids, ids))
+
+
+def room_stats_stale(db: DB) -> bool:
+    """room_stats построена не по текущей версии студентов (или пуста при непустой students)."""
+    rows = db.query(ROOM_STATS_NEEDS_BUILD)
+    return bool(rows and rows[0]["needs_build"])
+
+
+def sync_room_stats(db: DB, room_ids: Iterable[int] | None = None) -> None:
+    """
+    Пересчитывает room_stats (см. `refresh_room_stats`) и запоминает версию
+    студентов, по которой она теперь построена. Вызывать в транзакции загрузки
+    после записи новой версии.
+    """
+    refresh_room_stats(db, room_ids)
+    db.execute(ROOM_STATS_VERSION_MARK)
+
+
+def require_room_stats(db: DB) -> None:
+    """Проверяет, что таблица room_stats создана (иначе отчёты по ней были бы пустыми)."""
+    _require_postgres(db, "room_stats")
+    rows = db.query(ROOM_STATS_EXISTS)
+    if not rows or not rows[0].get("present"):
+        raise ValueError("Таблица room_stats не создана: выполните загрузку с --stats "
+                         "или schema_service.ensure_room_stats")
+
+
+def ensure_room_stats(db: DB, stats_path: str = "sql/room_stats_pg.sql") -> None:
+    """
+    Создаёт сводную таблицу room_stats из room_stats_pg.sql.
+    Если таблица построена не по текущей версии студентов (загрузка без
+    обновления room_stats) или пуста, а студенты уже есть, строит её целиком.
+    """
+    _require_postgres(db, "room_stats")
+    logger.info("Применяем сводную таблицу room_stats")
+    try:
+        migrate(db, ["room_stats"], {"room_stats": stats_path})
+        if room_stats_stale(db):
+            logger.info("room_stats устарела — перестраиваем")
+            with db.transaction():
+                sync_room_stats(db)
+        logger.info("Таблица room_stats успешно применена")
+    except Exception as e:
+        logger.error("При применении room_stats (%s): %s", stats_path, e)
+        raise
@@ -0,0 +1,204 @@
+"""
+Сервис наблюдения за каталогом входящих файлов.
+
+Долгоживущий режим поверх `load_service`: каталог опрашивается каждые
+`interval` секунд, новые и изменённые JSON-файлы загружаются инкрементально
+(`incremental=True`) через одно открытое подключение — без запуска процесса,
+проверки схемы и подключения к БД на каждый файл.
+
+Опрос дешёвый: один `os.scandir` и сравнение (размер, mtime) с прошлым
+опросом; содержимое читается только у изменившихся файлов. Файл считается
+готовым, когда его размер и mtime не менялись между двумя опросами (запись
+завершена). Пока в каталоге есть файлы, которые ещё пишутся, готовые
+копятся (но не дольше `max_delay` секунд) — серия файлов загружается одной
+транзакцией. Если транзакция серии откатилась, файлы загружаются по одному,
+чтобы один битый файл не задерживал остальные; сбойный файл повторно
+берётся только после изменения.
+
+Тип данных определяется по имени файла (`WATCH_PATTERNS`); комнаты
+загружаются раньше студентов (внешний ключ students.room_id).
+
+Функции:
+- `watch()` – цикл наблюдения; `on_change` вызывается, только если данные
+  в БД действительно изменились.
+"""
+import fnmatch
+import logging
+import os
+import threading
+from contextlib import nullcontext
+from time import monotonic
+from typing import Callable
+from app.ports.db import DB
+from app.services import load_service
+from app.services.reject_sink import RejectSink
+
+logger = logging.getLogger(__name__)
+
+# тип данных -> шаблон имени файла
+WATCH_PATTERNS = {"rooms": "rooms*.json", "students": "students*.json"}
+# порядок загрузки внутри серии: комнаты раньше студентов
+_KIND_ORDER = {"rooms": 0, "students": 1}
+
+
+class _Scanner:
+    """
+    Опрашивает каталог и отслеживает, какие файлы изменились и уже
+    перестали меняться. Подпись файла — (размер, mtime в наносекундах).
+    """
+    def __init__(self, directory: str, patterns: dict[str, str]):
+        self.directory = directory
+        self.patterns = patterns
+        self.busy = False                                # есть файлы, которые ещё пишутся
+        self._last: dict[str, tuple] = {}                # путь -> подпись на прошлом опросе
+        self._done: dict[str, tuple] = {}                # путь -> подпись обработанной версии
+        self._ready: dict[str, tuple[str, tuple]] = {}   # путь -> (тип, подпись)
+
+    def _kind(self, name: str) -> str | None:
+        for kind, pattern in self.patterns.items():
+            if fnmatch.fnmatch(name, pattern):
+                return kind
+        return None
+
+    def _scan(self) -> dict[str, tuple[str, tuple]]:
+        current = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                kind = self._kind(entry.name)
+                if kind is None or not entry.is_file():
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:  # удалён между листингом и stat
+                    continue
+                current[entry.path] = (kind, (stat.st_size, stat.st_mtime_ns))
+        return current
+
+    def poll(self) -> None:
+        """Один опрос каталога: обновляет набор готовых файлов и флаг busy."""
+        current = self._scan()
+        self.busy = False
+        for path, (kind, signature) in current.items():
+            if self._done.get(path) == signature:
+                self._ready.pop(path, None)
+            elif self._last.get(path) == signature:
+                self._ready[path] = (kind, signature)
+            else:
+                # новый или ещё дописывается — ждём следующего опроса
+                self._ready.pop(path, None)
+                self.busy = True
+        self._last = {path: signature for path, (_, signature) in current.items()}
+        # удалённые файлы забываем: появившийся снова файл загрузится заново
+        self._done = {path: sig for path, sig in self._done.items() if path in current}
+        self._ready = {path: item for path, item in self._ready.items() if path in current}
+
+    def has_ready(self) -> bool:
+        return bool(self._ready)
+
+    def take(self) -> list[tuple[str, str, tuple]]:
+        """Забирает готовые файлы [(тип, путь, подпись)] в порядке загрузки."""
+        ready = [(kind, path, signature) for path, (kind, signature) in self._ready.items()]
+        ready.sort(key=lambda item: (_KIND_ORDER.get(item[0], len(_KIND_ORDER)), item[1]))
+        self._ready = {}
+        return ready
+
+    def mark_done(self, path: str, signature: tuple) -> None:
+        self._done[path] = signature
+
+
+def _load_file(db: DB, kind: str, path: str, options: dict, refresh_stats: bool) -> int:
+    """Инкрементальная загрузка одного файла; возвращает число изменённых строк."""
+    if kind == "rooms":
+        return load_service.load_rooms(db, path, incremental=True, **options)
+    return load_service.load_students(db, path, incremental=True,
+                                      refresh_stats=refresh_stats, **options)
+
+
+def _ingest(db: DB, scanner: _Scanner, files: list[tuple[str, str, tuple]],
+            options: dict, refresh_stats: bool = False) -> int:
+    """
+    Загружает серию файлов одной транзакцией; при ошибке — по одному файлу
+    в своей транзакции. Отбраковки серии учитываются только при её успехе,
+    иначе — при повторной загрузке по одному. Возвращает число изменённых строк.
+    """
+    rejects = options.get("rejects")
+    staged = rejects.transaction() if rejects is not None and len(files) > 1 else nullcontext()
+    try:
+        with staged, db.transaction():
+            written = sum(_load_file(db, kind, path, options, refresh_stats)
+                          for kind, path, _ in files)
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        if len(files) == 1:
+            logger.error("Файл %s не загружен: %s", files[0][1], e)
+            scanner.mark_done(files[0][1], files[0][2])
+            return 0
+        logger.error("Серия из %s файлов откатана (%s) — загружаем по одному", len(files), e)
+        written = 0
+        for kind, path, signature in files:
+            try:
+                with db.transaction():
+                    written += _load_file(db, kind, path, options, refresh_stats)
+            except Exception as file_error:  # pylint: disable=broad-exception-caught
+                logger.error("Файл %s не загружен: %s", path, file_error)
+            # сбойный файл не повторяем, пока он не изменится
+            scanner.mark_done(path, signature)
+        return written
+    for _, path, signature in files:
+        scanner.mark_done(path, signature)
+    return written
+
+
+def watch(db: DB, directory: str, on_change: Callable[[dict], None] | None = None,
+          interval: float = 1.0, max_delay: float = 10.0,
+          patterns: dict[str, str] | None = None, batch_size: int = 1000,
+          method: str = "insert", workers: int = 0, refresh_stats: bool = False,
+          stop: threading.Event | None = None, max_polls: int | None = None,
+          rejects: RejectSink | None = None) -> int:
+    """
+    Наблюдает за каталогом directory и инкрементально загружает новые
+    и изменённые файлы. Служебные таблицы инкрементальной загрузки должны
+    существовать (`schema_service.ensure_load_meta`).
+
+    После серии, изменившей данные, вызывает on_change({"files": ..., "written": ...});
+    ошибка on_change пишется в лог и не останавливает наблюдение.
+    Некорректные записи всех файлов передаются в общий приёмник rejects.
+    Цикл завершается по событию stop или после max_polls опросов.
+    Возвращает общее число изменённых строк.
+    """
+    if interval <= 0:
+        raise ValueError(f"Интервал опроса должен быть положительным, получено: {interval}")
+    if not os.path.isdir(directory):
+        raise FileNotFoundError(2, "Каталог не найден", directory)
+    stop = stop or threading.Event()
+    scanner = _Scanner(directory, patterns or WATCH_PATTERNS)
+    options = {"batch_size": batch_size, "method": method, "workers": workers,
+               "rejects": rejects}
+    logger.info("Наблюдение за каталогом %s (опрос каждые %s с)", directory, interval)
+    total = 0
+    polls = 0
+    burst_started = None
+    while not stop.is_set():
+        scanner.poll()
+        if scanner.has_ready():
+            if burst_started is None:
+                burst_started = monotonic()
+            # копим серию, пока соседние файлы ещё пишутся
+            if not scanner.busy or monotonic() - burst_started >= max_delay:
+                burst_started = None
+                files = scanner.take()
+                logger.info("Загружаем серию из %s файлов", len(files))
+                written = _ingest(db, scanner, files, options, refresh_stats)
+                total += written
+                if written and on_change is not None:
+                    try:
+                        on_change({"files": len(files), "written": written})
+                    except Exception as e:  # pylint: disable=broad-exception-caught
+                        logger.exception("Ошибка обработки изменений: %s", e)
+                elif not written:
+                    logger.info("Данные не изменились")
+        polls += 1
+        if max_polls is not None and polls >= max_polls:
+            break
+        stop.wait(interval)
+    logger.info("Наблюдение остановлено, изменено строк: %s", total)
+    return total
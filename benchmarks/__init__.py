@@ -0,0 +1 @@
+"""Скрипты замеров производительности (запуск: `python -m benchmarks.<имя>`)."""
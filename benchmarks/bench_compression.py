@@ -0,0 +1,60 @@
+"""
+Размер и время экспорта с разными кодеками сжатия.
+
+Для каждого формата (json, xml, ndjson) и кодека (без сжатия, gzip 1/6/9,
+bz2, lzma) выгружает синтетический результат `--rows` строк во временный
+каталог и печатает время записи, размер файла и степень сжатия.
+
+Пример:
+    python -m benchmarks.bench_compression --rows 200000
+"""
+import argparse
+import os
+import tempfile
+from time import perf_counter
+from app.adapters.export_json import JsonExporter
+from app.adapters.export_ndjson import NdjsonExporter
+from app.adapters.export_xml import XmlExporter
+
+EXPORTERS = {"json": JsonExporter, "xml": XmlExporter, "ndjson": NdjsonExporter}
+
+# (подпись, кодек, уровень)
+CODECS = [
+    ("none", "none", None),
+    ("gzip-1", "gzip", 1),
+    ("gzip-6", "gzip", 6),
+    ("gzip-9", "gzip", 9),
+    ("bz2-9", "bz2", 9),
+    ("lzma-6", "lzma", 6),
+]
+
+
+def _data(rows: int) -> dict:
+    """Результат, похожий на отчёты: итератор строк комнат."""
+    return {"count_student_in_rooms": (
+        {"id": i, "name": f"Room #{i}", "students_count": i % 7} for i in range(rows))}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--formats", nargs="+", choices=list(EXPORTERS), default=list(EXPORTERS))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as out:
+        for form in args.formats:
+            baseline = None
+            for label, codec, level in CODECS:
+                path = os.path.join(out, f"result.{form}")
+                exporter = EXPORTERS[form](compression=codec, level=level)
+                start = perf_counter()
+                exporter.dump(_data(args.rows), path)
+                elapsed = perf_counter() - start
+                size = os.path.getsize(path)
+                baseline = baseline or size
+                print(f"{form:<7} {label:<7} {elapsed * 1000:8.1f} ms"
+                      f" {size / 1024:10.1f} KiB  x{baseline / size:5.1f}")
+
+
+if __name__ == "__main__":
+    main()
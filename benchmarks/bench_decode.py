@@ -0,0 +1,77 @@
+"""
+Время декодирования одной записи студента: поштучно и пакетным декодером.
+
+Читает синтетический набор `benchmarks.generate` (`--students` записей,
+доля некорректных `--invalid-ratio`) в память и сравнивает:
+- per_record – `student_from_json` + упаковка в кортеж (прежний путь загрузки);
+- batch – `decode_students` пакетами по `--batch` элементов;
+- batch_columnar – то же со столбцами (как в векторном движке).
+
+Кэш разбора дат очищается перед каждым замером, так что в результат
+входит и его прогрев.
+
+Пример:
+    python -m benchmarks.bench_decode --students 200000 --invalid-ratio 0.01
+"""
+import argparse
+from time import perf_counter
+from app.domain.entities import InvalidRecord, decode_students, parse_birthday, student_from_json
+from app.services.json_stream import iter_json_items
+from benchmarks.generate import generate_dataset
+
+
+def _per_record(items: list) -> int:
+    rows = []
+    for obj in items:
+        if not isinstance(obj, dict):
+            continue
+        try:
+            s = student_from_json(obj)
+        except InvalidRecord:
+            continue
+        rows.append((s.id, s.name, s.sex, s.birthday, s.room_id))
+    return len(rows)
+
+
+def _batch(items: list, size: int, columnar: bool = False) -> int:
+    count = 0
+    for start in range(0, len(items), size):
+        rows, _ = decode_students(items[start:start + size], start + 1, columnar=columnar)
+        count += len(rows[0]) if columnar else len(rows)
+    return count
+
+
+def _best(repeat: int, func) -> tuple[float, int]:
+    best, result = float("inf"), 0
+    for _ in range(repeat):
+        parse_birthday.cache_clear()
+        start = perf_counter()
+        result = func()
+        best = min(best, perf_counter() - start)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--students", type=int, default=200000)
+    parser.add_argument("--invalid-ratio", type=float, default=0.01)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--data-dir", default="data/bench")
+    args = parser.parse_args()
+
+    _, students = generate_dataset(args.data_dir, args.students,
+                                   invalid_ratio=args.invalid_ratio)
+    items = list(iter_json_items(students, "students"))
+    baseline = None
+    for label, func in (("per_record", lambda: _per_record(items)),
+                        ("batch", lambda: _batch(items, args.batch)),
+                        ("batch_columnar", lambda: _batch(items, args.batch, columnar=True))):
+        elapsed, valid = _best(args.repeat, func)
+        baseline = baseline or elapsed
+        print(f"{label:<15} {elapsed * 1000:9.1f} ms {elapsed / len(items) * 1e9:8.0f} нс/запись"
+              f"  x{baseline / elapsed:4.1f}  валидных: {valid}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+Набор замеров всех стадий на синтетических данных с машиночитаемым результатом.
+
+Для каждого размера `--sizes` генерирует (или берёт из `--data-dir`) набор
+`benchmarks.generate` и меряет стадии:
+- parse – потоковое чтение JSON (`iter_json_items`);
+- validate – валидация и преобразование в кортежи (без чтения);
+- load_rooms, load_students – загрузка через `load_service` (insert);
+- report_<имя> – каждый отчёт `query_service.REPORTS` и сводный combined_reports;
+- export_<формат> – выгрузка результата отчётов каждым экспортером (раздел
+  count_student_in_rooms растёт вместе с числом комнат).
+
+Каждая стадия выполняется `--repeat` раз; в результат идут лучшее время
+и медиана. Загрузка меряется на новой SQLite-базе в памяти; с `--dsn` —
+в PostgreSQL (один прогон, нужна пустая база: заполненная пропустит строки
+по ON CONFLICT).
+
+Результат пишется в JSON (`--output`). `--compare` сравнивает с прошлым
+файлом и завершается с кодом 1, если какая-то стадия медленнее порога.
+
+Пример:
+    python -m benchmarks.bench_suite --sizes 10000 100000 --output bench.json
+    python -m benchmarks.bench_suite --sizes 100000 --compare bench.json --threshold 0.3
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+from time import perf_counter
+from typing import Callable
+from app.adapters.export_json import JsonExporter
+from app.adapters.export_ndjson import NdjsonExporter
+from app.adapters.export_xml import XmlExporter
+from app.adapters.sqlite_db import SQLiteDB
+from app.ports.db import DB
+from app.services import load_common, load_service, query_service, schema_service
+from app.services.json_stream import iter_json_items
+from benchmarks.generate import generate_dataset
+
+RESULTS_VERSION = 1
+
+EXPORTERS: dict[str, Callable] = {
+    "json": JsonExporter,
+    "xml": XmlExporter,
+    "ndjson": NdjsonExporter,
+}
+try:
+    from app.adapters.export_arrow import ArrowExporter, pa
+    if pa is not None:
+        EXPORTERS["arrow"] = ArrowExporter
+except ImportError:  # необязательная зависимость
+    pass
+
+
+def _timings(repeat: int, func: Callable[[], object]) -> list[float]:
+    """Время repeat запусков func, секунды."""
+    timings = []
+    for _ in range(repeat):
+        start = perf_counter()
+        func()
+        timings.append(perf_counter() - start)
+    return timings
+
+
+def _record(size: int, stage: str, records: int, timings: list[float]) -> dict:
+    best = min(timings)
+    return {"size": size, "stage": stage, "records": records,
+            "best_s": round(best, 6), "median_s": round(statistics.median(timings), 6),
+            "rate_per_s": round(records / best) if best > 0 else None}
+
+
+def _consume(iterable) -> int:
+    count = 0
+    for _ in iterable:
+        count += 1
+    return count
+
+
+def _fresh_sqlite() -> DB:
+    db = SQLiteDB(":memory:")
+    db.connect()
+    schema_service.migrate(db, ["schema", "indexes"])
+    return db
+
+
+def _postgres(dsn: str) -> DB:
+    # импорт здесь: без --dsn адаптер PostgreSQL не используется
+    from app.adapters.postgres_db import PostgresDB  # pylint: disable=import-outside-toplevel
+    db = PostgresDB(dsn)
+    db.connect()
+    schema_service.migrate(db, ["schema", "indexes"])
+    return db
+
+
+def _bench_parse(size: int, students: str, repeat: int) -> list[dict]:
+    """Стадии parse и validate по файлу студентов."""
+    parse = _timings(repeat, lambda: _consume(iter_json_items(students, "students")))
+    parsed = _consume(iter_json_items(students, "students"))
+    validate = _timings(repeat, lambda: _consume(
+        load_common.iter_rows(iter_json_items(students, "students"), "students")))
+    # валидация = (чтение + валидация) − чтение
+    return [_record(size, "parse", parsed, parse),
+            _record(size, "validate", parsed, [max(v - min(parse), 0.0) for v in validate])]
+
+
+def _bench_db(size: int, db_factory: Callable[[], DB], rooms: str, students: str,
+              repeat: int) -> tuple[list[dict], DB]:
+    """Загрузка в новую БД repeat раз; последняя заполненная БД остаётся открытой."""
+    rooms_t, students_t = [], []
+    db = None
+    counts = (0, 0)
+    for _ in range(repeat):
+        if db is not None:
+            db.close()
+        db = db_factory()
+        start = perf_counter()
+        loaded_rooms = load_service.load_rooms(db, rooms, batch_size=5000)
+        rooms_t.append(perf_counter() - start)
+        start = perf_counter()
+        loaded_students = load_service.load_students(db, students, batch_size=5000)
+        students_t.append(perf_counter() - start)
+        counts = (loaded_rooms, loaded_students)
+    return [_record(size, "load_rooms", counts[0], rooms_t),
+            _record(size, "load_students", counts[1], students_t)], db
+
+
+def _bench_reports(size: int, db: DB, repeat: int) -> tuple[list[dict], dict]:
+    results = []
+    result = {}
+    for section, report in query_service.REPORTS.items():
+        timings = _timings(repeat, lambda report=report: report(db))
+        result[section] = report(db)
+        results.append(_record(size, f"report_{section}", len(result[section]), timings))
+    timings = _timings(repeat, lambda: query_service.combined_reports(db))
+    results.append(_record(size, "report_combined", len(result["count_student_in_rooms"]),
+                           timings))
+    return results, result
+
+
+def _bench_exports(size: int, result: dict, repeat: int) -> list[dict]:
+    records = sum(len(rows) for rows in result.values())
+    results = []
+    with tempfile.TemporaryDirectory() as out:
+        for form, exporter_cls in EXPORTERS.items():
+            path = os.path.join(out, f"result.{form}")
+            exporter = exporter_cls()
+            timings = _timings(repeat, lambda exporter=exporter, path=path:
+                               exporter.dump(result, path))
+            results.append(_record(size, f"export_{form}", records, timings))
+    return results
+
+
+def run_suite(args: argparse.Namespace) -> dict:
+    """Выполняет все стадии для всех размеров; возвращает документ результата."""
+    results = []
+    for size in args.sizes:
+        rooms, students = generate_dataset(args.data_dir, size, seed=args.seed,
+                                           invalid_ratio=args.invalid_ratio, skew=args.skew)
+        print(f"# размер {size}: {students}", file=sys.stderr)
+        results += _bench_parse(size, students, args.repeat)
+        if args.dsn:
+            load, db = _bench_db(size, lambda: _postgres(args.dsn), rooms, students, 1)
+        else:
+            load, db = _bench_db(size, _fresh_sqlite, rooms, students, args.repeat)
+        results += load
+        try:
+            reports, result = _bench_reports(size, db, args.repeat)
+        finally:
+            db.close()
+        results += reports
+        results += _bench_exports(size, result, args.repeat)
+    return {
+        "version": RESULTS_VERSION,
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backend": "postgresql" if args.dsn else "sqlite",
+            "seed": args.seed, "invalid_ratio": args.invalid_ratio, "skew": args.skew,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """Стадии, ставшие медленнее baseline более чем на threshold (доля)."""
+    old = {(r["size"], r["stage"]): r["best_s"] for r in baseline["results"]}
+    regressions = []
+    for record in current["results"]:
+        before = old.get((record["size"], record["stage"]))
+        if not before:
+            continue
+        change = record["best_s"] / before - 1
+        if change > threshold:
+            regressions.append(f"{record['stage']} (размер {record['size']}): "
+                               f"{before * 1000:.1f} -> {record['best_s'] * 1000:.1f} ms "
+                               f"(+{change:.0%})")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000],
+                        help="число студентов (комнат в 10 раз меньше)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--invalid-ratio", type=float, default=0.0)
+    parser.add_argument("--skew", type=float, default=0.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--data-dir", default="data/bench",
+                        help="каталог сгенерированных наборов (переиспользуются)")
+    parser.add_argument("--dsn", help="PostgreSQL для стадий загрузки и отчётов (пустая база)")
+    parser.add_argument("--output", help="файл JSON с результатами (по умолчанию stdout)")
+    parser.add_argument("--compare", help="прошлый файл результатов для сравнения")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="допустимое замедление стадии, доля (0.2 = 20%%)")
+    args = parser.parse_args()
+    # сообщения о некорректных записях не должны влиять на замер
+    logging.disable(logging.CRITICAL)
+
+    document = run_suite(args)
+    text = json.dumps(document, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    for record in document["results"]:
+        print(f"{record['size']:>9} {record['stage']:<36} {record['best_s'] * 1000:10.1f} ms"
+              f" {record['rate_per_s'] or 0:>12,} записей/с", file=sys.stderr)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(document, json.load(f), args.threshold)
+        for line in regressions:
+            print(f"РЕГРЕССИЯ: {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+"""
+Генератор синтетических данных для замеров.
+
+Пишет rooms.json и students.json в формате `data/JSON` (массив объектов,
+дата рождения в ISO с временем). Результат детерминирован: одинаковые
+параметры и `seed` дают побайтно одинаковые файлы. Файлы пишутся потоково,
+поэтому 10 млн студентов не требуют памяти под весь набор.
+
+Параметры набора:
+- `invalid_ratio` – доля некорректных записей (нет поля, пол не M/F,
+  неразбираемая дата, нечисловой id); для комнат это дополнительные
+  «мусорные» записи, валидные id комнат не портятся;
+- `skew` – показатель распределения Ципфа для заселения комнат:
+  0 — равномерно, 1 и выше — несколько комнат забирают большую часть студентов.
+
+Пример:
+    python -m benchmarks.generate --students 1000000 --invalid-ratio 0.01 --skew 1.1
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+from datetime import date
+
+_FIRST = ("Peggy", "Christian", "Anna", "Ivan", "Maria", "John", "Olga", "Peter",
+          "Elena", "Denis", "Sofia", "Mark", "Nina", "Oleg", "Irina", "Paul")
+_LAST = ("Ryan", "Bush", "Smith", "Ivanov", "Petrova", "Brown", "Sokolova", "Lee",
+         "Kuznetsov", "Garcia", "Novak", "Miller", "Orlova", "Clark", "Popov", "Young")
+_NAMES = [f"{first} {last}" for first, last in itertools.product(_FIRST, _LAST)]
+
+# даты рождения: 1990-01-01 .. 2012-12-31, заранее отформатированные
+_FIRST_DAY = date(1990, 1, 1).toordinal()
+_BIRTHDAYS = [date.fromordinal(day).isoformat() + "T00:00:00.000000"
+              for day in range(_FIRST_DAY, date(2012, 12, 31).toordinal() + 1)]
+
+# виды порчи записи студента
+INVALID_KINDS = ("missing_field", "bad_sex", "bad_birthday", "bad_id")
+
+_CHUNK = 10000
+
+
+def _corrupt(record: dict, kind: str) -> dict:
+    """Портит корректную запись студента способом kind."""
+    record = dict(record)
+    if kind == "missing_field":
+        del record["birthday"]
+    elif kind == "bad_sex":
+        record["sex"] = "X"
+    elif kind == "bad_birthday":
+        record["birthday"] = "31.02.2001"
+    else:
+        record["id"] = f"id-{record['id']}"
+    return record
+
+
+def _room_picker(rng: random.Random, rooms: int, skew: float):
+    """Функция выбора k комнат: равномерно или по закону Ципфа с показателем skew."""
+    if skew <= 0:
+        return lambda k: [rng.randrange(rooms) for _ in range(k)]
+    # ранги перемешаны, чтобы «тяжёлые» комнаты не были всегда первыми по id
+    order = list(range(rooms))
+    rng.shuffle(order)
+    cum_weights = list(itertools.accumulate(1.0 / (rank + 1) ** skew for rank in range(rooms)))
+    return lambda k: rng.choices(order, cum_weights=cum_weights, k=k)
+
+
+def _write_array(path: str, lines) -> int:
+    """Пишет JSON-массив из готовых строк-объектов; возвращает число объектов."""
+    count = 0
+    with open(path, "w", encoding="utf-8", buffering=1 << 20) as f:
+        f.write("[\n")
+        for line in lines:
+            if count:
+                f.write(",\n")
+            f.write(line)
+            count += 1
+        f.write("\n]\n")
+    return count
+
+
+def generate_rooms(path: str, rooms: int, seed: int = 0, invalid_ratio: float = 0.0) -> int:
+    """Пишет rooms.json: комнаты 0..rooms-1 и доля invalid_ratio «мусорных» записей."""
+    rng = random.Random(seed)
+
+    def lines():
+        for room_id in range(rooms):
+            yield f'{{"id": {room_id}, "name": "Room #{room_id}"}}'
+            if invalid_ratio and rng.random() < invalid_ratio:
+                yield json.dumps({"id": f"room-{room_id}", "name": "Broken"})
+    return _write_array(path, lines())
+
+
+def generate_students(path: str, students: int, rooms: int, seed: int = 0,
+                      invalid_ratio: float = 0.0, skew: float = 0.0) -> int:
+    """Пишет students.json: students записей, из них около invalid_ratio некорректных."""
+    rng = random.Random(seed + 1)
+    pick_rooms = _room_picker(rng, rooms, skew)
+
+    def lines():
+        for start in range(0, students, _CHUNK):
+            count = min(_CHUNK, students - start)
+            room_ids = pick_rooms(count)
+            for student_id, room_id in zip(range(start, start + count), room_ids):
+                name = _NAMES[rng.randrange(len(_NAMES))]
+                sex = "M" if rng.random() < 0.5 else "F"
+                birthday = _BIRTHDAYS[rng.randrange(len(_BIRTHDAYS))]
+                if invalid_ratio and rng.random() < invalid_ratio:
+                    record = {"birthday": birthday, "id": student_id, "name": name,
+                              "room": room_id, "sex": sex}
+                    yield json.dumps(_corrupt(record, rng.choice(INVALID_KINDS)))
+                    continue
+                yield (f'{{"birthday": "{birthday}", "id": {student_id}, "name": "{name}", '
+                       f'"room": {room_id}, "sex": "{sex}"}}')
+    return _write_array(path, lines())
+
+
+def dataset_paths(out_dir: str, students: int, rooms: int | None = None, seed: int = 0,
+                  invalid_ratio: float = 0.0, skew: float = 0.0) -> tuple[str, str]:
+    """Пути к файлам набора; имя кодирует параметры, так что набор можно переиспользовать."""
+    rooms = rooms or max(1, students // 10)
+    tag = f"{students}_{rooms}_s{seed}_i{invalid_ratio:g}_k{skew:g}"
+    return (os.path.join(out_dir, f"rooms_{tag}.json"),
+            os.path.join(out_dir, f"students_{tag}.json"))
+
+
+def generate_dataset(out_dir: str, students: int, rooms: int | None = None, seed: int = 0,
+                     invalid_ratio: float = 0.0, skew: float = 0.0,
+                     reuse: bool = True) -> tuple[str, str]:
+    """
+    Генерирует (или при reuse=True берёт готовый) набор в out_dir.
+    По умолчанию комнат в 10 раз меньше, чем студентов.
+    Возвращает (путь к комнатам, путь к студентам).
+    """
+    if not 0 <= invalid_ratio < 1:
+        raise ValueError(f"Доля некорректных записей должна быть в [0, 1), получено: "
+                         f"{invalid_ratio}")
+    rooms = rooms or max(1, students // 10)
+    rooms_path, students_path = dataset_paths(out_dir, students, rooms, seed,
+                                              invalid_ratio, skew)
+    if reuse and os.path.exists(rooms_path) and os.path.exists(students_path):
+        return rooms_path, students_path
+    os.makedirs(out_dir, exist_ok=True)
+    generate_rooms(rooms_path, rooms, seed, invalid_ratio)
+    generate_students(students_path, students, rooms, seed, invalid_ratio, skew)
+    return rooms_path, students_path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--students", type=int, default=10000)
+    parser.add_argument("--rooms", type=int, help="по умолчанию students / 10")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--invalid-ratio", type=float, default=0.0)
+    parser.add_argument("--skew", type=float, default=0.0)
+    parser.add_argument("--out-dir", default="data/bench")
+    args = parser.parse_args()
+    for path in generate_dataset(args.out_dir, args.students, args.rooms, args.seed,
+                                 args.invalid_ratio, args.skew, reuse=False):
+        print(f"{path}: {os.path.getsize(path) / 1024 / 1024:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,3 @@
+CREATE INDEX IF NOT EXISTS idx_students_room_id ON students(room_id);
+CREATE INDEX IF NOT EXISTS idx_students_sex      ON students(sex);
+CREATE INDEX IF NOT EXISTS idx_students_birthday ON students(birthday);
\ No newline at end of file
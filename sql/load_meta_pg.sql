@@ -0,0 +1,18 @@
+CREATE TABLE IF NOT EXISTS load_files (
+  kind        TEXT NOT NULL,
+  path        TEXT NOT NULL,
+  fingerprint TEXT NOT NULL,
+  loaded_at   TIMESTAMPTZ NOT NULL DEFAULT now(),
+  PRIMARY KEY (kind, path)
+);
+
+CREATE TABLE IF NOT EXISTS load_row_hashes (
+  kind     TEXT    NOT NULL,
+  id       INTEGER NOT NULL,
+  row_hash BIGINT  NOT NULL,
+  PRIMARY KEY (kind, id)
+);
+
+-- файл, из которого строка загружена последней: delete_missing удаляет только
+-- строки своего файла ('' — строки, загруженные до появления столбца)
+ALTER TABLE load_row_hashes ADD COLUMN IF NOT EXISTS path TEXT NOT NULL DEFAULT '';
@@ -0,0 +1,18 @@
+CREATE TABLE IF NOT EXISTS load_files (
+  kind        TEXT NOT NULL,
+  path        TEXT NOT NULL,
+  fingerprint TEXT NOT NULL,
+  loaded_at   TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (kind, path)
+);
+
+CREATE TABLE IF NOT EXISTS load_row_hashes (
+  kind     TEXT    NOT NULL,
+  id       INTEGER NOT NULL,
+  row_hash INTEGER NOT NULL,
+  -- файл, из которого строка загружена последней: delete_missing удаляет только
+  -- строки своего файла ('' — строки, загруженные до появления столбца);
+  -- в таблицы старых баз столбец добавляет schema_service (SQLITE_ADDED_COLUMNS)
+  path     TEXT    NOT NULL DEFAULT '',
+  PRIMARY KEY (kind, id)
+);
@@ -0,0 +1,17 @@
+CREATE TABLE IF NOT EXISTS room_stats (
+  room_id            INTEGER PRIMARY KEY,
+  student_count      INTEGER NOT NULL,
+  male_count         INTEGER NOT NULL,
+  female_count       INTEGER NOT NULL,
+  min_birthday       DATE,
+  max_birthday       DATE,
+  birthday_epoch_sum BIGINT  NOT NULL  -- сумма (birthday - 1970-01-01) в днях
+);
+
+-- версия студентов (data_versions, kind = 'students'), по которой построена room_stats:
+-- если загрузка прошла без --stats, версии расходятся и таблица перестраивается
+CREATE TABLE IF NOT EXISTS room_stats_version (
+  id           BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+  data_version TEXT,
+  built_at     TIMESTAMPTZ NOT NULL DEFAULT now()
+);
@@ -9,4 +9,11 @@ CREATE TABLE IF NOT EXISTS students (
   sex       CHAR(1) NOT NULL CHECK (sex IN ('M','F')),
   birthday  DATE NOT NULL,
   room_id   INTEGER NOT NULL REFERENCES rooms(id)
+);
+
+-- версия данных: токен меняется при каждой загрузке, изменившей таблицу (кэш отчётов)
+CREATE TABLE IF NOT EXISTS data_versions (
+  kind       TEXT PRIMARY KEY,
+  version    TEXT NOT NULL,
+  changed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
 );
\ No newline at end of file
@@ -0,0 +1,20 @@
+CREATE TABLE IF NOT EXISTS rooms (
+  id   INTEGER PRIMARY KEY,
+  name TEXT NOT NULL
+);
+
+-- birthday хранится как TEXT в ISO-формате (YYYY-MM-DD): так его понимают strftime/julianday
+CREATE TABLE IF NOT EXISTS students (
+  id        INTEGER PRIMARY KEY,
+  name      TEXT NOT NULL,
+  sex       TEXT NOT NULL CHECK (sex IN ('M','F')),
+  birthday  TEXT NOT NULL,
+  room_id   INTEGER NOT NULL REFERENCES rooms(id)
+);
+
+-- версия данных: токен меняется при каждой загрузке, изменившей таблицу (кэш отчётов)
+CREATE TABLE IF NOT EXISTS data_versions (
+  kind       TEXT PRIMARY KEY,
+  version    TEXT NOT NULL,
+  changed_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
\ No newline at end of file
@@ -0,0 +1,68 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+
+class FakeAsyncDB:
+    """Фейковая асинхронная БД: собирает вызовы, как FakeDB, и эмулирует transaction()."""
+    def __init__(self, delay=0.0):
+        self.executed = []        # [(sql, params)]
+        self.executed_many = []   # [(sql, list_of_tuples)]
+        self.queries = []         # [(sql, params)]
+        self.copied = []          # [(table, columns, list_of_tuples)]
+        self.transactions = 0
+        self.delay = delay        # задержка query, чтобы проверить одновременность
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._query_result = []
+        self._query_results_by_sql = []  # [(фрагмент sql, rows)]
+
+    async def __aenter__(self): return self
+    async def __aexit__(self, exc_type, exc, tb): pass
+
+    async def connect(self): pass
+    async def close(self): pass
+
+    async def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+        return -1  # число строк неизвестно
+
+    async def executemany(self, sql, params_seq):
+        seq = list(params_seq)
+        self.executed_many.append((sql, seq))
+        return len(seq)
+
+    async def copy_rows(self, table, columns, rows):
+        if hasattr(rows, "__aiter__"):
+            seq = [row async for row in rows]
+        else:
+            seq = list(rows)
+        self.copied.append((table, tuple(columns), seq))
+        return len(seq)
+
+    async def query(self, sql, params=None):
+        self.queries.append((sql, params))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        for fragment, rows in self._query_results_by_sql:
+            if fragment in sql:
+                if isinstance(rows, Exception):
+                    raise rows
+                return list(rows)
+        return list(self._query_result)
+
+    @asynccontextmanager
+    async def transaction(self):
+        self.transactions += 1
+        yield
+
+    # helper
+    def set_query_result(self, rows):
+        self._query_result = rows
+
+    def set_query_result_for(self, fragment, rows):
+        """Результат (или исключение) для запросов, содержащих фрагмент sql."""
+        self._query_results_by_sql.append((fragment, rows))
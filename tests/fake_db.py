@@ -1,10 +1,12 @@
 class FakeDB:
-    """Фейковая БД: собирает вызовы execute/executemany/query, эмулирует transaction()."""
+    """Фейковая БД: собирает вызовы execute/executemany/query/copy_rows, эмулирует transaction()."""
     def __init__(self):
         self.executed = []        # [(sql, params)]
         self.executed_many = []   # [(sql, list_of_tuples)]
         self.queries = []         # [(sql, params)]
+        self.copied = []          # [(table, columns, list_of_tuples)]
         self._query_result = []
+        self._query_results_by_sql = []  # [(фрагмент sql, rows)]
 
     # совместимость с контекстным менеджером
     def __enter__(self): return self
@@ -15,13 +17,27 @@ class FakeDB:
 
     def execute(self, sql, params=None):
         self.executed.append((sql, params))
+        return -1  # число строк неизвестно
 
     def executemany(self, sql, params_seq):
         seq = list(params_seq)
         self.executed_many.append((sql, seq))
+        return len(seq)
+
+    def iter_query(self, sql, params=None, chunk_size=1000, row_type="dict"):
+        for row in self.query(sql, params):
+            yield tuple(row.values()) if row_type == "tuple" else row
+
+    def copy_rows(self, table, columns, rows):
+        seq = list(rows)
+        self.copied.append((table, tuple(columns), seq))
+        return len(seq)
 
     def query(self, sql, params=None):
         self.queries.append((sql, params))
+        for fragment, rows in self._query_results_by_sql:
+            if fragment in sql:
+                return list(rows)
         return list(self._query_result)
 
     # транзакция
@@ -35,4 +51,8 @@ class FakeDB:
 
     # helper
     def set_query_result(self, rows):
-        self._query_result = rows
\ No newline at end of file
+        self._query_result = rows
+
+    def set_query_result_for(self, fragment, rows):
+        """Результат для запросов, содержащих фрагмент sql (проверяется раньше общего)."""
+        self._query_results_by_sql.append((fragment, rows))
\ No newline at end of file
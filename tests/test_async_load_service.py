@@ -0,0 +1,73 @@
+import unittest, json, tempfile, os
+from datetime import date
+from tests.fake_async_db import FakeAsyncDB
+from app.services import async_load_service
+
+STUDENTS = [
+    {"id": 10, "name": "Ann", "sex": "F", "birthday": "1999-05-01", "room": 1},
+    {"id": 11, "name": "Bob", "sex": "M", "birthday": "1998-01-10", "room": 2},
+    {"id": 12, "name": "Bad", "sex": "X", "birthday": "1998-01-10", "room": 2},
+]
+
+class TestAsyncLoadService(unittest.IsolatedAsyncioTestCase):
+    def _write(self, data):
+        with tempfile.NamedTemporaryFile("w+", delete=False, suffix=".json") as f:
+            json.dump(data, f)
+        self.addCleanup(os.unlink, f.name)
+        return f.name
+
+    async def test_load_rooms_batches(self):
+        db = FakeAsyncDB()
+        path = self._write([{"id": i, "name": f"Room #{i}"} for i in range(5)])
+        self.assertEqual(5, await async_load_service.load_rooms(db, path, batch_size=2))
+        self.assertEqual([2, 2, 1], [len(batch) for _, batch in db.executed_many])
+        self.assertIn("INSERT INTO rooms", db.executed_many[0][0])
+        self.assertEqual(1, db.transactions)
+        sql, (kind, _) = db.executed[-1]
+        self.assertIn("INSERT INTO data_versions", sql)
+        self.assertEqual("rooms", kind)
+
+    async def test_load_students_copy(self):
+        db = FakeAsyncDB()
+        path = self._write({"students": STUDENTS})
+        self.assertEqual(2, await async_load_service.load_students(
+            db, path, batch_size=1, method="copy"))
+        table, columns, rows = db.copied[0]
+        self.assertEqual("students_stage", table)
+        self.assertEqual(("id", "name", "sex", "birthday", "room_id"), columns)
+        self.assertEqual((10, "Ann", "F", date(1999, 5, 1), 1), rows[0])
+        self.assertIn("CREATE TEMP TABLE students_stage", db.executed[0][0])
+        self.assertIn("INSERT INTO students", db.executed[-3][0])
+        self.assertIn("DROP TABLE pg_temp.students_stage", db.executed[-2][0])
+        self.assertIn("INSERT INTO data_versions", db.executed[-1][0])
+
+    async def test_empty_file_keeps_version(self):
+        db = FakeAsyncDB()
+        self.assertEqual(0, await async_load_service.load_rooms(db, self._write([])))
+        self.assertFalse(db.executed)
+
+    async def test_reload_without_changes_keeps_version(self):
+        db = FakeAsyncDB()
+        async def nothing_inserted(sql, params_seq):
+            db.executed_many.append((sql, list(params_seq)))
+            return 0  # ON CONFLICT DO NOTHING: все строки уже есть
+        db.executemany = nothing_inserted
+        path = self._write([{"id": 1, "name": "A"}])
+        self.assertEqual(1, await async_load_service.load_rooms(db, path))
+        self.assertFalse([sql for sql, _ in db.executed if "data_versions" in sql])
+
+    async def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            await async_load_service.load_rooms(FakeAsyncDB(), self._write([]), method="bulk")
+
+    async def test_writer_error_propagates(self):
+        db = FakeAsyncDB()
+        async def failing(sql, params_seq):
+            raise RuntimeError("write failed")
+        db.executemany = failing
+        path = self._write([{"id": i, "name": "R"} for i in range(10)])
+        with self.assertRaises(RuntimeError):
+            await async_load_service.load_rooms(db, path, batch_size=2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+from tests.fake_async_db import FakeAsyncDB
+from app.services import async_query_service as aqs
+
+class TestAsyncQueryService(unittest.IsolatedAsyncioTestCase):
+    async def test_reports_run_concurrently(self):
+        db = FakeAsyncDB(delay=0.01)
+        db.set_query_result([{"id": 1, "name": "R1"}])
+        timings = {}
+        result = await aqs.run_reports(db, timings=timings)
+        self.assertEqual(list(aqs.REPORTS), list(result))
+        self.assertEqual(4, db.max_in_flight)
+        self.assertEqual(set(aqs.REPORTS), set(timings))
+
+    async def test_error_isolated(self):
+        db = FakeAsyncDB()
+        db.set_query_result_for("LIMIT 5", RuntimeError("boom"))
+        db.set_query_result([{"id": 1, "name": "R1"}])
+        result = await aqs.run_reports(db)
+        self.assertEqual([], result["top5_young_avg"])
+        self.assertEqual([{"id": 1, "name": "R1"}], result["rooms_with_mixed_gender"])
+
+    async def test_combined(self):
+        db = FakeAsyncDB()
+        db.set_query_result([
+            {"id": 1, "name": "A", "count": 2, "avg_age_years": 20, "diff_age_years": 3,
+             "sex_count": 2},
+            {"id": 2, "name": "B", "count": 0, "avg_age_years": None, "diff_age_years": None,
+             "sex_count": 0},
+        ])
+        result = await aqs.run_reports(db, combined=True)
+        self.assertEqual(1, len(db.queries))
+        self.assertEqual([{"id": 1, "name": "A"}], result["rooms_with_mixed_gender"])
+        self.assertEqual(2, len(result["count_student_in_rooms"]))
+
+    async def test_unknown_report(self):
+        with self.assertRaises(ValueError):
+            await aqs.run_reports(FakeAsyncDB(), names=["nope"])
+
+if __name__ == "__main__":
+    unittest.main()
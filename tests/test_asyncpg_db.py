@@ -0,0 +1,26 @@
+import unittest
+from app.adapters.asyncpg_db import AsyncPostgresDB, _counting_statement, _rowcount, _to_dollar
+
+class TestAsyncPostgresDB(unittest.TestCase):
+    def test_to_dollar(self):
+        self.assertEqual("VALUES ($1, $2) -- 100%", _to_dollar("VALUES (%s, %s) -- 100%%"))
+        self.assertEqual("WHERE id = ANY($1)", _to_dollar("WHERE id = ANY(%s)"))
+
+    def test_rowcount_from_status(self):
+        self.assertEqual(5, _rowcount("INSERT 0 5"))
+        self.assertEqual(0, _rowcount("UPDATE 0"))
+        self.assertEqual(-1, _rowcount("CREATE TABLE"))
+        self.assertEqual(-1, _rowcount("SELECT 3"))
+
+    def test_counting_statement(self):
+        self.assertEqual("\nINSERT INTO t(x) VALUES ($1)\nON CONFLICT (x) DO NOTHING RETURNING 1",
+                         _counting_statement("\nINSERT INTO t(x) VALUES (%s)\nON CONFLICT (x) DO NOTHING;\n"))
+        self.assertIsNone(_counting_statement("DELETE FROM t RETURNING x"))
+        self.assertIsNone(_counting_statement("SELECT 1"))
+
+    def test_pool_sizes(self):
+        with self.assertRaises(ValueError):
+            AsyncPostgresDB("postgresql://x", min_size=5, max_size=2)
+
+if __name__ == "__main__":
+    unittest.main()
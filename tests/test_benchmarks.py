@@ -0,0 +1,55 @@
+import unittest, tempfile, os, shutil, collections, logging
+from benchmarks.generate import generate_dataset
+from benchmarks.bench_suite import compare
+from benchmarks.bench_decode import _batch, _per_record
+from app.services.json_stream import iter_json_items
+from app.services.load_common import iter_rows
+
+class TestGenerate(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+
+    def _read(self, path):
+        with open(path, "rb") as f:
+            return f.read()
+
+    def test_deterministic_by_seed(self):
+        first = generate_dataset(os.path.join(self.tmp, "a"), 2000, seed=7, skew=1.0)
+        second = generate_dataset(os.path.join(self.tmp, "b"), 2000, seed=7, skew=1.0)
+        other = generate_dataset(os.path.join(self.tmp, "c"), 2000, seed=8, skew=1.0)
+        self.assertEqual(self._read(first[1]), self._read(second[1]))
+        self.assertNotEqual(self._read(first[1]), self._read(other[1]))
+
+    def test_invalid_ratio_and_skew(self):
+        rooms, students = generate_dataset(self.tmp, 5000, rooms=50,
+                                           invalid_ratio=0.1, skew=1.5)
+        self.assertEqual(5000, sum(1 for _ in iter_json_items(students, "students")))
+        logging.disable(logging.CRITICAL)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        rows = list(iter_rows(iter_json_items(students, "students"), "students"))
+        self.assertTrue(4300 < len(rows) < 4700)
+        room_ids = {row[0] for row in iter_rows(iter_json_items(rooms, "rooms"), "rooms")}
+        self.assertEqual(set(range(50)), room_ids)
+        busiest = collections.Counter(row[4] for row in rows).most_common(1)[0][1]
+        self.assertGreater(busiest, len(rows) / 5)  # равномерно было бы ~2%
+
+    def test_decode_paths_agree(self):
+        _, students = generate_dataset(self.tmp, 3000, invalid_ratio=0.2)
+        items = list(iter_json_items(students, "students"))
+        valid = _per_record(items)
+        self.assertEqual(valid, _batch(items, 128))
+        self.assertEqual(valid, _batch(items, 128, columnar=True))
+
+    def test_compare_reports_regressions(self):
+        baseline = {"results": [{"size": 10, "stage": "parse", "best_s": 1.0},
+                                {"size": 10, "stage": "load", "best_s": 1.0}]}
+        current = {"results": [{"size": 10, "stage": "parse", "best_s": 1.05},
+                               {"size": 10, "stage": "load", "best_s": 1.5},
+                               {"size": 20, "stage": "load", "best_s": 9.0}]}
+        regressions = compare(current, baseline, 0.1)
+        self.assertEqual(1, len(regressions))
+        self.assertTrue(regressions[0].startswith("load (размер 10)"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+import unittest, tempfile, os, json, shutil, gzip, contextlib, io
+from unittest import mock
+from app.cli import main as cli
+from app.services import query_service
+
+class TestCli(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.rooms = self._json("rooms.json", [{"id": 1, "name": "A"}, {"id": 2, "name": "B"}])
+        self.students = self._json("students.json", [
+            {"id": 1, "name": "S1", "sex": "M", "birthday": "2000-01-01T00:00:00.000000",
+             "room": 1},
+            {"id": 2, "name": "S2", "sex": "F", "birthday": "2002-06-01T00:00:00.000000",
+             "room": 1},
+        ])
+        self.out = os.path.join(self.tmp, "out")
+        self.common = ["--sqlite", os.path.join(self.tmp, "u.db"),
+                       "--log-file", os.path.join(self.tmp, "app.log")]
+
+    def _json(self, name, data):
+        path = os.path.join(self.tmp, name)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        return path
+
+    def _main(self, *argv):
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            return cli.main([*self.common, *argv])
+
+    def test_run_fans_out_to_all_formats_with_one_query_pass(self):
+        with mock.patch.object(cli.query_service, "run_reports",
+                               wraps=query_service.run_reports) as run_reports:
+            code = self._main("run", "--students", self.students, "--rooms", self.rooms,
+                              "--formats", "json", "xml", "ndjson", "--output-dir", self.out)
+        self.assertEqual(0, code)
+        run_reports.assert_called_once()
+        self.assertEqual({"result.json", "result.xml", "result.ndjson"}, set(os.listdir(self.out)))
+        with open(os.path.join(self.out, "result.json"), encoding="utf-8") as f:
+            result = json.load(f)
+        self.assertEqual({"inserted_rooms": 2, "inserted_students": 2}, result["meta"])
+        self.assertEqual([{"id": 1, "name": "A"}], result["rooms_with_mixed_gender"])
+
+    def test_load_then_report(self):
+        self.assertEqual(0, self._main("load", "--students", self.students,
+                                       "--rooms", self.rooms, "--batch-size", "1"))
+        code = self._main("report", "--formats", "json", "--reports", "count_student_in_rooms",
+                          "--combined",
+                          "--compression", "gzip", "--output-dir", self.out, "--output", "r")
+        self.assertEqual(0, code)
+        with gzip.open(os.path.join(self.out, "r.json.gz"), "rt", encoding="utf-8") as f:
+            result = json.load(f)
+        self.assertEqual(["count_student_in_rooms"], list(result))
+        self.assertEqual([2, 0], [r["count"] for r in result["count_student_in_rooms"]])
+
+    def test_deferred_indexes_and_migrations_skipped_on_rerun(self):
+        args = ("run", "--students", self.students, "--rooms", self.rooms,
+                "--defer-indexes", "--output-dir", self.out)
+        migrate, calls = cli.schema_service.migrate, []
+
+        def recording(db, names, *rest, **kw):
+            applied = migrate(db, names, *rest, **kw)
+            calls.append((names, applied, bool(db.query("SELECT id FROM students"))))
+            return applied
+        with mock.patch.object(cli.schema_service, "migrate", side_effect=recording):
+            self.assertEqual(0, self._main(*args))
+            # индексы строятся после загрузки студентов
+            self.assertEqual([(["schema"], ["schema"], False),
+                              (["indexes"], ["indexes"], True)], calls)
+            calls.clear()
+            self.assertEqual(0, self._main(*args))
+        self.assertEqual([(["schema"], [], True), (["indexes"], [], True)], calls)
+
+    def test_metrics_summary_written(self):
+        path = os.path.join(self.tmp, "metrics", "run.prom")
+        self.addCleanup(cli.metrics.reset)
+        self.addCleanup(cli.metrics.disable)
+        code = cli.main(["--metrics", path, *self.common, "run", "--students", self.students,
+                         "--rooms", self.rooms, "--formats", "json", "--output-dir", self.out])
+        self.assertEqual(0, code)
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        self.assertIn('load_rows_total{kind="students",stage="write"} 2', text)
+        self.assertIn('export_seconds_count{format="json"} 1', text)
+
+    def test_rejects_quarantine(self):
+        students = self._json("bad.json", [
+            {"id": 3, "name": "S3", "sex": "X", "birthday": "2000-01-01", "room": 1}])
+        quarantine = os.path.join(self.tmp, "rejects.ndjson")
+        self.assertEqual(0, self._main("load", "--students", students, "--rooms", self.rooms,
+                                       "--rejects", quarantine))
+        with open(quarantine, encoding="utf-8") as f:
+            record = json.loads(f.readline())
+        self.assertEqual(("students", "invalid_sex", 1), (record["kind"], record["reason"],
+                                                          record["index"]))
+
+    def test_report_cache_dir(self):
+        self.assertEqual(0, self._main("load", "--students", self.students, "--rooms", self.rooms))
+        args = ("report", "--cache-dir", os.path.join(self.tmp, "cache"), "--output-dir", self.out)
+        self.assertEqual(0, self._main(*args))
+        self.assertEqual(4, len(os.listdir(os.path.join(self.tmp, "cache"))))
+        with mock.patch.object(query_service, "_query_try") as query:
+            self.assertEqual(0, self._main(*args))
+        query.assert_not_called()
+
+    def test_missing_file_returns_error_code(self):
+        code = self._main("load", "--students", os.path.join(self.tmp, "nope.json"),
+                          "--rooms", self.rooms)
+        self.assertEqual(1, code)
+
+    def test_export_all_isolates_failures(self):
+        broken = mock.Mock(**{"dump.side_effect": OSError("disk full")})
+        real = cli._make_exporter
+        with mock.patch.object(cli, "_make_exporter",
+                               side_effect=lambda form, c=None: broken if form == "xml"
+                               else real(form, c)):
+            with self.assertRaises(RuntimeError):
+                cli.export_all({"q": [{"id": 1}]}, ["xml", "json"], self.out, "r")
+        self.assertTrue(os.path.exists(os.path.join(self.out, "r.json")))
+
+    def test_invalid_flag_combinations(self):
+        with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            cli.main(["run", "--students", "s", "--rooms", "r", "--delete-missing"])
+        with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            cli.main(["report", "--formats", "yaml"])
+
+    def test_no_arguments_starts_interactive_mode(self):
+        with mock.patch.object(cli, "app") as app:
+            self.assertEqual(0, cli.main([]))
+        app.assert_called_once()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest, tempfile, os, json, shutil, gzip, bz2, lzma
+from app.adapters.compression import open_output, resolve_codec
+from app.adapters.export_arrow import ArrowExporter, pa
+from app.adapters.export_json import JsonExporter
+from app.adapters.export_ndjson import NdjsonExporter
+from app.adapters.export_xml import XmlExporter
+
+class TestCompression(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.data = {"rooms": [{"id": i, "name": f"Комната #{i}"} for i in range(50)]}
+
+    def _path(self, name):
+        return os.path.join(self.dir, name)
+
+    def test_resolve_codec(self):
+        self.assertEqual("gzip", resolve_codec("a.json.gz"))
+        self.assertEqual("bz2", resolve_codec("a.XML.BZ2"))
+        self.assertEqual("lzma", resolve_codec("a.ndjson.xz"))
+        self.assertIsNone(resolve_codec("a.json"))
+        self.assertIsNone(resolve_codec("a.json.gz", "none"))
+        self.assertEqual("lzma", resolve_codec("a.json", "lzma"))
+        with self.assertRaises(ValueError):
+            resolve_codec("a.json", "zip")
+
+    def test_invalid_level(self):
+        with self.assertRaises(ValueError):
+            open_output(self._path("a.bz2"), level=0)
+        with self.assertRaises(ValueError):
+            open_output(self._path("a.gz"), level=10)
+
+    def test_exporters_round_trip(self):
+        plain = self._path("plain.json")
+        JsonExporter().dump(self.data, plain)
+        with open(plain, "rb") as f:
+            expected = f.read()
+        for extension, module in ((".gz", gzip), (".bz2", bz2), (".xz", lzma)):
+            path = self._path("result.json" + extension)
+            JsonExporter().dump(self.data, path)
+            with module.open(path, "rb") as f:
+                self.assertEqual(expected, f.read())
+
+    def test_explicit_codec_overrides_extension(self):
+        path = self._path("result.ndjson")
+        NdjsonExporter(compression="gzip", level=1).dump(self.data, path)
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f]
+        self.assertEqual(50, len(lines))
+        self.assertEqual({"id": 0, "name": "Комната #0"}, lines[0]["row"])
+        raw = self._path("raw.xml.gz")
+        XmlExporter(compression="none").dump(self.data, raw)
+        with open(raw, "rb") as f:
+            self.assertTrue(f.read().startswith(b"<?xml"))
+
+    def test_xml_tree_mode_compressed(self):
+        plain, packed = self._path("a.xml"), self._path("a.xml.xz")
+        XmlExporter(streaming=False).dump(self.data, plain)
+        XmlExporter(streaming=False).dump(self.data, packed)
+        with open(plain, "rb") as f, lzma.open(packed, "rb") as g:
+            self.assertEqual(f.read(), g.read())
+
+    @unittest.skipUnless(pa is not None, "pyarrow не установлен")
+    def test_arrow_ipc_compression(self):
+        ArrowExporter(compression="zstd").dump(self.data, self.dir)
+        with pa.memory_map(self._path("rooms.arrow")) as source:
+            table = pa.ipc.open_file(source).read_all()
+        self.assertEqual(list(range(50)), table.column("id").to_pylist())
+        with self.assertRaises(ValueError):
+            ArrowExporter(compression="gzip")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,7 @@
 import unittest
 from datetime import date
-from app.domain.entities import student_from_json, room_from_json
+from app.domain.entities import (InvalidRecord, decode_rooms, decode_students, parse_birthday,
+                                 parse_room, student_from_json, room_from_json)
 
 class TestEntities(unittest.TestCase):
     def test_room_from_json_ok(self):
@@ -27,5 +28,82 @@ class TestEntities(unittest.TestCase):
         with self.assertRaises(ValueError):
             student_from_json({"id": 1, "name": "X", "sex": "M", "birthday": "2000-01-01"})
 
+    def test_reason_codes(self):
+        cases = {
+            "invalid_sex": {"id": 1, "name": "X", "sex": "Z", "birthday": "2000-01-01",
+                            "room_id": 1},
+            "invalid_birthday": {"id": 1, "name": "X", "sex": "M", "birthday": "01.01.2000",
+                                 "room_id": 1},
+            "invalid_value": {"id": "x", "name": "X", "sex": "M", "birthday": "2000-01-01",
+                              "room_id": 1},
+            "missing_field": {"id": 1, "name": "X", "sex": "M", "room_id": 1},
+        }
+        for reason, obj in cases.items():
+            with self.assertRaises(InvalidRecord) as ctx:
+                student_from_json(obj)
+            self.assertEqual(reason, ctx.exception.reason)
+        with self.assertRaises(InvalidRecord) as ctx:
+            parse_room({"name": "no id"})
+        self.assertEqual("missing_field", ctx.exception.reason)
+        self.assertIsNone(room_from_json({"id": "x"}))
+
+    def test_decode_students_matches_student_from_json(self):
+        base = {"id": 1, "name": "A", "sex": "F", "birthday": "2011-08-22T00:00:00.000000",
+                "room": 3}
+        items = [
+            base,
+            {**base, "id": "7"},                        # приводится к int
+            {**base, "id": True},                       # bool — тоже int
+            {**base, "room_id": 5},                     # room_id важнее room
+            {**base, "room_id": None},                  # явный None — поле отсутствует
+            {**base, "name": 42},                       # имя приводится к str
+            {**base, "sex": "X"},
+            {**base, "sex": ["M"]},
+            {**base, "birthday": "22.08.2011"},
+            {**base, "birthday": 20110822},
+            {**base, "room": "x"},
+            {**base, "id": float("inf")},               # int(inf) — OverflowError
+            {**base, "room": float("-inf")},
+            {**base, "id": float("nan")},
+            {k: v for k, v in base.items() if k != "name"},
+            "junk",
+        ]
+        rows, rejects = decode_students(items, start=10)
+        expected, expected_rejects = [], []
+        for index, obj in enumerate(items, 10):
+            if not isinstance(obj, dict):
+                expected_rejects.append((index, "not_a_dict"))
+                continue
+            try:
+                s = student_from_json(obj)
+            except InvalidRecord as e:
+                expected_rejects.append((index, e.reason))
+                continue
+            expected.append((s.id, s.name, s.sex, s.birthday, s.room_id))
+        self.assertEqual(expected, rows)
+        self.assertEqual(expected_rejects, [(r[0], r[2]) for r in rejects])
+        self.assertIs(items[-1], rejects[-1][1])
+        self.assertEqual(4, [r[2] for r in rejects].count("invalid_value"))  # "x", inf, -inf, nan
+
+    def test_decode_columnar_and_rooms(self):
+        columns, rejects = decode_students([
+            {"id": 1, "name": "A", "sex": "M", "birthday": "2000-01-02", "room_id": 7}],
+            columnar=True)
+        self.assertEqual(([1], ["A"], ["M"], [date(2000, 1, 2)], [7]), columns)
+        self.assertEqual([], rejects)
+        self.assertEqual(([], []), decode_rooms([], columnar=True)[0])
+        rows, rejects = decode_rooms([{"id": 1, "name": " A "}, {"id": "2"}, {"name": "x"}, 5,
+                                      {"id": float("inf")}])
+        self.assertEqual([(1, "A"), (2, "")], rows)
+        self.assertEqual([(3, "missing_field"), (4, "not_a_dict"), (5, "invalid_value")],
+                         [(r[0], r[2]) for r in rejects])
+
+    def test_parse_birthday_is_cached(self):
+        parse_birthday.cache_clear()
+        self.assertEqual(date(2011, 8, 22), parse_birthday("2011-08-22T00:00:00.000000"))
+        self.assertIsNone(parse_birthday("22.08.2011"))
+        parse_birthday("2011-08-22T00:00:00.000000")
+        self.assertEqual(1, parse_birthday.cache_info().hits)
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -1,7 +1,11 @@
-import unittest, tempfile, os, json
+import unittest, tempfile, os, json, shutil, tracemalloc
+from collections import namedtuple
 from datetime import date, timedelta
+from decimal import Decimal
 from xml.etree import ElementTree as ET
 from app.adapters.export_json import JsonExporter
+from app.adapters.export_ndjson import NdjsonExporter
+from app.adapters.export_arrow import ArrowExporter, pa
 from app.adapters.export_xml import XmlExporter
 
 class TestExporters(unittest.TestCase):
@@ -22,6 +26,18 @@ class TestExporters(unittest.TestCase):
         finally:
             os.unlink(f.name)
 
+    def test_exporters_accept_row_iterators(self):
+        for exporter, suffix in ((JsonExporter(), ".json"), (XmlExporter(), ".xml")):
+            f = tempfile.NamedTemporaryFile("w+", delete=False, suffix=suffix)
+            f.close()
+            try:
+                exporter.dump({"rooms_counts": iter([{"id": 1, "count": 2}])}, f.name)
+                text = open(f.name, encoding="utf-8").read()
+                self.assertIn("count", text)
+                self.assertIn("2", text)
+            finally:
+                os.unlink(f.name)
+
     def test_xml_export(self):
         f = tempfile.NamedTemporaryFile("w+", delete=False, suffix=".xml")
         f.close()
@@ -34,5 +50,133 @@ class TestExporters(unittest.TestCase):
         finally:
             os.unlink(f.name)
 
+    def _dump_text(self, exporter, data, suffix):
+        f = tempfile.NamedTemporaryFile("w+", delete=False, suffix=suffix)
+        f.close()
+        try:
+            exporter.dump(data, f.name)
+            with open(f.name, encoding="utf-8") as result:
+                return result.read()
+        finally:
+            os.unlink(f.name)
+
+    def test_json_streaming_matches_json_dump(self):
+        for indent in (2, None):
+            streamed = self._dump_text(JsonExporter(indent=indent), {
+                **self.data, "it": iter([{"a": 1}, {"b": "ю"}]), "empty": iter([])}, ".json")
+            expected = self._dump_text(JsonExporter(indent=indent, streaming=False), {
+                **self.data, "it": [{"a": 1}, {"b": "ю"}], "empty": []}, ".json")
+            self.assertEqual(expected, streamed)
+
+    def test_json_namedtuple_rows(self):
+        Row = namedtuple("Row", "id name")
+        for streaming in (True, False):
+            text = self._dump_text(JsonExporter(indent=None, streaming=streaming),
+                                   {"rooms": iter([Row(1, "A")])}, ".json")
+            self.assertEqual('{"rooms":[{"id":1,"name":"A"}]}', text)
+
+    def test_json_compact(self):
+        text = self._dump_text(JsonExporter(indent=None), {"q": [{"id": 1}], "m": {}}, ".json")
+        self.assertEqual('{"q":[{"id":1}],"m":{}}', text)
+
+    def test_ndjson_export(self):
+        Row = namedtuple("Row", "id name")
+        text = self._dump_text(NdjsonExporter(), {
+            "rooms": iter([Row(1, "Комната"), Row(2, "B")]), "meta": self.data["meta"]},
+            ".ndjson")
+        lines = [json.loads(line) for line in text.splitlines()]
+        self.assertEqual({"section": "rooms", "row": {"id": 1, "name": "Комната"}}, lines[0])
+        self.assertEqual("meta", lines[2]["section"])
+        self.assertEqual("2025-10-10", lines[2]["row"]["today"])
+        self.assertEqual(3, len(lines))
+
+    @unittest.skipUnless(pa is not None, "pyarrow не установлен")
+    def test_arrow_export_typed_columns(self):
+        out = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, out)
+        rows = iter([{"id": 1, "avg": Decimal("12"), "day": date(2000, 1, 2)},
+                     {"id": 2, "avg": None, "day": None},
+                     {"id": 3, "avg": 1.5, "day": date(2001, 1, 1)}])
+        ArrowExporter(batch_size=2).dump({"rooms": rows, "meta": self.data["meta"]}, out)
+        with pa.memory_map(os.path.join(out, "rooms.arrow")) as source:
+            table = pa.ipc.open_file(source).read_all()
+        self.assertEqual(pa.int64(), table.schema.field("id").type)
+        self.assertEqual(pa.float64(), table.schema.field("avg").type)
+        self.assertEqual(pa.date32(), table.schema.field("day").type)
+        self.assertEqual([12.0, None, 1.5], table.column("avg").to_pylist())
+        with pa.memory_map(os.path.join(out, "meta.arrow")) as source:
+            meta = pa.ipc.open_file(source).read_all()
+        self.assertEqual([date(2025, 10, 10)], meta.column("today").to_pylist())
+
+    @unittest.skipUnless(pa is not None, "pyarrow не установлен")
+    def test_arrow_export_null_first_batch(self):
+        out = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, out)
+        rows = iter([{"id": 1, "avg": None}, {"id": 2, "avg": None},
+                     {"id": 3, "avg": 1}, {"id": 4, "avg": 2.5}, {"id": 5, "avg": 3}])
+        ArrowExporter(batch_size=2).dump({"rooms": rows}, out)
+        with pa.memory_map(os.path.join(out, "rooms.arrow")) as source:
+            table = pa.ipc.open_file(source).read_all()
+        self.assertEqual(pa.float64(), table.schema.field("avg").type)
+        self.assertEqual([None, None, 1.0, 2.5, 3.0], table.column("avg").to_pylist())
+
+    @unittest.skipUnless(pa is not None, "pyarrow не установлен")
+    def test_arrow_export_later_batches_match_schema(self):
+        out = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, out)
+        exporter = ArrowExporter(batch_size=2)
+        exporter.dump({"ok": iter([{"a": 1.5, "b": 1}, {"a": 2.0, "b": 2},
+                                   {"a": 3, "b": None}, {"a": None}])}, out)
+        with pa.memory_map(os.path.join(out, "ok.arrow")) as source:
+            table = pa.ipc.open_file(source).read_all()
+        self.assertEqual([1.5, 2.0, 3.0, None], table.column("a").to_pylist())
+        self.assertEqual([1, 2, None, None], table.column("b").to_pylist())
+        # int -> float в поздних пакетах потеряло бы дробную часть
+        with self.assertRaises(ValueError):
+            exporter.dump({"drift": iter([{"a": 1}, {"a": 2}, {"a": 2.5}, {"a": 3.7}])}, out)
+        with self.assertRaises(ValueError):
+            exporter.dump({"new_key": iter([{"a": 1}, {"a": 2}, {"a": 3, "b": 2}])}, out)
+        with self.assertRaises(ValueError):
+            exporter.dump({"strings": iter([{"a": 1}, {"a": 2}, {"a": "5"}])}, out)
+
+    def _xml_bytes(self, data, **options):
+        f = tempfile.NamedTemporaryFile("w+", delete=False, suffix=".xml")
+        f.close()
+        try:
+            XmlExporter(**options).dump(data, f.name)
+            with open(f.name, "rb") as result:
+                return result.read()
+        finally:
+            os.unlink(f.name)
+
+    def test_xml_streaming_matches_tree(self):
+        Row = namedtuple("Row", "id name")
+        tricky = {
+            'a"b\n<c>': [{"x": "<&>\"\t", "y": None, "z": ""}, 7, Row(3, "R"), {}],
+            "empty": [], "scalar": 5, "one": {"k": "v"},
+        }
+        for data in (self.data, tricky, {}):
+            for pretty in (True, False):
+                self.assertEqual(self._xml_bytes(data, streaming=False, pretty=pretty),
+                                 self._xml_bytes(data, streaming=True, pretty=pretty))
+
+    def test_xml_compact(self):
+        text = self._xml_bytes({"q": [{"id": 1}]}, pretty=False).decode("utf-8")
+        self.assertEqual("<?xml version='1.0' encoding='utf-8'?>\n"
+                         '<result><query name="q"><row><id>1</id></row></query></result>', text)
+
+    def test_xml_streaming_constant_memory(self):
+        rows = ({"id": i, "name": f"Room #{i}", "count": i % 7} for i in range(20000))
+        f = tempfile.NamedTemporaryFile("w+", delete=False, suffix=".xml")
+        f.close()
+        self.addCleanup(os.unlink, f.name)
+        tracemalloc.start()
+        try:
+            XmlExporter().dump({"count_student_in_rooms": rows}, f.name)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        self.assertLess(peak, 1 << 20)  # дерево на 20 000 строк заняло бы десятки МБ
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
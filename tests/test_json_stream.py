@@ -0,0 +1,34 @@
+import unittest, tempfile, os, json
+from app.services.json_stream import iter_json_items
+
+class TestJsonStream(unittest.TestCase):
+    def _write(self, text):
+        f = tempfile.NamedTemporaryFile("w", delete=False, suffix=".json", encoding="utf-8")
+        f.write(text); f.close()
+        self.addCleanup(os.unlink, f.name)
+        return f.name
+
+    def test_top_level_array_small_chunks(self):
+        items = [{"id": i, "name": f"Room #{i}"} for i in range(50)] + [12345, "x]"]
+        path = self._write(json.dumps(items, indent=2))
+        self.assertEqual(items, list(iter_json_items(path, "rooms", chunk_size=3)))
+
+    def test_wrapper_object(self):
+        path = self._write('{"meta": {"v": [1, 2]}, "students": [{"id": 1}, {"id": 2}], "x": 0}')
+        self.assertEqual([{"id": 1}, {"id": 2}], list(iter_json_items(path, "students", chunk_size=4)))
+
+    def test_empty_array(self):
+        self.assertEqual([], list(iter_json_items(self._write(" [ ] "), "rooms")))
+
+    def test_missing_key(self):
+        path = self._write('{"rooms": []}')
+        with self.assertRaises(ValueError):
+            list(iter_json_items(path, "students"))
+
+    def test_malformed(self):
+        path = self._write('[{"id": 1}, {"id": ')
+        with self.assertRaises(ValueError):
+            list(iter_json_items(path, "rooms"))
+
+if __name__ == "__main__":
+    unittest.main()
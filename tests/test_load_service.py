@@ -1,10 +1,13 @@
 import unittest, json, tempfile, os
 from tests.fake_db import FakeDB
-from app.services.load_service import _batched, load_rooms, load_students
+from app.services.load_common import batched, iter_rows
+from app.services.load_service import (_file_fingerprint, _iter_rows_parallel, _row_hash,
+                                       load_rooms, load_students)
+from app.services.reject_sink import RejectSink
 
 class TestLoadService(unittest.TestCase):
     def test_batched(self):
-        self.assertEqual(list(_batched([1,2,3,4,5], 2)), [[1,2],[3,4],[5]])
+        self.assertEqual(list(batched([1,2,3,4,5], 2)), [[1,2],[3,4],[5]])
 
     def test_load_rooms(self):
         db = FakeDB()
@@ -39,5 +42,184 @@ class TestLoadService(unittest.TestCase):
         finally:
             os.unlink(path)
 
+    def test_load_students_wrapper(self):
+        db = FakeDB()
+        payload = {"students": [
+            {"id": 10, "name": "Ann", "sex": "F", "birthday": "1999-05-01", "room": 1},
+            "broken",
+        ]}
+        with tempfile.NamedTemporaryFile("w+", delete=False, suffix=".json") as f:
+            json.dump(payload, f); path = f.name
+        try:
+            self.assertEqual(1, load_students(db, path))
+            self.assertEqual(1, db.executed_many[0][1][0][4])  # room -> room_id
+        finally:
+            os.unlink(path)
+
+    def test_load_students_copy(self):
+        db = FakeDB()
+        students = [
+            {"id": 10, "name": "Ann", "sex": "F", "birthday": "1999-05-01", "room_id": 1},
+            {"id": 11, "name": "Bob", "sex": "X", "birthday": "1998-01-10", "room_id": 2},
+        ]
+        with tempfile.NamedTemporaryFile("w+", delete=False, suffix=".json") as f:
+            json.dump(students, f); path = f.name
+        try:
+            inserted = load_students(db, path, method="copy")
+            self.assertEqual(1, inserted)
+            self.assertFalse(db.executed_many)
+            table, columns, rows = db.copied[0]
+            self.assertEqual("students_stage", table)
+            self.assertEqual(("id", "name", "sex", "birthday", "room_id"), columns)
+            self.assertEqual(10, rows[0][0])
+            self.assertIn("CREATE TEMP TABLE students_stage", db.executed[0][0])
+            self.assertIn("ON CONFLICT (id) DO NOTHING", db.executed[1][0])
+        finally:
+            os.unlink(path)
+
+    def test_parallel_validation_matches_sequential(self):
+        items = [
+            {"id": i, "name": f"S{i}", "sex": "MFX"[i % 3],
+             "birthday": "2000-01-02", "room_id": i % 7}
+            for i in range(200)
+        ] + ["not a dict"]
+        sequential, parallel = RejectSink(), RejectSink()
+        with self.assertLogs("app.services.reject_sink", level="ERROR"):
+            expected = list(iter_rows(items, "students", sequential))
+            got = list(_iter_rows_parallel(items, "students", workers=2, chunk_size=16,
+                                           rejects=parallel))
+        self.assertEqual(expected, got)
+        # невалидные sex='X' + не-словарь
+        self.assertEqual({"invalid_sex": 66, "not_a_dict": 1}, sequential.counts)
+        self.assertEqual(sequential.counts, parallel.counts)
+
+    def test_load_students_parallel(self):
+        db = FakeDB()
+        students = [{"id": i, "name": "A", "sex": "F", "birthday": "1999-05-01", "room_id": 1}
+                    for i in range(30)]
+        with tempfile.NamedTemporaryFile("w+", delete=False, suffix=".json") as f:
+            json.dump(students, f); path = f.name
+        try:
+            inserted = load_students(db, path, batch_size=100, workers=2, chunk_size=7)
+            self.assertEqual(30, inserted)
+            self.assertEqual(list(range(30)), [row[0] for row in db.executed_many[0][1]])
+        finally:
+            os.unlink(path)
+
+    def _students_file(self, count):
+        students = [{"id": i, "name": "A", "sex": "M", "birthday": "2001-02-03", "room_id": 1}
+                    for i in range(count)]
+        with tempfile.NamedTemporaryFile("w+", delete=False, suffix=".json") as f:
+            json.dump(students, f)
+        self.addCleanup(os.unlink, f.name)
+        return f.name
+
+    def test_load_students_pipeline(self):
+        db = FakeDB()
+        inserted = load_students(db, self._students_file(25), batch_size=10,
+                                 pipeline=True, queue_size=1)
+        self.assertEqual(25, inserted)
+        self.assertEqual([10, 10, 5], [len(batch) for _, batch in db.executed_many])
+
+    def test_load_students_pipeline_copy(self):
+        db = FakeDB()
+        inserted = load_students(db, self._students_file(25), batch_size=10,
+                                 method="copy", pipeline=True)
+        self.assertEqual(25, inserted)
+        self.assertEqual(list(range(25)), [row[0] for row in db.copied[0][2]])
+
+    def test_pipeline_writer_error_propagates(self):
+        class BrokenDB(FakeDB):
+            def executemany(self, sql, params_seq):
+                raise RuntimeError("db is down")
+        with self.assertRaises(RuntimeError):
+            load_students(BrokenDB(), self._students_file(50), batch_size=5,
+                          pipeline=True, queue_size=1)
+
+    def test_pipeline_reader_error_propagates(self):
+        with tempfile.NamedTemporaryFile("w+", delete=False, suffix=".json") as f:
+            f.write('[{"id": 1, "name": "Room #1"}, {"id": '); path = f.name
+        self.addCleanup(os.unlink, path)
+        with self.assertRaises(ValueError):
+            load_rooms(FakeDB(), path, batch_size=1, pipeline=True)
+
+    def _rooms_file(self, rooms):
+        with tempfile.NamedTemporaryFile("w+", delete=False, suffix=".json") as f:
+            json.dump(rooms, f)
+        self.addCleanup(os.unlink, f.name)
+        return f.name
+
+    def test_incremental_skips_unchanged_file(self):
+        path = self._rooms_file([{"id": 1, "name": "Room #1"}])
+        db = FakeDB()
+        db.set_query_result_for("FROM load_files",
+                                [{"fingerprint": _file_fingerprint(path)}])
+        self.assertEqual(0, load_rooms(db, path, incremental=True))
+        self.assertFalse(db.executed_many)
+        self.assertFalse(db.executed)
+
+    def test_incremental_upserts_only_changed_rows(self):
+        path = self._rooms_file([{"id": 1, "name": "Room #1"},
+                                 {"id": 2, "name": "Room #2 renamed"},
+                                 {"id": 3, "name": "Room #3"}])
+        db = FakeDB()
+        db.set_query_result_for("FROM load_files", [{"fingerprint": "old"}])
+        source = os.path.abspath(path)
+        db.set_query_result_for("FROM load_row_hashes", [
+            {"id": 1, "row_hash": _row_hash((1, "Room #1")), "path": source},
+            {"id": 2, "row_hash": _row_hash((2, "Room #2")), "path": source},
+            {"id": 4, "row_hash": _row_hash((4, "Room #4")), "path": source},
+            {"id": 5, "row_hash": _row_hash((5, "Room #5")), "path": "/other/rooms.json"},
+        ])
+        changed = load_rooms(db, path, incremental=True, delete_missing=True)
+        self.assertEqual(3, changed)  # 2 записаны (id 2, 3) + 1 удалена (id 4, id 5 из другого файла)
+        sql, rows = db.executed_many[0]
+        self.assertIn("DO UPDATE SET name", sql)
+        self.assertEqual([(2, "Room #2 renamed"), (3, "Room #3")], rows)
+        self.assertIn("INSERT INTO load_row_hashes", db.executed_many[1][0])
+        self.assertIn("DELETE FROM rooms", db.executed[0][0])
+        self.assertEqual(([4],), db.executed[0][1])
+        self.assertIn("INSERT INTO load_files", db.executed[-2][0])
+        self.assertIn("INSERT INTO data_versions", db.executed[-1][0])
+
+    def test_refresh_stats_for_touched_rooms(self):
+        students = [{"id": 1, "name": "A", "sex": "M", "birthday": "2001-02-03", "room_id": 5},
+                    {"id": 2, "name": "B", "sex": "F", "birthday": "2001-02-03", "room_id": 7}]
+        path = self._rooms_file(students)
+        db = FakeDB()
+        load_students(db, path, refresh_stats=True)
+        sql, params = db.executed[-2]
+        self.assertIn("INSERT INTO room_stats", sql)
+        self.assertEqual(([5, 7], [5, 7]), params)
+        self.assertIn("INSERT INTO room_stats_version", db.executed[-1][0])
+
+    def test_refresh_stats_rebuilds_stale_table(self):
+        students = [{"id": 1, "name": "A", "sex": "M", "birthday": "2001-02-03", "room_id": 5}]
+        path = self._rooms_file(students)
+        db = FakeDB()
+        db.set_query_result_for("AS needs_build", [{"needs_build": True}])
+        load_students(db, path, refresh_stats=True)
+        self.assertIn("TRUNCATE room_stats", db.executed[-2][0])
+        self.assertIn("INSERT INTO room_stats_version", db.executed[-1][0])
+
+    def test_refresh_stats_includes_previous_rooms_on_upsert(self):
+        students = [{"id": 1, "name": "A", "sex": "M", "birthday": "2001-02-03", "room_id": 5}]
+        path = self._rooms_file(students)
+        db = FakeDB()
+        db.set_query_result_for("FROM load_files", [])
+        db.set_query_result_for("FROM load_row_hashes", [])
+        db.set_query_result_for("SELECT DISTINCT room_id FROM students", [{"room_id": 9}])
+        load_students(db, path, incremental=True, refresh_stats=True)
+        stats_sql, params = [e for e in db.executed if "room_stats" in e[0]][0]
+        self.assertEqual(([5, 9], [5, 9]), params)
+
+    def test_delete_missing_requires_incremental(self):
+        with self.assertRaises(ValueError):
+            load_rooms(FakeDB(), "unused.json", delete_missing=True)
+
+    def test_load_unknown_method(self):
+        with self.assertRaises(ValueError):
+            load_rooms(FakeDB(), "unused.json", method="bulk")
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
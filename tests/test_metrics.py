@@ -0,0 +1,80 @@
+import unittest, tempfile, os, json, shutil
+from app import metrics
+from app.adapters.sqlite_db import SQLiteDB
+from app.services import query_service, schema_service
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        metrics.reset()
+        metrics.enable()
+        self.addCleanup(metrics.reset)
+        self.addCleanup(metrics.disable)
+
+    def test_disabled_registry_records_nothing(self):
+        metrics.disable()
+        metrics.inc("rows_total", 5)
+        metrics.set_gauge("rate", 1.5)
+        with metrics.timer("stage_seconds") as t:
+            pass
+        self.assertEqual(0.0, t.elapsed)
+        self.assertEqual({}, json.loads(metrics.to_json()))
+
+    def test_counters_gauges_and_histograms(self):
+        metrics.inc("rows_total", 2, kind="students")
+        metrics.inc("rows_total", 3, kind="students")
+        metrics.inc("rows_total", kind="rooms")
+        metrics.set_gauge("rate", 10)
+        metrics.set_gauge("rate", 20)
+        metrics.observe("batch_seconds", 0.003)
+        metrics.observe("batch_seconds", 0.2)
+        snapshot = json.loads(metrics.to_json())
+        self.assertEqual([{"labels": {"kind": "rooms"}, "value": 1},
+                          {"labels": {"kind": "students"}, "value": 5}],
+                         snapshot["rows_total"]["series"])
+        self.assertEqual(20, snapshot["rate"]["series"][0]["value"])
+        histogram = snapshot["batch_seconds"]["series"][0]
+        self.assertEqual(2, histogram["count"])
+        self.assertAlmostEqual(0.203, histogram["sum"])
+        self.assertEqual(0, histogram["buckets"]["0.0025"])
+        self.assertEqual(1, histogram["buckets"]["0.005"])
+        self.assertEqual(2, histogram["buckets"]["0.25"])
+
+    def test_prometheus_text_format(self):
+        metrics.inc("rows_total", 4, kind='a"b')
+        metrics.observe("load_seconds", 0.5)
+        text = metrics.to_prometheus()
+        self.assertIn("# TYPE rows_total counter", text)
+        self.assertIn('rows_total{kind="a\\"b"} 4', text)
+        self.assertIn("# TYPE load_seconds histogram", text)
+        self.assertIn('load_seconds_bucket{le="0.5"} 1', text)
+        self.assertIn('load_seconds_bucket{le="+Inf"} 1', text)
+        self.assertIn("load_seconds_count 1", text)
+
+    def test_timed_decorator_and_dump(self):
+        @metrics.timed("work_seconds", stage="x")
+        def work(value):
+            return value * 2
+        self.assertEqual(4, work(2))
+        self.assertEqual("work", work.__name__)
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        metrics.dump(os.path.join(tmp, "m.prom"))
+        metrics.dump(os.path.join(tmp, "m.json"))
+        with open(os.path.join(tmp, "m.prom"), encoding="utf-8") as f:
+            self.assertIn('work_seconds_count{stage="x"} 1', f.read())
+        with open(os.path.join(tmp, "m.json"), encoding="utf-8") as f:
+            self.assertEqual(1, json.load(f)["work_seconds"]["series"][0]["count"])
+
+    def test_services_and_db_are_instrumented(self):
+        with SQLiteDB() as db:
+            schema_service.migrate(db)
+            schema_service.migrate(db)
+            query_service.rooms_counts(db)
+        snapshot = json.loads(metrics.to_json())
+        self.assertEqual(2, sum(s["value"] for s in
+                                snapshot["schema_migrations_applied_total"]["series"]))
+        self.assertEqual(2, snapshot["schema_migrations_skipped_total"]["series"][0]["value"])
+        self.assertEqual({"report": "rooms_counts"},
+                         snapshot["report_seconds"]["series"][0]["labels"])
+        ops = {s["labels"]["op"] for s in snapshot["db_operation_seconds"]["series"]}
+        self.assertTrue({"execute", "query"} <= ops)
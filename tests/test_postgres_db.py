@@ -0,0 +1,30 @@
+import unittest
+from datetime import date
+from psycopg2.extras import RealDictCursor
+from app.adapters.postgres_db import _CopyReader, _copy_value, _row_cursor_factory
+
+class TestCopyFormat(unittest.TestCase):
+    def test_copy_value_escapes(self):
+        self.assertEqual("\\N", _copy_value(None))
+        self.assertEqual("2000-01-02", _copy_value(date(2000, 1, 2)))
+        self.assertEqual("a\\tb\\nc\\\\d", _copy_value("a\tb\nc\\d"))
+
+    def test_copy_reader_chunks(self):
+        reader = _CopyReader([(1, "Room #1"), (2, None)])
+        chunks = []
+        while True:
+            chunk = reader.read(5)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        self.assertEqual("1\tRoom #1\n2\t\\N\n", "".join(chunks))
+        self.assertEqual(2, reader.count)
+
+class TestIterQuery(unittest.TestCase):
+    def test_row_cursor_factory(self):
+        self.assertIs(RealDictCursor, _row_cursor_factory("dict"))
+        with self.assertRaises(ValueError):
+            _row_cursor_factory("frame")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+from unittest import mock
+import psycopg2
+from app.adapters.postgres_pool import PooledPostgresDB
+
+class _FakeCursor:
+    rowcount = -1
+    def __init__(self, conn): self.conn = conn
+    def __enter__(self): return self
+    def __exit__(self, *exc): return False
+    def execute(self, sql, params=None):
+        if self.conn.broken:
+            self.conn.closed = 1
+            raise psycopg2.OperationalError("server closed the connection")
+        self.conn.executed.append(sql)
+    def executemany(self, sql, params_seq): self.conn.executed.append(sql)
+    def fetchall(self): return [{"x": 1}]
+
+class _FakeConn:
+    def __init__(self, broken=False):
+        self.broken = broken
+        self.closed = 0
+        self.autocommit = False
+        self.executed = []
+        self.commits = 0
+        self.rollbacks = 0
+    def cursor(self): return _FakeCursor(self)
+    def commit(self): self.commits += 1
+    def rollback(self): self.rollbacks += 1
+
+class _FakePool:
+    def __init__(self, conns): self.conns = list(conns); self.returned = []
+    def getconn(self): return self.conns.pop(0)
+    def putconn(self, conn, close=False): self.returned.append((conn, close))
+    def closeall(self): pass
+
+class TestPooledPostgresDB(unittest.TestCase):
+    def _db(self, conns, **kwargs):
+        pool = _FakePool(conns)
+        patcher = mock.patch("app.adapters.postgres_pool.ThreadedConnectionPool",
+                             return_value=pool)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        db = PooledPostgresDB("postgresql://test", **kwargs)
+        db.connect()
+        return db, pool
+
+    def test_health_check_discards_broken_connection(self):
+        broken, good = _FakeConn(broken=True), _FakeConn()
+        db, pool = self._db([broken, good])
+        self.assertEqual([{"x": 1}], db.query("SELECT 1 AS x"))
+        self.assertEqual([(broken, True), (good, False)], pool.returned)
+        self.assertEqual(1, good.commits)
+
+    def test_transaction_bound_to_one_connection(self):
+        conn = _FakeConn()
+        db, pool = self._db([conn], health_check=False)
+        with db.transaction():
+            db.execute("INSERT 1")
+            db.executemany("INSERT 2", [(1,), (2,)])
+        self.assertEqual(["INSERT 1", "INSERT 2"], conn.executed)
+        self.assertEqual(1, conn.commits)
+        self.assertEqual([(conn, False)], pool.returned)
+
+    def test_transaction_rollback_on_error(self):
+        conn = _FakeConn()
+        db, _ = self._db([conn], health_check=False)
+        with self.assertRaises(RuntimeError):
+            with db.transaction():
+                db.execute("INSERT 1")
+                raise RuntimeError("boom")
+        self.assertEqual((0, 1), (conn.commits, conn.rollbacks))
+
+    def test_reconnect_on_failure(self):
+        dropped, fresh = _FakeConn(), _FakeConn()
+        db, pool = self._db([dropped, fresh], health_check=False)
+        dropped.broken = True
+        db.execute("UPDATE t SET x = 1")
+        self.assertEqual(["UPDATE t SET x = 1"], fresh.executed)
+        self.assertEqual((dropped, True), pool.returned[0])
+
+    def test_invalid_pool_size(self):
+        with self.assertRaises(ValueError):
+            PooledPostgresDB("postgresql://test", minconn=5, maxconn=2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -11,6 +11,13 @@ class TestQueryService(unittest.TestCase):
         self.assertIn("FROM rooms", db.queries[0][0])
         self.assertEqual([{"id":1,"name":"R1","count":2}], rows)
 
+    def test_rooms_counts_iter_streams(self):
+        db = FakeDB()
+        db.set_query_result([{"id": 1, "name": "R1", "count": 2}])
+        rows = qs.rooms_counts_iter(db, chunk_size=10)
+        self.assertEqual([{"id": 1, "name": "R1", "count": 2}], list(rows))
+        self.assertIn("FROM rooms", db.queries[0][0])
+
     def test_top5_young_avg_sql(self):
         db = FakeDB(); db.set_query_result([{"id":1}])
         qs.top5_young_avg(db)
@@ -29,5 +36,77 @@ class TestQueryService(unittest.TestCase):
         self.assertIn("having count(distinct s.sex) >= 2",
                       db.queries[0][0].lower())
 
+    def test_run_reports_shape_and_timings(self):
+        db = FakeDB(); db.set_query_result([{"id": 1}])
+        timings = {}
+        result = qs.run_reports(db, timings=timings)
+        self.assertEqual(list(qs.REPORTS), list(result))
+        self.assertTrue(all(rows == [{"id": 1}] for rows in result.values()))
+        self.assertEqual(set(qs.REPORTS), set(timings))
+        self.assertEqual(4, len(db.queries))
+
+    def test_run_reports_isolates_errors(self):
+        class FlakyDB(FakeDB):
+            def query(self, sql, params=None):
+                if "HAVING" in sql:
+                    raise RuntimeError("boom")
+                return super().query(sql, params)
+        db = FlakyDB(); db.set_query_result([{"id": 1}])
+        result = qs.run_reports(db, ["top5_young_avg", "rooms_with_mixed_gender"])
+        self.assertEqual([{"id": 1}], result["top5_young_avg"])
+        self.assertEqual([], result["rooms_with_mixed_gender"])
+
+    def test_reports_from_stats_table(self):
+        db = FakeDB(); db.set_query_result([{"id": 1}])
+        db.set_query_result_for("AS present", [{"present": True}])
+        qs.run_reports(db, from_stats=True)
+        self.assertEqual(5, len(db.queries))  # проверка наличия room_stats и 4 отчёта
+        self.assertTrue(all("room_stats" in sql for sql, _ in db.queries))
+        self.assertTrue(all("students" not in sql for sql, _ in db.queries))
+
+    def test_reports_from_missing_stats_table_fail(self):
+        db = FakeDB(); db.set_query_result_for("AS present", [{"present": False}])
+        with self.assertRaises(ValueError):
+            qs.run_reports(db, from_stats=True)
+        self.assertEqual(1, len(db.queries))
+
+    def test_run_reports_unknown_name(self):
+        with self.assertRaises(ValueError):
+            qs.run_reports(FakeDB(), ["nope"])
+
+    def test_combined_reports_derivation(self):
+        from decimal import Decimal
+        aggregate = [
+            {"id": i, "name": f"R{i}", "count": cnt,
+             "avg_age_years": Decimal(avg) if cnt else None,
+             "diff_age_years": Decimal(diff) if cnt else None,
+             "sex_count": sexes}
+            for i, cnt, avg, diff, sexes in [
+                (1, 2, 20, 3, 2), (2, 0, 0, 0, 0), (3, 1, 18, 0, 1), (4, 3, 25, 9, 2),
+                (5, 2, 18, 9, 1), (6, 1, 30, 0, 1), (7, 2, 22, 1, 2), (8, 1, 40, 0, 1),
+            ]
+        ]
+        db = FakeDB(); db.set_query_result(aggregate)
+        result = qs.run_reports(db, combined=True)
+        self.assertEqual(1, len(db.queries))
+        self.assertIn("count(distinct s.sex)", db.queries[0][0].lower())
+        self.assertEqual(list(qs.REPORTS), list(result))
+        self.assertEqual([{"id": 2, "name": "R2", "count": 0}],
+                         [r for r in result["count_student_in_rooms"] if r["id"] == 2])
+        self.assertEqual(8, len(result["count_student_in_rooms"]))
+        self.assertEqual([3, 5, 1, 7, 4], [r["id"] for r in result["top5_young_avg"]])
+        self.assertEqual([4, 5, 1, 7, 3], [r["id"] for r in result["top5_age_spread"]])
+        self.assertEqual({"id": 4, "name": "R4", "diff_age_years": Decimal(9)},
+                         result["top5_age_spread"][0])
+        self.assertEqual([{"id": 1, "name": "R1"}, {"id": 4, "name": "R4"},
+                          {"id": 7, "name": "R7"}], result["rooms_with_mixed_gender"])
+
+    def test_combined_reports_failure_isolated(self):
+        class BrokenDB(FakeDB):
+            def query(self, sql, params=None):
+                raise RuntimeError("boom")
+        result = qs.combined_reports(BrokenDB())
+        self.assertTrue(all(rows == [] for rows in result.values()))
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
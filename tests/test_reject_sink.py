@@ -0,0 +1,93 @@
+import unittest, tempfile, os, json, shutil
+from unittest import mock
+from tests.fake_db import FakeDB
+from app.services import reject_sink
+from app.services.load_service import load_students
+from app.services.reject_sink import RejectSink
+
+class TestRejectSink(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.path = os.path.join(self.tmp, "q", "rejects.ndjson")
+
+    def _lines(self):
+        with open(self.path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+    def test_quarantine_is_written_in_batches(self):
+        sink = RejectSink(self.path, buffer_size=3, log_sample=0)
+        sink.source = "students.json"
+        for i in range(1, 5):
+            sink.reject("students", i, {"id": i, "sex": "X"}, "invalid_sex", "bad sex")
+        # три записи ушли пачкой, четвёртая ещё в буфере
+        self.assertEqual([1, 2, 3], [r["index"] for r in self._lines()])
+        sink.close()
+        lines = self._lines()
+        self.assertEqual(4, len(lines))
+        self.assertEqual({"kind": "students", "source": "students.json", "index": 4,
+                          "reason": "invalid_sex", "error": "bad sex",
+                          "record": {"id": 4, "sex": "X"}}, lines[3])
+        # повторное открытие дописывает файл
+        with RejectSink(self.path) as again:
+            again.reject("rooms", 1, "junk", "not_a_dict", "not a dict: str")
+        self.assertEqual(5, len(self._lines()))
+
+    def test_transaction_discards_rejects_on_error(self):
+        sink = RejectSink(self.path, buffer_size=1, log_sample=0)
+        with self.assertRaises(RuntimeError):
+            with sink.transaction():
+                sink.reject("students", 1, {"id": 1}, "invalid_sex", "bad sex")
+                raise RuntimeError("rollback")
+        with sink.transaction():
+            sink.reject("students", 1, {"id": 1}, "invalid_sex", "bad sex")
+            self.assertEqual(0, sink.total)  # до конца блока только отложены
+        sink.close()
+        self.assertEqual({"invalid_sex": 1}, dict(sink.counts))
+        self.assertEqual([1], [r["index"] for r in self._lines()])
+
+    def test_no_file_without_rejects(self):
+        RejectSink(self.path).close()
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_logging_is_sampled_and_rate_limited(self):
+        clock = mock.Mock(return_value=0.0)
+        with mock.patch.object(reject_sink, "monotonic", clock):
+            sink = RejectSink(log_sample=2, log_interval=5.0)
+            with self.assertLogs("app.services.reject_sink") as logs:
+                for i in range(100):
+                    sink.reject("students", i, {}, "missing_field", "Missing field id")
+                sink.reject("students", 100, [], "not_a_dict", "not a dict: list")
+                clock.return_value = 6.0
+                sink.reject("students", 101, {}, "missing_field", "Missing field id")
+                sink.close()
+                sink.close()
+        self.assertEqual({"missing_field": 101, "not_a_dict": 1}, sink.counts)
+        # 2 + 1 выборочных строки, одна сводка по времени и итог при закрытии
+        self.assertEqual(5, len(logs.output))
+        self.assertIn("Пропущено ещё 99", logs.output[3])
+        self.assertIn("Всего пропущено некорректных записей: 102", logs.output[4])
+
+    def test_load_students_quarantines_invalid_records(self):
+        students = [
+            {"id": 1, "name": "A", "sex": "F", "birthday": "1999-05-01", "room_id": 1},
+            {"id": 2, "name": "B", "sex": "F", "birthday": "31.02.2001", "room_id": 1},
+            {"id": 3, "name": "C", "sex": "F", "room_id": 1},
+            {"id": "x", "name": "D", "sex": "M", "birthday": "1999-05-01", "room_id": 1},
+            "junk",
+        ]
+        source = os.path.join(self.tmp, "students.json")
+        with open(source, "w", encoding="utf-8") as f:
+            json.dump(students, f)
+        db = FakeDB()
+        with RejectSink(self.path) as rejects:
+            self.assertEqual(1, load_students(db, source, rejects=rejects))
+            # после загрузки карантин уже сброшен на диск
+            self.assertEqual(4, len(self._lines()))
+        self.assertEqual(["invalid_birthday", "missing_field", "invalid_value", "not_a_dict"],
+                         [r["reason"] for r in self._lines()])
+        self.assertEqual([2, 3, 4, 5], [r["index"] for r in self._lines()])
+        self.assertEqual(students[1], self._lines()[0]["record"])
+
+if __name__ == "__main__":
+    unittest.main()
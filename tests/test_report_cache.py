@@ -0,0 +1,143 @@
+import unittest, tempfile, os, json, shutil
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+from app.adapters import report_cache
+from app.adapters.report_cache import DiskReportCache, MemoryReportCache
+from app.adapters.sqlite_db import SQLiteDB
+from app.services import schema_service, load_service, query_service as qs
+
+class TestMemoryReportCache(unittest.TestCase):
+    def test_lru_eviction(self):
+        cache = MemoryReportCache(max_entries=2)
+        cache.set("a", [{"id": 1}])
+        cache.set("b", [])
+        self.assertEqual([{"id": 1}], cache.get("a"))  # a становится свежее b
+        cache.set("c", [{"id": 3}])
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual([{"id": 3}], cache.get("c"))
+        self.assertEqual(2, len(cache))
+        cache.clear()
+        self.assertIsNone(cache.get("a"))
+
+    def test_ttl(self):
+        clock = mock.Mock(return_value=100.0)
+        with mock.patch.object(report_cache, "monotonic", clock):
+            cache = MemoryReportCache(ttl=10)
+            cache.set("a", [{"id": 1}])
+            clock.return_value = 109.0
+            self.assertEqual([{"id": 1}], cache.get("a"))
+            clock.return_value = 110.0
+            self.assertIsNone(cache.get("a"))
+        self.assertEqual(0, len(cache))
+
+
+class TestDiskReportCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.dir = os.path.join(self.tmp, "cache")
+
+    def test_roundtrip_keeps_types_and_survives_new_instance(self):
+        rows = [{"id": 1, "avg_age_years": Decimal("21")}]
+        DiskReportCache(self.dir).set("k", rows)
+        self.assertEqual(rows, DiskReportCache(self.dir).get("k"))
+        self.assertIsNone(DiskReportCache(self.dir).get("other"))
+
+    def test_eviction_ttl_and_corruption(self):
+        cache = DiskReportCache(self.dir, max_entries=2)
+        for i, key in enumerate("abc"):
+            cache.set(key, [{"id": i}])
+            path = cache._path(key)
+            os.utime(path, ns=(i * 10**9, i * 10**9))
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(2, len(os.listdir(self.dir)))
+        with open(cache._path("c"), "wb") as f:
+            f.write(b"not a pickle")
+        with self.assertLogs("app.adapters.report_cache", level="WARNING"):
+            self.assertIsNone(cache.get("c"))
+        self.assertFalse(os.path.exists(cache._path("c")))
+        with mock.patch.object(report_cache, "time", return_value=0.0):
+            cache.set("old", [])
+        self.assertIsNone(DiskReportCache(self.dir, ttl=60).get("old"))
+        cache.clear()
+        self.assertEqual([], os.listdir(self.dir))
+
+
+class TestReportCaching(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.db = SQLiteDB(":memory:")
+        self.db.connect()
+        self.addCleanup(self.db.close)
+        schema_service.migrate(self.db)
+        self.cache = MemoryReportCache()
+
+    def _load(self, students):
+        rooms = os.path.join(self.tmp, "rooms.json")
+        path = os.path.join(self.tmp, "students.json")
+        with open(rooms, "w", encoding="utf-8") as f:
+            json.dump([{"id": 1, "name": "A"}, {"id": 2, "name": "B"}], f)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(students, f)
+        load_service.load_rooms(self.db, rooms)
+        load_service.load_students(self.db, path)
+
+    def _student(self, i, sex="M"):
+        return {"id": i, "name": f"S{i}", "sex": sex, "birthday": "2000-01-01", "room_id": 1}
+
+    def test_no_version_before_first_load(self):
+        self.assertIsNone(load_service.data_version(self.db))
+        qs.run_reports(self.db, cache=self.cache)
+        self.assertEqual(0, len(self.cache))
+
+    def test_recomputed_only_when_version_moves(self):
+        self._load([self._student(1)])
+        version = load_service.data_version(self.db)
+        first = qs.run_reports(self.db, cache=self.cache)
+        self.assertEqual(4, len(self.cache))
+        with mock.patch.object(self.db, "query", wraps=self.db.query) as query:
+            self.assertEqual(first, qs.run_reports(self.db, cache=self.cache))
+        # только чтение версии: проверка таблицы и выборка
+        self.assertEqual(2, query.call_count)
+        # загрузка нового студента меняет версию — отчёты пересчитываются
+        self._load([self._student(2, "F")])
+        self.assertNotEqual(version, load_service.data_version(self.db))
+        second = qs.run_reports(self.db, cache=self.cache)
+        self.assertEqual([{"id": 1, "name": "A"}], second["rooms_with_mixed_gender"])
+        self.assertEqual(second, qs.run_reports(self.db, combined=True, cache=self.cache))
+
+    def test_unchanged_reload_keeps_version(self):
+        self._load([self._student(1)])
+        version = load_service.data_version(self.db)
+        self._load([self._student(1)])  # те же строки: ON CONFLICT DO NOTHING
+        self.assertEqual(version, load_service.data_version(self.db))
+
+    def test_age_reports_recomputed_next_day(self):
+        self._load([self._student(1)])
+        qs.run_reports(self.db, cache=self.cache)
+        with mock.patch.object(qs, "date") as clock, \
+                mock.patch.object(qs, "_query_try", return_value=([], True)) as query:
+            clock.today.return_value = date(2100, 1, 1)
+            qs.run_reports(self.db, cache=self.cache)
+        self.assertEqual({"top5_young_avg", "top5_age_spread"},
+                         {call.args[2] for call in query.call_args_list})
+
+    def test_failures_are_not_cached(self):
+        self._load([self._student(1)])
+        real_query = self.db.query
+
+        def flaky(sql, params=None):
+            if "HAVING" in sql:
+                raise RuntimeError("boom")
+            return real_query(sql, params)
+        with mock.patch.object(self.db, "query", side_effect=flaky):
+            result = qs.run_reports(self.db, cache=self.cache)
+        self.assertEqual([], result["rooms_with_mixed_gender"])
+        self.assertEqual(3, len(self.cache))
+        qs.run_reports(self.db, ["rooms_with_mixed_gender"], cache=self.cache)
+        self.assertEqual(4, len(self.cache))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -10,7 +10,9 @@ class TestSchemaService(unittest.TestCase):
             f.write("CREATE TABLE t(x int);"); f.close()
             schema_service.ensure_schema(db, f.name)
             self.assertTrue(db.executed)
-            self.assertIn("CREATE TABLE t", db.executed[0][0])
+            self.assertIn("CREATE TABLE IF NOT EXISTS schema_migrations", db.executed[0][0])
+            self.assertIn("CREATE TABLE t", db.executed[1][0])
+            self.assertEqual("schema", db.executed[2][1][0])
         finally:
             os.unlink(f.name)
 
@@ -21,9 +23,73 @@ class TestSchemaService(unittest.TestCase):
             f.write("CREATE INDEX i ON t(x);"); f.close()
             schema_service.ensure_indexes(db, f.name)
             self.assertTrue(db.executed)
-            self.assertIn("CREATE INDEX i", db.executed[-1][0])
+            self.assertIn("CREATE INDEX i", db.executed[1][0])
         finally:
             os.unlink(f.name)
 
+    def test_ensure_load_meta_default_file(self):
+        db = FakeDB()
+        schema_service.ensure_load_meta(db)
+        self.assertIn("CREATE TABLE IF NOT EXISTS load_row_hashes", db.executed[1][0])
+
+    def test_refresh_room_stats_for_rooms(self):
+        db = FakeDB()
+        schema_service.refresh_room_stats(db, [3, 1, 3])
+        sql, params = db.executed[0]
+        self.assertIn("DELETE FROM room_stats", sql)
+        self.assertEqual(([1, 3], [1, 3]), params)
+        schema_service.refresh_room_stats(db, [])
+        self.assertEqual(1, len(db.executed))
+
+    def test_ensure_room_stats_builds_when_empty(self):
+        db = FakeDB()
+        db.set_query_result([{"needs_build": True}])
+        schema_service.ensure_room_stats(db)
+        self.assertIn("CREATE TABLE IF NOT EXISTS room_stats", db.executed[1][0])
+        self.assertIn("TRUNCATE room_stats", db.executed[3][0])
+        self.assertIn("INSERT INTO room_stats_version", db.executed[4][0])
+
+    def test_ensure_room_stats_skips_current_table(self):
+        db = FakeDB()
+        db.set_query_result_for("AS needs_build", [{"needs_build": False}])
+        schema_service.ensure_room_stats(db)
+        self.assertFalse([sql for sql, _ in db.executed if "TRUNCATE" in sql])
+
+    def test_require_room_stats(self):
+        db = FakeDB()
+        db.set_query_result_for("AS present", [{"present": False}])
+        with self.assertRaises(ValueError):
+            schema_service.require_room_stats(db)
+
+    def test_migrate_skips_unchanged_files(self):
+        db = FakeDB()
+        db.set_query_result_for("AS present", [{"present": True}])
+        sql = open("sql/schema_pg.sql", encoding="utf-8").read()
+        db.set_query_result_for("FROM schema_migrations",
+                                [{"name": "schema", "checksum": schema_service._checksum(sql)},
+                                 {"name": "indexes", "checksum": "old"}])
+        self.assertEqual(["indexes"], schema_service.migrate(db))
+        self.assertEqual(2, len(db.executed))  # только индексы и их запись
+        self.assertIn("CREATE INDEX", db.executed[0][0])
+        self.assertEqual([], schema_service.migrate(db, ["schema"]))
+        self.assertEqual(2, len(db.executed))
+        with self.assertRaises(ValueError):
+            schema_service.migrate(db, ["views"])
+
+    def test_concurrent_index_statements(self):
+        statements = schema_service._concurrent_statements(
+            "CREATE INDEX IF NOT EXISTS a ON t(x);\ncreate unique index b ON t(y);")
+        self.assertEqual(["CREATE INDEX CONCURRENTLY IF NOT EXISTS a ON t(x)",
+                          "CREATE UNIQUE INDEX CONCURRENTLY b ON t(y)"], statements)
+
+    def test_concurrent_indexes_rebuild_invalid(self):
+        db = FakeDB()
+        db.set_query_result_for("indisvalid", [{"name": "idx_students_sex"}])
+        schema_service.ensure_indexes(db, concurrently=True)
+        sqls = [sql for sql, _ in db.executed]
+        self.assertIn('DROP INDEX CONCURRENTLY IF EXISTS "idx_students_sex";', sqls)
+        self.assertEqual(3, sum("CREATE INDEX CONCURRENTLY" in sql for sql in sqls))
+        self.assertIn("INSERT INTO schema_migrations", sqls[-1])
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
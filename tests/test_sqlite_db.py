@@ -0,0 +1,141 @@
+import unittest, tempfile, os, json, shutil
+from datetime import date
+from app.adapters.sqlite_db import SQLiteDB, _split_script, _translate
+from app.services import schema_service, load_service, query_service as qs
+
+class TestTranslate(unittest.TestCase):
+    def test_placeholders(self):
+        self.assertEqual(("SELECT ? , '%'", (1,)), _translate("SELECT %s , '%%'", (1,)))
+        self.assertEqual(("x = :a", {"a": 1}), _translate("x = %(a)s", {"a": 1}))
+        self.assertEqual(("SELECT 1", ()), _translate("SELECT 1", None))
+
+    def test_any_array(self):
+        sql, params = _translate("DELETE FROM t WHERE k = %s AND id = ANY(%s);", ("s", [1, 2]))
+        self.assertEqual("DELETE FROM t WHERE k = ? AND id IN (SELECT value FROM json_each(?));",
+                         sql)
+        self.assertEqual(("s", "[1, 2]"), params)
+
+    def test_split_script(self):
+        script = "CREATE TABLE a(x TEXT DEFAULT ';'); -- b; c\nCREATE TABLE b(y INT);\n"
+        self.assertEqual(2, len(_split_script(script)))
+
+
+class TestSQLiteDB(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.db = SQLiteDB(":memory:")
+        self.db.connect()
+        self.addCleanup(self.db.close)
+        schema_service.ensure_schema(self.db)
+        schema_service.ensure_indexes(self.db)
+
+    def _json(self, name, data):
+        path = os.path.join(self.tmp, name)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        return path
+
+    def _load(self):
+        rooms = self._json("rooms.json", [{"id": 1, "name": "A"}, {"id": 2, "name": "B"},
+                                          {"id": 3, "name": "C"}])
+        students = self._json("students.json", [
+            {"id": 1, "name": "x", "sex": "M", "birthday": "2000-03-15", "room": 1},
+            {"id": 2, "name": "y", "sex": "F", "birthday": "1990-03-15", "room": 1},
+            {"id": 3, "name": "z", "sex": "M", "birthday": "2001-03-15", "room": 2},
+        ])
+        self.assertEqual(3, load_service.load_rooms(self.db, rooms))
+        self.assertEqual(3, load_service.load_students(self.db, students, batch_size=2))
+
+    def test_query_iter_and_types(self):
+        self._load()
+        rows = self.db.query("SELECT id, birthday FROM students WHERE id = %s", (1,))
+        self.assertEqual([{"id": 1, "birthday": "2000-03-15"}], rows)
+        self.assertEqual([(1,), (2,), (3,)],
+                         list(self.db.iter_query("SELECT id FROM rooms ORDER BY id",
+                                                 chunk_size=2, row_type="tuple")))
+        row = next(self.db.iter_query("SELECT id, name FROM rooms", row_type="namedtuple"))
+        self.assertEqual("A", row.name)
+
+    def test_reports(self):
+        self._load()
+        self.assertEqual([{"id": 1, "name": "A", "count": 2}, {"id": 2, "name": "B", "count": 1},
+                          {"id": 3, "name": "C", "count": 0}], qs.rooms_counts(self.db))
+        # один день рождения — разница ровно 10 лет при любой текущей дате
+        self.assertEqual([{"id": 1, "name": "A", "diff_age_years": 10},
+                          {"id": 2, "name": "B", "diff_age_years": 0}],
+                         qs.top5_age_spread(self.db))
+        self.assertEqual([{"id": 1, "name": "A"}], qs.mixed_gender_rooms(self.db))
+        # комната 1 в среднем на 5 лет старше студента 2000 г.р., комната 2 — на год младше
+        young = qs.top5_young_avg(self.db)
+        self.assertEqual([2, 1], [r["id"] for r in young])
+        self.assertEqual(young[0]["avg_age_years"] + 6, young[1]["avg_age_years"])
+        self.assertEqual(qs.run_reports(self.db), qs.run_reports(self.db, combined=True))
+
+    def test_transaction_rollback(self):
+        with self.assertRaises(RuntimeError):
+            with self.db.transaction():
+                self.db.execute("INSERT INTO rooms(id, name) VALUES (%s, %s)", (9, "Z"))
+                raise RuntimeError("boom")
+        self.assertEqual([], self.db.query("SELECT id FROM rooms"))
+
+    def test_nested_transaction_joins_outer(self):
+        with self.assertRaises(RuntimeError):
+            with self.db.transaction():
+                with self.db.transaction():
+                    self.db.execute("INSERT INTO rooms(id, name) VALUES (%s, %s)", (9, "Z"))
+                raise RuntimeError("boom")
+        self.assertEqual([], self.db.query("SELECT id FROM rooms"))
+
+    def test_copy_rows_and_foreign_keys(self):
+        self.assertEqual(2, self.db.copy_rows("rooms", ("id", "name"), iter([(1, "A"), (2, "B")])))
+        with self.assertRaises(Exception):
+            self.db.execute("INSERT INTO students VALUES (%s, %s, %s, %s, %s)",
+                            (1, "x", "M", date(2000, 1, 1), 99))
+
+    def test_incremental_reload(self):
+        schema_service.ensure_load_meta(self.db)
+        rooms = self._json("rooms.json", [{"id": 1, "name": "A"}, {"id": 2, "name": "B"}])
+        self.assertEqual(2, load_service.load_rooms(self.db, rooms, incremental=True))
+        self.assertEqual(0, load_service.load_rooms(self.db, rooms, incremental=True))
+        rooms = self._json("rooms.json", [{"id": 1, "name": "A2"}])
+        self.assertEqual(2, load_service.load_rooms(self.db, rooms, incremental=True,
+                                                    delete_missing=True))
+        self.assertEqual([{"id": 1, "name": "A2"}], self.db.query("SELECT * FROM rooms"))
+
+    def test_delete_missing_keeps_rows_of_other_files(self):
+        schema_service.ensure_load_meta(self.db)
+        rooms_a = self._json("rooms_a.json", [{"id": 1, "name": "A"}, {"id": 2, "name": "B"}])
+        rooms_b = self._json("rooms_b.json", [{"id": 3, "name": "C"}])
+        students = self._json("students.json", [
+            {"id": 1, "name": "S", "sex": "M", "birthday": "2001-02-03T00:00:00", "room": 1}])
+        load_service.load_rooms(self.db, rooms_a, incremental=True)
+        load_service.load_rooms(self.db, rooms_b, incremental=True, delete_missing=True)
+        load_service.load_students(self.db, students)
+        self.assertEqual([1, 2, 3], [r["id"] for r in self.db.query("SELECT id FROM rooms ORDER BY id")])
+        rooms_a = self._json("rooms_a.json", [{"id": 2, "name": "B"}])
+        with self.assertRaises(ValueError):
+            load_service.load_rooms(self.db, rooms_a, incremental=True, delete_missing=True)
+        self.assertEqual([1, 2, 3], [r["id"] for r in self.db.query("SELECT id FROM rooms ORDER BY id")])
+
+    def test_load_meta_reapplied_after_checksum_change(self):
+        # таблица из первой версии миграции — без столбца path
+        self.db.execute("CREATE TABLE load_row_hashes (kind TEXT NOT NULL, id INTEGER NOT NULL, "
+                        "row_hash INTEGER NOT NULL, PRIMARY KEY (kind, id));")
+        schema_service.ensure_load_meta(self.db)
+        self.db.execute("UPDATE schema_migrations SET checksum = 'old' WHERE name = 'load_meta';")
+        schema_service.ensure_load_meta(self.db)
+        columns = [r["name"] for r in self.db.query("SELECT name FROM pragma_table_info('load_row_hashes')")]
+        self.assertEqual(["kind", "id", "row_hash", "path"], columns)
+
+    def test_postgres_only_features(self):
+        rooms = self._json("rooms.json", [])
+        with self.assertRaises(ValueError):
+            load_service.load_rooms(self.db, rooms, method="copy")
+        with self.assertRaises(ValueError):
+            schema_service.ensure_room_stats(self.db)
+        with self.assertRaises(ValueError):
+            qs.top5_young_avg(self.db, from_stats=True)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest, tempfile, os, json, shutil
+from datetime import date
+from app.services import query_service as qs
+
+try:
+    import numpy as np
+    from app.adapters.vector_engine import VectorReportEngine
+except ImportError:  # numpy не установлен
+    np = None
+
+TODAY = date(2024, 10, 10)
+
+@unittest.skipUnless(np is not None, "numpy не установлен")
+class TestVectorEngine(unittest.TestCase):
+    def _engine(self):
+        # комната 1 продублирована (побеждает первая), комната 3 пустая;
+        # студент 1 продублирован, студент 4 живёт в несуществующей комнате 9
+        return VectorReportEngine(
+            np.array([2, 1, 3, 1]), ["B", "A", "C", "Dup"],
+            np.array([1, 2, 3, 4, 1]), np.array([1, 1, 2, 9, 2]),
+            np.array([0, 1, 0, 1, 1], dtype=np.uint8),
+            np.array(["2000-05-20", "1990-01-01", "2004-10-11", "2001-01-01", "1950-01-01"],
+                     dtype="datetime64[D]"),
+            today=TODAY)
+
+    def test_age_months_matches_pg_age(self):
+        engine = self._engine()
+        months = engine._age_months(np.array(["2000-05-20", "2004-10-11", "2004-10-10"],
+                                              dtype="datetime64[D]"))
+        # AGE('2024-10-10', ...) = 24y4m, 19y11m, 20y0m
+        self.assertEqual([292, 239, 240], months.tolist())
+
+    def test_reports(self):
+        engine = self._engine()
+        self.assertEqual([{"id": 1, "name": "A", "count": 2},
+                          {"id": 2, "name": "B", "count": 1},
+                          {"id": 3, "name": "C", "count": 0}], qs.rooms_counts(engine))
+        # комната 1: (292 + 417) // 2 = 354 месяца -> 29 лет; комната 2: 239 -> 19 лет
+        self.assertEqual([{"id": 2, "name": "B", "avg_age_years": 19},
+                          {"id": 1, "name": "A", "avg_age_years": 29}],
+                         qs.top5_young_avg(engine))
+        self.assertEqual([{"id": 1, "name": "A", "diff_age_years": 10},
+                          {"id": 2, "name": "B", "diff_age_years": 0}],
+                         qs.top5_age_spread(engine))
+        self.assertEqual([{"id": 1, "name": "A"}], qs.mixed_gender_rooms(engine))
+
+    def test_combined_matches_separate(self):
+        engine = self._engine()
+        self.assertEqual(qs.run_reports(engine), qs.run_reports(engine, combined=True))
+
+    def test_top5_ties_by_id(self):
+        engine = VectorReportEngine(
+            np.arange(7), [f"R{i}" for i in range(7)], np.arange(7), np.arange(7)[::-1],
+            np.zeros(7, dtype=np.uint8),
+            np.full(7, "2000-01-01", dtype="datetime64[D]"), today=TODAY)
+        self.assertEqual([0, 1, 2, 3, 4], [r["id"] for r in engine.report("top5_young_avg")])
+
+    def test_from_json_validates(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        rooms = os.path.join(tmp, "rooms.json")
+        students = os.path.join(tmp, "students.json")
+        with open(rooms, "w", encoding="utf-8") as f:
+            json.dump([{"id": 1, "name": "A"}, {"name": "no id"}], f)
+        with open(students, "w", encoding="utf-8") as f:
+            json.dump({"students": [
+                {"id": 1, "name": "x", "sex": "M", "birthday": "2000-05-20", "room": 1},
+                {"id": 2, "name": "y", "sex": "X", "birthday": "2000-05-20", "room": 1},
+                {"id": 3, "name": "z", "sex": "F", "birthday": "2000-05-20", "room": 1},
+            ]}, f)
+        engine = VectorReportEngine.from_json(rooms, students, today=TODAY)
+        self.assertEqual([{"id": 1, "name": "A", "count": 2}], engine.report("rooms_counts"))
+        self.assertEqual([{"id": 1, "name": "A"}], engine.report("mixed_gender_rooms"))
+
+    def test_unknown_report(self):
+        with self.assertRaises(ValueError):
+            self._engine().report("nope")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest, tempfile, os, json, shutil
+from unittest import mock
+from app.adapters.sqlite_db import SQLiteDB
+from app.services import schema_service, watch_service
+from app.services.reject_sink import RejectSink
+from app.services.watch_service import _Scanner
+
+class TestWatchService(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.inbox = os.path.join(self.tmp, "inbox")
+        os.mkdir(self.inbox)
+        self.db = SQLiteDB(os.path.join(self.tmp, "u.db"))
+        self.db.connect()
+        self.addCleanup(self.db.close)
+        schema_service.ensure_schema(self.db)
+        schema_service.ensure_load_meta(self.db)
+
+    def _drop(self, name, data):
+        path = os.path.join(self.inbox, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(data if isinstance(data, str) else json.dumps(data))
+        return path
+
+    def _students(self, *ids):
+        return [{"id": i, "name": f"S{i}", "sex": "M", "birthday": "2000-01-01", "room": 1}
+                for i in ids]
+
+    def _watch(self, on_change, polls=3):
+        return watch_service.watch(self.db, self.inbox, on_change, interval=0.001,
+                                   max_polls=polls)
+
+    def test_burst_loaded_in_one_transaction_and_reported_once(self):
+        self._drop("rooms.json", [{"id": 1, "name": "A"}])
+        self._drop("students_1.json", self._students(1, 2))
+        self._drop("students_2.json", self._students(3))
+        changes = []
+        with mock.patch.object(self.db, "transaction", wraps=self.db.transaction) as tx:
+            self.assertEqual(4, self._watch(changes.append))
+        self.assertEqual([{"files": 3, "written": 4}], changes)
+        # одна внешняя транзакция серии + по одной вложенной на файл
+        self.assertEqual(4, tx.call_count)
+        self.assertEqual(3, len(self.db.query("SELECT id FROM students")))
+
+    def test_unchanged_data_does_not_trigger_export(self):
+        self._drop("rooms.json", [{"id": 1, "name": "A"}])
+        self._watch(lambda summary: None)
+        on_change = mock.Mock()
+        self.assertEqual(0, self._watch(on_change))  # файл тот же — загрузка пропущена
+        on_change.assert_not_called()
+
+    def test_bad_file_does_not_block_the_rest(self):
+        self._drop("rooms.json", [{"id": 1, "name": "A"}])
+        self._drop("students.json", "[{")
+        changes = []
+        self.assertEqual(1, self._watch(changes.append))
+        self.assertEqual([{"files": 2, "written": 1}], changes)
+        self.assertEqual([{"id": 1}], self.db.query("SELECT id FROM rooms"))
+
+    def test_rejects_of_rolled_back_burst_counted_once(self):
+        self._drop("rooms.json", [{"id": 1, "name": "A"}])
+        self._drop("students_1.json", self._students(1) + [{**self._students(2)[0], "sex": "X"}])
+        self._drop("students_2.json", "[{")
+        quarantine = os.path.join(self.tmp, "rejects.ndjson")
+        with RejectSink(quarantine) as rejects:
+            watch_service.watch(self.db, self.inbox, interval=0.001, max_polls=3,
+                                rejects=rejects)
+        self.assertEqual({"invalid_sex": 1}, dict(rejects.counts))
+        with open(quarantine, encoding="utf-8") as f:
+            self.assertEqual(1, len(f.readlines()))
+
+    def test_scanner_waits_for_stable_files(self):
+        scanner = _Scanner(self.inbox, watch_service.WATCH_PATTERNS)
+        self._drop("rooms.json", [])
+        self._drop("notes.txt", "x")
+        scanner.poll()
+        self.assertTrue(scanner.busy)
+        self.assertFalse(scanner.has_ready())
+        scanner.poll()
+        self.assertFalse(scanner.busy)
+        (kind, path, signature), = scanner.take()
+        self.assertEqual(("rooms", "rooms.json"), (kind, os.path.basename(path)))
+        scanner.mark_done(path, signature)
+        self._drop("students.json", self._students(1) * 100)  # «дописывается»
+        scanner.poll()
+        self.assertTrue(scanner.busy)
+        self.assertFalse(scanner.has_ready())
+
+if __name__ == "__main__":
+    unittest.main()